@@ -31,7 +31,7 @@ from lib.defines import (
     SCION_UDP_EH_DATA_PORT,
 )
 from lib.errors import SCIONServiceLookupError
-from lib.log import log_exception
+from lib.log import Lazy, log_exception
 from lib.msg_meta import SockOnlyMetadata
 from lib.packet.host_addr import HostAddrNone
 from lib.packet.path import PathCombinator, SCIONPath
@@ -49,7 +49,7 @@ from lib.types import (
     PathSegmentType as PST,
     PayloadClass,
 )
-from lib.util import SCIONTime
+from lib.util import SCIONTime, sleep_interval
 SCIOND_API_SOCKDIR = "/run/shm/sciond/"
 
 
@@ -121,6 +121,33 @@ class SCIONDaemon(SCIONElement):
         logging.debug("sciond started with api_addr = %s", inst.api_addr)
         return inst
 
+    def run(self):
+        threading.Thread(
+            target=thread_safety_net, args=(self.worker,),
+            name="SCIONDaemon.worker %s" % self.addr.isd_as,
+            daemon=True).start()
+        super().run()
+
+    def worker(self):
+        """
+        Remove expired segments from the segment databases.
+        """
+        worker_cycle = 1.0
+        start = SCIONTime.get_time()
+        while self.run_flag.is_set():
+            sleep_interval(start, worker_cycle, "SCIONDaemon.worker cycle")
+            start = SCIONTime.get_time()
+            for db in self.up_segments, self.down_segments, self.core_segments:
+                db.expire()
+
+    def persist_state(self, state_dir):
+        # Several sciond instances (one per AS) can share a state dir.
+        for name, db in (("up", self.up_segments),
+                         ("down", self.down_segments),
+                         ("core", self.core_segments)):
+            db.persist(os.path.join(state_dir, "%s.%s.%s_segments.sqlite" %
+                                    (self.id, self.addr.isd_as, name)))
+
     def _get_msg_meta(self, packet, addr, sock):
         if sock != self._udp_sock:
             return packet, SockOnlyMetadata.from_values(sock)  # API socket
@@ -163,7 +190,7 @@ class SCIONDaemon(SCIONElement):
         if self.addr.isd_as != pcb.last_ia():
             return None
         if self.up_segments.update(pcb) == DBResult.ENTRY_ADDED:
-            logging.debug("Up segment added: %s", pcb.short_desc())
+            logging.debug("Up segment added: %s", Lazy(pcb.short_desc))
             return pcb.first_ia()
         return None
 
@@ -172,13 +199,13 @@ class SCIONDaemon(SCIONElement):
         if self.addr.isd_as == last_ia:
             return None
         if self.down_segments.update(pcb) == DBResult.ENTRY_ADDED:
-            logging.debug("Down segment added: %s", pcb.short_desc())
+            logging.debug("Down segment added: %s", Lazy(pcb.short_desc))
             return last_ia
         return None
 
     def _handle_core_seg(self, pcb):
         if self.core_segments.update(pcb) == DBResult.ENTRY_ADDED:
-            logging.debug("Core segment added: %s", pcb.short_desc())
+            logging.debug("Core segment added: %s", Lazy(pcb.short_desc))
             return pcb.first_ia()
         return None
 
@@ -276,12 +303,15 @@ class SCIONDaemon(SCIONElement):
         for segment in db(full=True):
             for asm in segment.iter_asms():
                 if self._verify_revocation_for_asm(rev_info, asm):
-                    logging.debug("Removing segment: %s" % segment.short_desc())
+                    logging.debug("Removing segment: %s",
+                                  Lazy(segment.short_desc))
                     to_remove.append(segment.get_hops_hash())
         return db.delete_all(to_remove)
 
-    def get_paths(self, dst_ia, flags=()):
-        """Return a list of paths."""
+    def get_paths(self, dst_ia, flags=(), k=None):
+        """
+        Return a list of paths. With `k` set, at most `k` paths are returned.
+        """
         logging.debug("Paths requested for %s %s", dst_ia, flags)
         if self.addr.isd_as == dst_ia or (
                 self.addr.isd_as.any_as() == dst_ia and
@@ -297,9 +327,9 @@ class SCIONDaemon(SCIONElement):
         if not self._wait_for_events([e], deadline):
             logging.error("Query timed out for %s", dst_ia)
             return []
-        return self.path_resolution(dst_ia, flags=flags)
+        return self.path_resolution(dst_ia, flags=flags, k=k)
 
-    def path_resolution(self, dst_ia, flags=()):
+    def path_resolution(self, dst_ia, flags=(), k=None):
         # dst as == 0 means any core AS in the specified ISD.
         dst_is_core = self.is_core_as(dst_ia) or dst_ia[1] == 0
         sibra = PATH_FLAG_SIBRA in flags
@@ -313,9 +343,9 @@ class SCIONDaemon(SCIONElement):
         elif sibra:
             ret = self._resolve_not_core_not_core_sibra(dst_ia)
         else:
-            ret = self._resolve_not_core_not_core_scion(dst_ia)
+            ret = self._resolve_not_core_not_core_scion(dst_ia, k=k)
         if not sibra:
-            return ret
+            return ret[:k]
         # FIXME(kormat): Strip off PCBs, and just return sibra reservation
         # blocks
         return self._sibra_strip_pcbs(self._strip_nones(ret))
@@ -367,20 +397,16 @@ class SCIONDaemon(SCIONElement):
             return res
         return PathCombinator.tuples_to_full_paths(res)
 
-    def _resolve_not_core_not_core_scion(self, dst_ia):
-        """Resolve SCION path from non-core to non-core."""
+    def _resolve_not_core_not_core_scion(self, dst_ia, k=None):
+        """
+        Resolve SCION path from non-core to non-core. Returns at most `k`
+        paths, cheapest first.
+        """
         up_segs = self.up_segments()
         down_segs = self.down_segments(last_ia=dst_ia)
-        core_segs = self._calc_core_segs(dst_ia[0], up_segs, down_segs)
-        full_paths = PathCombinator.build_shortcut_paths(up_segs, down_segs)
-        tuples = []
-        for up_seg in up_segs:
-            for down_seg in down_segs:
-                tuples.append((up_seg, None, down_seg))
-                for core_seg in core_segs:
-                    tuples.append((up_seg, core_seg, down_seg))
-        full_paths.extend(PathCombinator.tuples_to_full_paths(tuples))
-        return full_paths
+        core_segs = self._calc_core_segs(up_segs, down_segs)
+        return list(PathCombinator.iter_paths(up_segs, core_segs, down_segs,
+                                              k=k))
 
     def _resolve_not_core_not_core_sibra(self, dst_ia):
         """Resolve SIBRA path from non-core to non-core."""
@@ -460,7 +486,7 @@ class SCIONDaemon(SCIONElement):
         fulfilled.
         """
         dst_ia, flags = key
-        return self.path_resolution(dst_ia, flags=flags)
+        return self.path_resolution(dst_ia, flags=flags, k=1)
 
     def _fetch_segments(self, key, _):
         """
@@ -503,7 +529,7 @@ class SCIONDaemon(SCIONElement):
                 ret.append((req_ia, req_flags))
         return ret
 
-    def _calc_core_segs(self, dst_isd, up_segs, down_segs):
+    def _calc_core_segs(self, up_segs, down_segs):
         """
         Calculate all possible core segments joining the provided up and down
         segments. Returns a list of all known segments, and a seperate list of
@@ -512,22 +538,20 @@ class SCIONDaemon(SCIONElement):
         src_core_ases = set()
         dst_core_ases = set()
         for seg in up_segs:
-            src_core_ases.add(seg.first_ia()[1])
+            src_core_ases.add(seg.first_ia())
         for seg in down_segs:
-            dst_core_ases.add(seg.first_ia()[1])
+            dst_core_ases.add(seg.first_ia())
         # Generate all possible AS pairs
         as_pairs = list(product(src_core_ases, dst_core_ases))
-        return self._find_core_segs(self.addr.isd_as[0], dst_isd, as_pairs)
+        return self._find_core_segs(as_pairs)
 
-    def _find_core_segs(self, src_isd, dst_isd, as_pairs):
+    def _find_core_segs(self, as_pairs):
         """
-        Given a set of AS pairs across 2 ISDs, return the core segments
-        connecting those pairs
+        Given a set of (src core ISD_AS, dst core ISD_AS) pairs, return the
+        core segments connecting those pairs
         """
         core_segs = []
-        for src_core_as, dst_core_as in as_pairs:
-            src_ia = ISD_AS.from_values(src_isd, src_core_as)
-            dst_ia = ISD_AS.from_values(dst_isd, dst_core_as)
+        for src_ia, dst_ia in as_pairs:
             if src_ia == dst_ia:
                 continue
             seg = self.core_segments(first_ia=dst_ia, last_ia=src_ia)
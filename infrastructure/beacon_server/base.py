@@ -246,14 +246,14 @@ class BeaconServer(SCIONElement, metaclass=ABCMeta):
 
     def handle_pcb(self, pcb, meta):
         """Receives beacon and stores it for processing."""
-        pcb.p.ifID = meta.path.get_hof().ingress_if
+        pcb.writable().ifID = meta.path.get_hof().ingress_if
         if not self.path_policy.check_filters(pcb):
             return
         self.incoming_pcbs.append(pcb)
         meta.close()
         entry_name = "%s-%s" % (pcb.get_hops_hash(hex=True), time.time())
         try:
-            self.pcb_cache.store(entry_name, pcb.copy().pack())
+            self.pcb_cache.store(entry_name, pcb.pack())
         except ZkNoConnection:
             logging.error("Unable to store PCB in shared cache: "
                           "no connection to ZK")
@@ -695,7 +695,7 @@ class BeaconServer(SCIONElement, metaclass=ABCMeta):
             self.local_rev_cache[rev_info] = rev_info.copy()
 
         logging.info("Storing revocation in ZK.")
-        rev_token = rev_info.copy().pack()
+        rev_token = rev_info.pack()
         entry_name = "%s:%s" % (hash(rev_token), time.time())
         try:
             self.revobjs_cache.store(entry_name, rev_token)
@@ -17,6 +17,7 @@
 """
 # Stdlib
 import logging
+import os
 import threading
 from _collections import defaultdict, deque
 from abc import ABCMeta, abstractmethod
@@ -34,6 +35,7 @@ from lib.defines import (
     HASHTREE_TTL,
     PATH_SERVICE,
 )
+from lib.log import Lazy
 from lib.packet.path_mgmt.rev_info import RevocationInfo
 from lib.packet.path_mgmt.seg_recs import PathRecordsReply, PathSegmentRecords
 from lib.packet.scmp.types import SCMPClass, SCMPPathClass
@@ -102,7 +104,7 @@ class PathServer(SCIONElement, metaclass=ABCMeta):
         self._zkid = ZkID.from_values(self.addr.isd_as, self.id,
                                       [(self.addr.host, self._port)])
         self.zk = Zookeeper(self.topology.isd_as, PATH_SERVICE,
-                            self._zkid.copy().pack(), self.topology.zookeepers)
+                            self._zkid.pack(), self.topology.zookeepers)
         self.zk.retry("Joining party", self.zk.party_setup)
         self.path_cache = ZkSharedCache(self.zk, self.ZK_PATH_CACHE_PATH,
                                         self._cached_entries_handler)
@@ -140,6 +142,7 @@ class PathServer(SCIONElement, metaclass=ABCMeta):
                 pass
             self._update_master()
             self._propagate_and_sync()
+            self._expire_segments()
 
     def _cached_entries_handler(self, raw_entries):
         """
@@ -157,6 +160,24 @@ class PathServer(SCIONElement, metaclass=ABCMeta):
     def _update_master(self):
         pass
 
+    def _segment_dbs(self):
+        """
+        Return the segment databases, by name.
+        """
+        return {"down": self.down_segments, "core": self.core_segments}
+
+    def _expire_segments(self):
+        """
+        Remove expired segments from the segment databases.
+        """
+        for db in self._segment_dbs().values():
+            db.expire()
+
+    def persist_state(self, state_dir):
+        for name, db in self._segment_dbs().items():
+            db.persist(os.path.join(state_dir, "%s.%s_segments.sqlite" %
+                                    (self.id, name)))
+
     def _rev_entries_handler(self, raw_entries):
         for raw in raw_entries:
             rev_info = RevocationInfo.from_raw(raw)
@@ -195,7 +216,8 @@ class PathServer(SCIONElement, metaclass=ABCMeta):
             return True
         elif res == DBResult.ENTRY_UPDATED:
             self._add_rev_mappings(pcb)
-            logging.debug("%s-Segment updated: %s", name, pcb.short_desc())
+            logging.debug("%s-Segment updated: %s", name,
+                          Lazy(pcb.short_desc))
         return False
 
     def _handle_scmp_revocation(self, pld, meta):
@@ -221,7 +243,7 @@ class PathServer(SCIONElement, metaclass=ABCMeta):
         self.revocations[rev_info] = True
         logging.debug("Received revocation from %s:\n%s",
                       meta.get_addr(), rev_info)
-        self._revs_to_zk.append(rev_info.copy().pack())  # have to pack copy
+        self._revs_to_zk.append(rev_info.pack())
         # Remove segments that contain the revoked interface.
         self._remove_revoked_segments(rev_info)
         # Update revocations for PCBs in the the PCB cache.
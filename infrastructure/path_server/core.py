@@ -22,6 +22,7 @@ from collections import deque
 # SCION
 from infrastructure.path_server.base import PathServer
 from lib.defines import PATH_FLAG_SIBRA
+from lib.log import Lazy
 from lib.packet.path_mgmt.seg_recs import PathRecordsReply
 from lib.packet.path_mgmt.seg_req import PathSegmentReq
 from lib.packet.svc import SVCType
@@ -203,7 +204,8 @@ class CorePathServer(PathServer):
             return
         src_ia = src_ia or self.addr.isd_as
         req = PathSegmentReq.from_values(src_ia, dst_ia, flags=flags)
-        logging.debug("Asking master for segment: %s" % req.short_desc())
+        logging.debug("Asking master for segment: %s",
+                      Lazy(req.short_desc))
         self._send_to_master(req)
 
     def _propagate_to_core_ases(self, rep_recs):
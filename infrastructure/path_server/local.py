@@ -41,6 +41,11 @@ class LocalPathServer(PathServer):
         # Database of up-segments to the core.
         self.up_segments = PathSegmentDB(max_res_no=self.MAX_SEG_NO)
 
+    def _segment_dbs(self):
+        dbs = super()._segment_dbs()
+        dbs["up"] = self.up_segments
+        return dbs
+
     def _handle_up_segment_record(self, pcb, from_zk=False):
         if not from_zk:
             self._segs_to_zk.append((PST.UP, pcb))
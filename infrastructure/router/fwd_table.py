@@ -0,0 +1,86 @@
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`fwd_table` --- Router forwarding table
+============================================
+"""
+
+
+class FwdEntry(object):
+    """
+    Everything the router needs to forward a packet out of one interface of
+    the local AS.
+
+    :ivar int if_id: the interface ID.
+    :ivar addr: address of the next hop.
+    :type addr: :class:`lib.packet.host_addr.HostAddrBase`
+    :ivar int port: UDP port of the next hop.
+    :ivar tuple dst: (`str`, `int`) destination, as passed to the socket.
+    :ivar str link_type: the type of relationship to the neighbor AS.
+    :ivar bool is_active: whether the interface is currently up.
+    :ivar sock: the socket to send on.
+    :type sock: :class:`lib.socket.UDPSocket`
+    """
+    __slots__ = ("if_id", "addr", "port", "dst", "link_type", "is_active",
+                 "sock")
+
+    def __init__(self, if_id, addr, port, link_type, is_active, sock):
+        self.if_id = if_id
+        self.addr = addr
+        self.port = port
+        self.dst = (str(addr), port)
+        self.link_type = link_type
+        self.is_active = is_active
+        self.sock = sock
+
+    def __str__(self):
+        return "IF %s -> %s:%s (%s, %s)" % (
+            self.if_id, self.addr, self.port, self.link_type,
+            "active" if self.is_active else "inactive")
+
+
+def build_fwd_table(topology, interface, if_states, int_sock, ext_sock):
+    """
+    Build the forwarding table of a router from the AS topology.
+
+    Packets for the router's own interface go to the neighboring AS over
+    `ext_sock`, packets for any other interface go to the border router
+    owning it over `int_sock`. The table is never modified once built; callers
+    should build a new one, and replace the old one with a single assignment,
+    whenever the topology or an interface state changes.
+
+    :param topology: the AS topology.
+    :type topology: :class:`lib.topology.Topology`
+    :param interface: the router's own inter-AS interface.
+    :type interface: :class:`lib.topology.InterfaceElement`
+    :param dict if_states: map of interface ID to
+        :class:`infrastructure.router.if_state.InterfaceState`. Interfaces
+        without an entry are considered active.
+    :param int_sock: socket towards the local AS.
+    :param ext_sock: socket towards the neighboring AS.
+    :returns: `dict` mapping interface IDs to :class:`FwdEntry` objects.
+    """
+    table = {}
+    for br in topology.get_all_border_routers():
+        if_id = br.interface.if_id
+        state = if_states.get(if_id)
+        is_active = state is None or state.is_active
+        if if_id == interface.if_id:
+            entry = FwdEntry(if_id, interface.to_addr, interface.to_udp_port,
+                             interface.link_type, is_active, ext_sock)
+        else:
+            entry = FwdEntry(if_id, br.addr, br.port, br.interface.link_type,
+                             is_active, int_sock)
+        table[if_id] = entry
+    return table
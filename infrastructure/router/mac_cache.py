@@ -0,0 +1,77 @@
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`mac_cache` --- Cache of verified hop field MACs
+=====================================================
+"""
+# Stdlib
+from collections import OrderedDict
+
+# SCION
+from lib.defines import EXP_TIME_UNIT
+
+
+class HOFMacCache(object):
+    """
+    Bounded LRU cache of hop opaque fields whose MAC has been successfully
+    verified with a given key.
+
+    Entries are keyed on the info field timestamp and the packed current and
+    previous HOFs, which covers everything the MAC is computed over. Only
+    successful verifications are cached, so invalid packets can't be used to
+    flush the cache, and each entry is dropped once its HOF expires.
+
+    :ivar bytes key: the key the MACs are verified with.
+    """
+    MAX_LEN = 4096
+
+    def __init__(self, key, max_len=MAX_LEN):
+        """
+        :param bytes key: the key the MACs are verified with.
+        :param int max_len: max number of cached entries.
+        """
+        self.key = key
+        self._max_len = max_len
+        self._entries = OrderedDict()
+
+    def verify(self, hof, ts, prev_hof, now):
+        """
+        Verify the MAC of `hof`, as :meth:`HopOpaqueField.verify_mac` does,
+        skipping the MAC computation if the same fields were verified before.
+
+        :param hof: the HOF to verify.
+        :type hof: :class:`lib.packet.opaque_field.HopOpaqueField`
+        :param int ts: timestamp of the segment's info field.
+        :param prev_hof:
+            the HOF needed to verify `hof`, or ``None``.
+        :type prev_hof: :class:`lib.packet.opaque_field.HopOpaqueField`
+        :param int now: current time, in seconds.
+        :returns: ``True`` if the MAC is valid.
+        """
+        cache_key = (ts, hof.pack(), prev_hof.pack() if prev_hof else None)
+        exp_time = self._entries.get(cache_key)
+        if exp_time is not None:
+            if now <= exp_time:
+                self._entries.move_to_end(cache_key)
+                return True
+            del self._entries[cache_key]
+        if not hof.verify_mac(self.key, ts, prev_hof):
+            return False
+        self._entries[cache_key] = ts + hof.exp_time * EXP_TIME_UNIT
+        if len(self._entries) > self._max_len:
+            self._entries.popitem(last=False)
+        return True
+
+    def __len__(self):  # pragma: no cover
+        return len(self._entries)
@@ -27,7 +27,15 @@ from Crypto.Protocol.KDF import PBKDF2
 
 # SCION
 from external.expiring_dict import ExpiringDict
+from infrastructure.router.fwd_table import FwdEntry, build_fwd_table
 from infrastructure.router.if_state import InterfaceState
+from infrastructure.router.mac_cache import HOFMacCache
+from infrastructure.router.udp_io import sock_send
+from infrastructure.router.workers import (
+    CTRL_IFSTATE,
+    CTRL_REVOCATION,
+    WorkerLink,
+)
 from infrastructure.router.errors import (
     SCIONIFVerificationError,
     SCIONInterfaceDownException,
@@ -43,6 +51,7 @@ from lib.defines import (
     IFID_PKT_TOUT,
     MAX_HOPBYHOP_EXT,
     PATH_SERVICE,
+    ROUTER_BATCH_SIZE,
     ROUTER_SERVICE,
     SCION_UDP_EH_DATA_PORT,
 )
@@ -50,7 +59,7 @@ from lib.errors import (
     SCIONBaseError,
     SCIONServiceLookupError,
 )
-from lib.log import log_exception
+from lib.log import Lazy, log_exception
 from lib.msg_meta import RawMetadata
 from lib.sibra.ext.ext import SibraExtBase
 from lib.packet.ext.one_hop_path import OneHopPathExt
@@ -59,9 +68,14 @@ from lib.packet.ext_hdr import ExtensionHeader
 from lib.packet.ifid import IFIDPayload
 from lib.packet.opaque_field import HopOpaqueField, InfoOpaqueField
 from lib.packet.path import SCIONPath, valid_hof
-from lib.packet.path_mgmt.ifstate import IFStateInfo, IFStateRequest
+from lib.packet.path_mgmt.ifstate import (
+    IFStateInfo,
+    IFStatePayload,
+    IFStateRequest,
+)
 from lib.packet.path_mgmt.rev_info import RevocationInfo
 from lib.packet.scion_addr import SCIONAddr
+from lib.packet.scion_view import SCIONPacketView
 from lib.packet.scmp.errors import (
     SCMPBadExtOrder,
     SCMPBadHopByHop,
@@ -86,6 +100,7 @@ from lib.types import (
     AddrType,
     ExtHopByHopType,
     ExtensionClass,
+    L4Proto,
     LinkType,
     PathMgmtType as PMT,
     PayloadClass,
@@ -99,40 +114,79 @@ from nagini_contracts.io_builtins import Place, token, IOOperation, IOExists1, T
 
 
 # for type annotations
-from typing import List, Tuple, Union, Callable, cast, Optional
+from typing import Dict, List, Tuple, Union, Callable, cast, Optional
 from lib.packet.scion import SCIONL4Packet, packed
 from lib.packet.host_addr import HostAddrBase
 from lib.util import Raw
 from lib.topology import InterfaceElement
 
 
+def _counted(e: SCMPError) -> SCMPError:
+    """
+    Mark `e` as already counted as a drop (see :attr:`SCMPError.counted`).
+    """
+    e.counted = True
+    return e
+
+
 class Router(SCIONElement):
     """
     The SCION Router.
 
     :ivar interface: the router's inter-AS interface, if any.
     :type interface: :class:`lib.topology.InterfaceElement`
+    :ivar dict fwd_table:
+        map of interface ID to :class:`infrastructure.router.fwd_table.FwdEntry`.
     """
     # SERVICE_TYPE = ROUTER_SERVICE
     FWD_REVOCATION_TIMEOUT = 5
     IFSTATE_REQ_INTERVAL = 30
+    RECV_BATCH_SIZE = ROUTER_BATCH_SIZE
+    # L4 protocols that can be forwarded without parsing the whole packet.
+    FAST_PATH_L4 = L4Proto.UDP, L4Proto.TCP, L4Proto.SSP
+    STATS_STAGES = dict(
+        SCIONElement.STATS_STAGES,
+        request="handle_request",
+        fast_path="_fast_forward",
+        extensions="handle_extensions",
+        verify_hof="verify_hof",
+        fwding_ingress="_calc_fwding_ingress",
+        segment_switch="_check_segment_switch",
+        send="send",
+    )
 
-    def __init__(self, server_id: str, conf_dir: str) -> None:
+    def __init__(self, server_id: str, conf_dir: str, reuse_port: bool=False) -> None:
         """
         :param str server_id: server identifier.
         :param str conf_dir: configuration directory.
+        :param bool reuse_port:
+            Bind the router's sockets with SO_REUSEPORT, so that several
+            router processes can share them (see
+            :mod:`infrastructure.router.workers`).
         """
         super().__init__(server_id, conf_dir, )
-        self._udp_sock = UDPSocket(addr_type=self.addr.host.TYPE)
+        self._udp_sock = UDPSocket(
+            bind=(str(self.addr.host), self._port, self.id),
+            addr_type=self.addr.host.TYPE, reuse_port=reuse_port,
+        )
         self.interface = None  # type: InterfaceElement
         for border_router in self.topology.get_all_border_routers():
+            # Used by the slow path to find the next hop (see
+            # SCIONElement.init_ifid2br()).
+            self.ifid2br[border_router.interface.if_id] = border_router
             if border_router.name == self.id:
                 self.interface = border_router.interface
-                break
         assert self.interface is not None
+        # Destinations that need local processing, as (type, packed address).
+        self._local_dsts = set()
+        for addr in (self.addr, SCIONAddr.from_values(self.addr.isd_as,
+                                                      self.interface.addr)):
+            assert isinstance(addr.host, HostAddrBase)
+            self._local_dsts.add((addr.host.TYPE, addr.pack()))
         # logging.info("Interface: %s", self.interface.__dict__)
         self.is_core_router = self.topology.is_core_as
         self.of_gen_key = PBKDF2(self.config.master_as_key, b"Derive OF Key")
+        self._mac_cache = HOFMacCache(self.of_gen_key)
         self.sibra_key = PBKDF2(self.config.master_as_key, b"Derive SIBRA Key")
         self.if_states = defaultdict(InterfaceState)  # type: defaultdict[int, InterfaceState]
         self.revocations = ExpiringDict(1000, self.FWD_REVOCATION_TIMEOUT)  # type: ExpiringDict[RevocationInfo, bool]
@@ -160,10 +214,13 @@ class Router(SCIONElement):
         # }
         self._remote_sock = UDPSocket(
             bind=(str(self.interface.addr), self.interface.udp_port),
-            addr_type=self.interface.addr.TYPE,
+            addr_type=self.interface.addr.TYPE, reuse_port=reuse_port,
         )
         # self._socks.add(self._remote_sock, self.handle_recv)
         logging.info("IP %s:%d", self.interface.addr, self.interface.udp_port)
+        self.fwd_table = {}  # type: Dict[int, FwdEntry]
+        self.update_fwd_table()
+        self._worker_link = None  # type: Optional[WorkerLink]
 
     @Predicate
     def State(self) -> bool:
@@ -198,6 +255,32 @@ class Router(SCIONElement):
     #         name="BR.sibra_worker", daemon=True).start()
     #     SCIONElement.run(self)
 
+    def run(self) -> None:
+        """
+        Receive packets on the router's sockets, and handle them in batches
+        (see :func:`handle_batch()`), until :func:`stop()` is called.
+        """
+        self._socks.add(self._udp_sock, self.handle_recv)
+        self._socks.add(self._remote_sock, self.handle_recv)
+        while self.run_flag.is_set():
+            for sock, callback in self._socks.select_(timeout=0.1):
+                callback(sock)
+        self._socks.close()
+        self.stopped_flag.set()
+
+    def stop(self) -> None:
+        """
+        Stop the receive loop, and wait for it to close the sockets.
+        """
+        self.run_flag.clear()
+        self.stopped_flag.wait(5)
+
+    def handle_recv(self, sock: UDPSocket) -> None:
+        """
+        Callback to handle a ready receiving socket.
+        """
+        self.handle_batch(Place(), sock, sock is self._udp_sock)
+
     def send(self, t: Place, packet: SCIONL4Packet, dst: HostAddrBase, dst_port: int) -> Place:
         IOExists1(Place)(lambda t2: (
             Requires(Acc(self.State(), 1/9) and Acc(packet.State(), 1/8) and Unfolding(Acc(packet.State(), 1/100), len(packet.ext_hdrs) == 0)),
@@ -219,9 +302,9 @@ class Router(SCIONElement):
         from_local_as = dst == Unfolding(Acc(self.interface.State(), 1/11), self.interface.to_addr)
         self.handle_extensions(packet, False, from_local_as)
         if from_local_as:
-            result = self._remote_sock.send(t, packet.pack(), (str(dst), dst_port))
+            result = sock_send(t, self._remote_sock, packet.pack(), (str(dst), dst_port))
         else:
-            result = self._udp_sock.send(t, packet.pack(), (str(dst), dst_port))
+            result = sock_send(t, self._udp_sock, packet.pack(), (str(dst), dst_port))
         Fold(Acc(self.State(), 1 / 9))
         return result[1]
 
@@ -398,8 +481,8 @@ class Router(SCIONElement):
     #         # handle state update
     #         logging.debug("Received IFState update:\n%s",
     #                       str(mgmt_pkt.get_payload()))
-    #         for p in payload.p.infos:
-    #             self.if_states[p.ifID].update(IFStateInfo(p))
+    #         self.update_if_states(
+    #             [IFStateInfo(p) for p in payload.p.infos])
     #         return
     #     self.handle_data(mgmt_pkt, from_local_as)
     #
@@ -427,7 +510,7 @@ class Router(SCIONElement):
     #             self.topology.path_servers):
     #         snames.append(PATH_SERVICE)
     #
-    #     self.revocations[rev_info] = True
+    #     self.add_revocation(rev_info)
     #     for sname in snames:
     #         try:
     #             addr, port = self.dns_query_topo(sname)[0]
@@ -521,6 +604,7 @@ class Router(SCIONElement):
         assert isinstance(iof, InfoOpaqueField)
         ts = Unfolding(Rd(path.State()), Unfolding(Rd(path._ofs.State()), Unfolding(Rd(iof.State()), iof.timestamp)))
         hof = path.get_hof()
+        assert isinstance(hof, HopOpaqueField)
         prev_hof = path.get_hof_ver(ingress=ingress)
         # Check that the interface in the current hop field matches the
         # interface in the router.
@@ -530,8 +614,9 @@ class Router(SCIONElement):
             Fold(Acc(self.State(), 1 / 10))
             raise SCIONIFVerificationError(hof, iof)
 
-        if int(SCIONTime.get_time()) <= ts + Unfolding(Rd(path.State()), Unfolding(Rd(path._ofs.State()), Unfolding(Rd(hof.State()), hof.exp_time))) * EXP_TIME_UNIT:
-            if not hof.verify_mac(self.of_gen_key, ts, prev_hof):
+        now = int(SCIONTime.get_time())
+        if now <= ts + Unfolding(Rd(path.State()), Unfolding(Rd(path._ofs.State()), Unfolding(Rd(hof.State()), hof.exp_time))) * EXP_TIME_UNIT:
+            if not self._verify_mac(hof, ts, prev_hof, now):
                 Fold(Acc(iof.State(), 1 / 10))
                 Fold(Acc(self.State(), 1 / 10))
                 raise SCIONOFVerificationError(hof, prev_hof)
@@ -542,10 +627,132 @@ class Router(SCIONElement):
         Fold(Acc(iof.State(), 1 / 10))
         Fold(Acc(self.State(), 1 / 10))
 
+    def _verify_hof_view(self, view: SCIONPacketView) -> bool:
+        """
+        Same checks as :func:`verify_hof()` (on ingress), for a packet view.
+        Returns False instead of raising, as failures are left to the full
+        object model to report.
+        """
+        if view.get_curr_if() != self.interface.if_id:
+            return False
+        ts = view.get_iof().timestamp
+        hof = view.get_hof()
+        now = int(SCIONTime.get_time())
+        if now > ts + hof.exp_time * EXP_TIME_UNIT:
+            return False
+        return self._verify_mac(hof, ts, view.get_hof_ver(), now)
+
+    def _verify_mac(self, hof: HopOpaqueField, ts: int,
+                    prev_hof: Optional[HopOpaqueField], now: int) -> bool:
+        """
+        Verify the MAC of `hof` through the MAC cache (see
+        :meth:`infrastructure.router.mac_cache.HOFMacCache.verify`).
+        """
+        # Cached results are only valid for the key they were verified with.
+        if self._mac_cache.key is not self.of_gen_key:
+            self._mac_cache = HOFMacCache(self.of_gen_key)
+        return self._mac_cache.verify(hof, ts, prev_hof, now)
+
+    def _fast_path_next_hop(self, view: SCIONPacketView) -> Optional[FwdEntry]:
+        """
+        Determine where to forward a packet received from a neighbouring AS,
+        based only on its common header, its address header and the current
+        opaque fields.
+
+        :returns:
+            The forwarding table entry of the next hop, or ``None`` if the
+            packet needs the full object model.
+        """
+        view.validate()
+        if (view.next_hdr not in self.FAST_PATH_L4 or
+                view.get_dst() in self._local_dsts):
+            return None
+        if not self._verify_hof_view(view):
+            return None
+        hof = view.get_hof()
+        if hof.verify_only:
+            return None
+        if (view.get_dst_ia() == self.addr.isd_as and
+                view.is_on_last_segment()):
+            return None
+        if not hof.xover:
+            fwd_if = view.get_fwd_if()
+            next_idxs = None  # type: Optional[Tuple[int, int]]
+        else:
+            xover_if, next_idxs = self._fast_path_xover(view)
+            if xover_if is None:
+                return None
+            fwd_if = xover_if
+        entry = self.fwd_table.get(fwd_if)
+        if entry is None or not entry.is_active:
+            return None
+        if next_idxs is not None:
+            view.set_of_idxs(*next_idxs)
+        return entry
+
+    def _fast_path_xover(self, view: SCIONPacketView) -> Tuple[Optional[int], Optional[Tuple[int, int]]]:
+        """
+        Work out the effect of :func:`_calc_fwding_ingress()` on a packet
+        view whose current HOF is a crossover HOF, without modifying the
+        packet.
+
+        :returns:
+            Tuple of (forwarding interface, (IOF index, HOF index)), or
+            ``(None, None)`` if the segment switch is not allowed.
+        """
+        prev_iof_idx = view.get_of_idxs()[0]
+        iof_idx, hof_idx, skipped_vo = view.next_of_idxs()
+        iof = view.get_of(iof_idx, InfoOpaqueField)
+        hof = view.get_of(hof_idx, HopOpaqueField)
+        fwd_if = hof.ingress_if if iof.up_flag else hof.egress_if
+        if prev_iof_idx != iof_idx:
+            try:
+                self._check_segment_switch(
+                    fwd_if, view.get_curr_if(), view.get_iof(),
+                    view.get_hof(), iof, hof)
+            except SCIONSegmentSwitchError:
+                return None, None
+        elif skipped_vo:
+            return None, None
+        return fwd_if, (iof_idx, hof_idx)
+
+    def _fast_forward(self, t: Place, packet: bytes) -> Optional[Place]:
+        """
+        Try to forward a packet received from a neighbouring AS without
+        building a :class:`SCIONL4Packet` for it.
+
+        :returns:
+            ``None`` if the packet was not handled, and needs to go through
+            the full object model. That is the case for packets with
+            extensions, packets for the local AS and packets that fail any
+            check (so that the proper SCMP error is generated). If the path
+            has to be advanced past a crossover HOF, only the IOF/HOF offsets
+            in the common header are rewritten, in place if `packet` is a
+            `bytearray` (as returned by :class:`lib.socket.UDPSocket`); the
+            rest of the packet is sent as received.
+        """
+        try:
+            view = SCIONPacketView(packet)
+            entry = self._fast_path_next_hop(view)
+        except SCIONBaseError:
+            return None
+        if entry is None:
+            return None
+        logging.debug("Sending to IF %s (%s:%s)", entry.if_id, entry.addr,
+                      entry.port)
+        try:
+            return sock_send(t, entry.sock, view.get_raw(), entry.dst)[1]
+        except SCMPError as e:
+            pkt = self._parse_packet(packet)
+            if pkt:
+                self._scmp_validate_error(pkt, e)
+            return t
+
     def _egress_forward(self, t: Place, spkt: SCIONL4Packet) -> Place:
         logging.debug("Forwarding to remote interface: %s:%s",
                       self.interface.to_addr, self.interface.to_udp_port)
-        self.send(t, spkt, self.interface.to_addr, self.interface.to_udp_port)
+        return self.send(t, spkt, self.interface.to_addr,
+                         self.interface.to_udp_port)
 
     def handle_data(self, t: Place, spkt: SCIONL4Packet, from_local_as: bool, drop_on_error: bool=False) -> Place:
         """
@@ -562,29 +769,35 @@ class Router(SCIONElement):
         try:
             return self._process_data(t, spkt, ingress, drop_on_error)
         except SCIONIFVerificationError as e:
+            self.stats.drop(e)
             logging.error("Dropping packet due to not matching interfaces.\n"
                           "Current IOF: %s\nCurrent HOF: %s\n"
-                          "Router Interface: %d" %
-                          (e.args_[1], e.args_[0], self.interface.if_id))
+                          "Router Interface: %d",
+                          e.args_[1], e.args_[0], self.interface.if_id)
         except SCIONOFVerificationError as e:
+            self.stats.drop(e)
             logging.error("Dropping packet due to incorrect MAC.\n"
                           "Header:\n%s\nInvalid OF: %s\nPrev OF: %s",
                           spkt, e.args_[0], e.args_[1])
-            raise SCMPBadMAC from None
+            raise _counted(SCMPBadMAC()) from None
         except SCIONOFExpiredError as e:
+            self.stats.drop(e)
             logging.error("Dropping packet due to expired OF.\n"
                           "Header:\n%s\nExpired OF: %s",
                           spkt, e)
-            raise SCMPExpiredHOF from None
-        except SCIONPacketHeaderCorruptedError:
+            raise _counted(SCMPExpiredHOF()) from None
+        except SCIONPacketHeaderCorruptedError as e:
+            self.stats.drop(e)
             logging.error("Dropping packet due to invalid header state.\n"
                           "Header:\n%s", spkt)
         except SCIONSegmentSwitchError as e:
+            self.stats.drop(e)
             logging.error("Dropping packet due to disallowed segment switch: "
-                          "%s" % e.args_[0])
-        except SCIONInterfaceDownException:
+                          "%s", e.args_[0])
+        except SCIONInterfaceDownException as e:
+            self.stats.drop(e)
             logging.info("Dropping packet due to interface being down.")
-            pass
+        return t
 
     def _process_data(self, t: Place, spkt: SCIONL4Packet, ingress: bool, drop_on_error: bool) -> Place:
         Requires(Acc(spkt.State(), 1 / 2))
@@ -677,10 +890,25 @@ class Router(SCIONElement):
         5) If a packet is to be forwarded over a peering link, check on ingress
            that the ingress IF is the same for both current and next hop fields.
         """
-        rcvd_on_link_type = self._link_type(prev_if)
-        fwd_on_link_type = self._link_type(fwd_if)
         cur_iof = path.get_iof()
+        assert isinstance(cur_iof, InfoOpaqueField)
         cur_hof = path.get_hof()
+        assert isinstance(cur_hof, HopOpaqueField)
+        self._check_segment_switch(fwd_if, prev_if, prev_iof, prev_hof,
+                                   cur_iof, cur_hof)
+
+    def _check_segment_switch(self, fwd_if: int, prev_if: int,
+                              prev_iof: InfoOpaqueField,
+                              prev_hof: HopOpaqueField,
+                              cur_iof: InfoOpaqueField,
+                              cur_hof: HopOpaqueField) -> None:
+        Requires(False)
+        """
+        Implements the rules of :func:`_validate_segment_switch()`, given the
+        opaque fields before and after the switch.
+        """
+        rcvd_on_link_type = self._link_type(prev_if)
+        fwd_on_link_type = self._link_type(fwd_if)
         if not prev_iof.up_flag and cur_iof.up_flag:
             raise SCIONSegmentSwitchError(
                 "Switching from down- to up-segment is not allowed.")
@@ -728,10 +956,75 @@ class Router(SCIONElement):
         """
         Returns the link type of the link corresponding to 'if_id' or None.
         """
-        for br in self.topology.get_all_border_routers():
-            if br.interface.if_id == if_id:
-                return br.interface.link_type
-        return None
+        entry = self.fwd_table.get(if_id)
+        if entry is None:
+            return None
+        return entry.link_type
+
+    def update_fwd_table(self) -> None:
+        """
+        Rebuild the forwarding table from the topology and the current
+        interface states. The new table replaces the old one in a single
+        assignment, so packet handling never sees a partially updated table.
+        """
+        self.fwd_table = build_fwd_table(
+            self.topology, self.interface, self.if_states, self._udp_sock,
+            self._remote_sock)
+
+    def update_if_states(self, infos: List[IFStateInfo], fan_out: bool=True) -> None:
+        """
+        Apply interface state updates from the beacon server, and rebuild the
+        forwarding table to match.
+
+        :param bool fan_out:
+            Pass the updates on to the other router workers, if any.
+        """
+        for info in infos:
+            self.if_states[info.p.ifID].update(info)
+        self.update_fwd_table()
+        if fan_out and self._worker_link:
+            self._worker_link.send(
+                CTRL_IFSTATE, IFStatePayload.from_values(infos).pack())
+
+    def add_revocation(self, rev_info: RevocationInfo, fan_out: bool=True) -> None:
+        """
+        Record a revocation as recently handled.
+
+        :param bool fan_out:
+            Pass the revocation on to the other router workers, if any.
+        """
+        self.revocations[rev_info] = True
+        if fan_out and self._worker_link:
+            self._worker_link.send(CTRL_REVOCATION, rev_info.pack())
+
+    def set_worker_link(self, link: WorkerLink) -> None:
+        """
+        Run as one of several router workers, exchanging state updates with
+        the others over `link`.
+        """
+        self._worker_link = link
+        self._socks.add(link, self.handle_worker_msg)
+
+    def handle_worker_msg(self, link: WorkerLink) -> None:
+        """
+        Apply a state update relayed from another router worker.
+        """
+        msg = link.recv()
+        if msg is None:
+            logging.critical("Control channel to the router parent process "
+                             "closed")
+            self._socks.remove(link)
+            self._worker_link = None
+            return
+        type_, raw = msg
+        if type_ == CTRL_IFSTATE:
+            pld = IFStatePayload.from_raw(raw)
+            self.update_if_states(
+                [IFStateInfo(p) for p in pld.p.infos], fan_out=False)
+        elif type_ == CTRL_REVOCATION:
+            self.add_revocation(RevocationInfo.from_raw(raw), fan_out=False)
+        else:
+            logging.error("Unknown router worker message type: %s", type_)
 
     def _needs_local_processing(self, pkt: SCIONL4Packet) -> bool:
         return pkt.addrs.dst in [
@@ -816,12 +1109,18 @@ class Router(SCIONElement):
             True, if the packet was received on the local socket.
         """
         from_local_as = from_local_socket
+        if not from_local_as:
+            result = self._fast_forward(t, packet)
+            if result is not None:
+                return result
         pkt = self._parse_packet(packet)
         if not pkt:
+            self.stats.drop("parse_error")
             return t
         try:
             flags = self.handle_extensions(pkt, True, from_local_as)
         except SCMPError as e:
+            self.stats.drop(e)
             self._scmp_validate_error(pkt, e)
             return t
         stop, needs_local = self._process_flags(flags, pkt, from_local_as)
@@ -831,13 +1130,15 @@ class Router(SCIONElement):
         try:
             needs_local = needs_local or self._needs_local_processing(pkt)
         except SCMPError as e:
+            self.stats.drop(e)
             self._scmp_validate_error(pkt, e)
             return t
         if needs_local:
             try:
                 pkt.parse_payload()
             except SCIONBaseError:
-                log_exception("Error parsing payload:\n%s" % hex_str(packet))
+                log_exception("Error parsing payload:\n%s",
+                              Lazy(hex_str, packet))
                 return t
             handler = False  # self._get_handler(pkt)
             assert False
@@ -852,6 +1153,52 @@ class Router(SCIONElement):
         try:
             return self.handle_data(t, pkt, from_local_as)
         except SCMPError as e:
+            # Errors translated by handle_data() have been counted already.
+            if not e.counted:
+                self.stats.drop(e)
+            self._scmp_validate_error(pkt, e)
+        except SCIONBaseError as e:
+            self.stats.drop(e)
+            log_exception("Error handling packet: %s", pkt)
+        return t
+
+    def handle_batch(self, t: Place, sock: UDPSocket, from_local_socket: bool) -> Place:
+        """
+        Read up to RECV_BATCH_SIZE packets from `sock` and run them through
+        :func:`handle_request()`. Outgoing packets are held back until the whole
+        batch has been processed, and are then flushed per egress socket. Those
+        that turn out to be unreachable are reported one by one, as they would
+        have been outside of a batch.
+
+        :param sock: The socket that has packets pending.
+        :type sock: :class:`lib.socket.UDPSocket`
+        :param bool from_local_socket:
+            True, if `sock` is the local socket.
+        """
+        batch = sock.recv_batch(self.RECV_BATCH_SIZE)
+        egress_socks = (self._udp_sock, self._remote_sock)
+        for egress_sock in egress_socks:
+            egress_sock.start_batch()
+        unreachable = []
+        try:
+            for packet, addr in batch:
+                t = self.handle_request(t, packet, addr, from_local_socket,
+                                        sock)
+        finally:
+            for egress_sock in egress_socks:
+                unreachable.extend(egress_sock.flush_batch())
+        for packet, dst, e in unreachable:
+            self._batch_send_error(packet, dst, e)
+        return t
+
+    def _batch_send_error(self, packet: bytes, dst: Tuple[str, int],
+                          e: SCMPError) -> None:
+        """
+        Report a packet of a batch that could not be sent to `dst` (which
+        :class:`lib.socket.UDPSocket` has logged already), the same way
+        :func:`handle_request()` does when sending it directly fails.
+        """
+        self.stats.drop(e)
+        pkt = self._parse_packet(packet)
+        if pkt:
             self._scmp_validate_error(pkt, e)
-        except SCIONBaseError:
-            log_exception("Error handling packet: %s" % pkt)
@@ -0,0 +1,31 @@
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`udp_io` --- Router socket IO with place tokens
+====================================================
+
+The router's contracts model sending as the :func:`lib.socket.udp_send` IO
+operation, which consumes a place token and produces the next one. Sockets
+themselves don't know about tokens; this is where they are threaded through.
+The contract is in scion-stubs/infrastructure/router/udp_io.pyi.
+"""
+
+
+def sock_send(t, sock, data, dst):
+    """
+    Send `data` to `dst` on `sock` (see :meth:`lib.socket.UDPSocket.send`).
+
+    :returns: Tuple of (`bool`, `t`), whether the data was sent.
+    """
+    return sock.send(data, dst), t
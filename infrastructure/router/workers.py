@@ -0,0 +1,247 @@
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`workers` --- Multi-process router
+=======================================
+
+Runs several :class:`infrastructure.router.main.Router` processes for the same
+border router. Every worker binds the router's sockets with SO_REUSEPORT, so
+the kernel spreads incoming packets across them, and keeps its own copy of the
+forwarding state. State updates that a worker receives from the beacon server
+are relayed by the parent process to all the other workers.
+"""
+# Stdlib
+import logging
+import os
+import selectors
+import signal
+import struct
+import sys
+from socket import AF_UNIX, SOCK_SEQPACKET, socketpair
+
+# SCION
+from lib.log import init_logging, log_exception
+from lib.main import default_arg_parser
+from lib.util import handle_signals
+
+#: Control message carrying a packed IFStatePayload.
+CTRL_IFSTATE = 0
+#: Control message carrying a packed RevocationInfo.
+CTRL_REVOCATION = 1
+#: Max size of a control message.
+CTRL_BUFLEN = 65535
+
+
+class WorkerLink(object):
+    """
+    One end of the control channel between a router worker and the parent
+    process. Messages are a 1B type, followed by a packed payload.
+
+    Like the :mod:`lib.socket` wrappers, it can be added to a
+    :class:`lib.socket.SocketMgr`.
+    """
+    def __init__(self, sock):
+        """
+        :param socket.socket sock: connected AF_UNIX/SOCK_SEQPACKET socket.
+        """
+        self.sock = sock
+
+    def is_active(self):
+        return True
+
+    def close(self):  # pragma: no cover
+        self.sock.close()
+
+    def send(self, type_, raw):
+        """
+        :param int type_: control message type (``CTRL_*``).
+        :param bytes raw: packed payload.
+        """
+        self.sock.send(struct.pack("!B", type_) + raw)
+
+    def recv(self, block=True):
+        """
+        :returns:
+            Tuple of (message type, packed payload), or ``None`` if the other
+            end has gone away.
+        """
+        msg = self.sock.recv(CTRL_BUFLEN)
+        if not msg:
+            return None
+        return msg[0], msg[1:]
+
+
+class RouterWorkerPool(object):
+    """
+    Forks and supervises the router worker processes, and relays control
+    messages between them.
+    """
+    def __init__(self, router_cls, server_id, conf_dir, log_dir, count,
+                 stats_path=None, log_async=False, log_rate_limit=None):
+        """
+        :param type router_cls: the router class to run in each worker.
+        :param str server_id: server identifier.
+        :param str conf_dir: configuration directory.
+        :param str log_dir: log directory.
+        :param int count: number of worker processes.
+        :param str stats_path:
+            if set, each worker serves its stats on a UNIX socket at
+            ``<stats_path>.w<N>``.
+        :param bool log_async: passed on to :func:`lib.log.init_logging`.
+        :param int log_rate_limit: passed on to :func:`lib.log.init_logging`.
+        """
+        self._router_cls = router_cls
+        self._server_id = server_id
+        self._conf_dir = conf_dir
+        self._log_dir = log_dir
+        self._count = count
+        self._stats_path = stats_path
+        self._log_async = log_async
+        self._log_rate_limit = log_rate_limit
+        self._links = {}  # pid -> WorkerLink
+        self._sel = selectors.DefaultSelector()
+
+    def run(self):
+        """
+        Start the workers, then relay control messages until one of them
+        exits, at which point the remaining ones are stopped as well. Only
+        returns once that has happened.
+        """
+        try:
+            for idx in range(self._count):
+                self._start_worker(idx)
+            self._relay()
+        finally:
+            self._stop_workers()
+
+    def _start_worker(self, idx):
+        parent_end, child_end = socketpair(AF_UNIX, SOCK_SEQPACKET)
+        pid = os.fork()
+        if pid == 0:
+            parent_end.close()
+            for link in self._links.values():
+                link.close()
+            self._run_worker(idx, WorkerLink(child_end))
+        child_end.close()
+        link = WorkerLink(parent_end)
+        self._links[pid] = link
+        self._sel.register(parent_end, selectors.EVENT_READ, (pid, link))
+        logging.info("Started router worker %d (pid %d)", idx, pid)
+
+    def _run_worker(self, idx, link):  # pragma: no cover
+        """
+        Body of a worker process. Never returns.
+        """
+        # Each worker logs to its own files. The inherited handlers are
+        # closed too, as the parent's logging thread doesn't exist in here.
+        for h in logging.root.handlers[:]:
+            logging.root.removeHandler(h)
+            h.close()
+        for f in logging.root.filters[:]:
+            logging.root.removeFilter(f)
+        init_logging(os.path.join(
+            self._log_dir, "%s.w%d" % (self._server_id, idx)),
+            async_=self._log_async, rate_limit=self._log_rate_limit)
+        status = 0
+        try:
+            inst = self._router_cls(self._server_id, self._conf_dir,
+                                    reuse_port=True)
+            inst.set_worker_link(link)
+            if self._stats_path:
+                inst.stats.serve("%s.w%d" % (self._stats_path, idx))
+            logging.info("Started %s worker %d", self._server_id, idx)
+            inst.run()
+        except SystemExit as e:
+            status = e.code or 0
+        except:
+            log_exception("Exception in router worker %d:" % idx)
+            status = 1
+        logging.shutdown()
+        os._exit(status)
+
+    def _relay(self):
+        while True:
+            for key, _ in self._sel.select(timeout=1.0):
+                pid, link = key.data
+                msg = link.recv()
+                if msg is None:
+                    logging.critical("Router worker (pid %d) closed its "
+                                     "control channel", pid)
+                    return
+                self._fan_out(pid, *msg)
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid:
+                logging.critical("Router worker (pid %d) exited (wait status "
+                                 "%d)", pid, status)
+                self._forget(pid)
+                return
+
+    def _fan_out(self, src_pid, type_, raw):
+        for pid, link in self._links.items():
+            if pid == src_pid:
+                continue
+            try:
+                link.send(type_, raw)
+            except OSError as e:
+                logging.error("Unable to relay control message to router "
+                              "worker (pid %d): %s", pid, e)
+
+    def _forget(self, pid):
+        link = self._links.pop(pid)
+        self._sel.unregister(link.sock)
+        link.close()
+
+    def _stop_workers(self):
+        for pid in list(self._links):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in list(self._links):
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+            self._forget(pid)
+
+
+def main_workers(router_cls):
+    """
+    main() method for the router. Same as :func:`lib.main.main_default`, with
+    an additional ``--workers`` option. With more than one worker, the router
+    runs as a :class:`RouterWorkerPool`.
+    """
+    handle_signals()
+    parser = default_arg_parser()
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='Number of router processes (Default: 1)')
+    args = parser.parse_args()
+    init_logging(os.path.join(args.log_dir, args.server_id),
+                 async_=args.log_async, rate_limit=args.log_rate_limit)
+    if args.workers < 1:
+        logging.critical("Invalid number of workers: %d", args.workers)
+        sys.exit(1)
+    if args.workers == 1:
+        inst = router_cls(args.server_id, args.conf_dir)
+        if args.stats:
+            inst.stats.serve(args.stats)
+        logging.info("Started %s", args.server_id)
+        inst.run()
+        return
+    logging.info("Starting %s with %d workers", args.server_id, args.workers)
+    RouterWorkerPool(router_cls, args.server_id, args.conf_dir, args.log_dir,
+                     args.workers, args.stats, args.log_async,
+                     args.log_rate_limit).run()
+    logging.critical("Router worker stopped unexpectedly")
+    sys.exit(1)
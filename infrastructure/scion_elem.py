@@ -85,6 +85,7 @@ from lib.packet.scmp.errors import (
 from lib.packet.scmp.types import SCMPClass
 # from lib.packet.scmp.util import scmp_type_name
 from lib.socket import ReliableSocket, SocketMgr, TCPSocketWrapper
+from lib.stats import ElementStats
 from lib.tcp.socket import SCIONTCPSocket, SockOpt
 from lib.thread import thread_safety_net, kill_self
 from lib.trust_store import TrustStore
@@ -118,6 +119,8 @@ class SCIONElement(object):
     # SERVICE_TYPE = None  # type: Optional[str]
     STARTUP_QUIET_PERIOD = SQP
     USE_TCP = False
+    # Processing stages timed by self.stats, as stage name -> method name.
+    STATS_STAGES = {"parse": "_parse_packet"}
 
     def __init__(self, server_id: str, conf_dir: str, host_addr: HostAddrBase=None, port: int=None) -> None:
         """
@@ -151,6 +154,7 @@ class SCIONElement(object):
         self.init_ifid2br()
         self.trust_store = TrustStore(self.conf_dir)
         self.total_dropped = 0
+        self.stats = ElementStats(self, self.STATS_STAGES)
         self._core_ases = defaultdict(list_object)  # type: defaultdict[int, List[object]] # Mapping ISD_ID->list of core ASes
         self.init_core_ases()
         self.run_flag = threading.Event()
@@ -166,6 +170,14 @@ class SCIONElement(object):
         else:
             self.DefaultMeta = UDPMetadata
 
+    def persist_state(self, state_dir: str) -> None:
+        """
+        Keep the state that is worth having across restarts in `state_dir`,
+        loading any state left there by a previous run. Elements with such
+        state override this.
+        """
+        pass
+
     def _service_type(self) -> Optional[str]:
         return None
 
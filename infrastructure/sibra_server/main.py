@@ -18,6 +18,7 @@
 # Stdlib
 import base64
 import logging
+import os
 import threading
 import time
 from queue import Queue
@@ -102,6 +103,10 @@ class SibraServerBase(SCIONElement):
                 iface.bandwidth, self.addr.isd_as)
             self.link_types[iface.if_id] = iface.link_type
 
+    def persist_state(self, state_dir):
+        self.segments.persist(
+            os.path.join(state_dir, "%s.segments.sqlite" % self.id))
+
     def run(self):
         threading.Thread(
             target=thread_safety_net, args=(self.worker,),
@@ -122,6 +127,7 @@ class SibraServerBase(SCIONElement):
             start = SCIONTime.get_time()
             with self.lock:
                 self.manage_steady_paths()
+            self.segments.expire()
 
     def sender(self):
         """
@@ -0,0 +1,184 @@
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`contract_erasure` --- Run verified code without its contracts
+===================================================================
+
+Parts of the code base are annotated with Nagini contracts (`Requires`,
+`Ensures`, `Fold`, `Unfolding`, `Acc`, ...). These are only meaningful to the
+verifier, but at runtime every one of them is still a function call, and their
+arguments (predicate bodies included) are evaluated on every packet.
+
+This module provides an import hook that strips the contracts from the AST of
+the affected modules before they are compiled, leaving the source untouched.
+It is opt-in; to run a program with it, use::
+
+    python3 -m lib.contract_erasure bin/<server> <args...>
+
+bin/router installs it itself, as some contracts (e.g. `Ensures`) are only
+declared for the verifier, and fail when called.
+"""
+# Stdlib
+import ast
+import importlib.abc
+import importlib.machinery
+import runpy
+import sys
+
+#: Marker for sources that need to have their contracts erased.
+CONTRACTS_MARKER = b"nagini_contracts"
+#: Top-level packages the import hook applies to.
+DEFAULT_PACKAGES = ("lib", "infrastructure", "endhost")
+#: Contract functions that are only ever used as statements.
+STMT_CONTRACTS = frozenset([
+    "Assert", "Assume", "Decreases", "Ensures", "Exsures", "Fold",
+    "Invariant", "MustTerminate", "Requires", "Terminates", "Unfold",
+])
+#: Contract functions that return their last argument at runtime.
+EXPR_CONTRACTS = frozenset(["Unfolding"])
+#: Decorators marking functions whose body is only read by the verifier.
+PREDICATE_DECORATORS = frozenset(["Predicate"])
+
+
+def _call_name(node):
+    """
+    Return the name of the function called by `node`, if it's a call of a
+    plain name.
+    """
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+        return node.func.id
+    return None
+
+
+def _decorator_name(node):
+    if isinstance(node, ast.Call):
+        node = node.func
+    if isinstance(node, ast.Name):
+        return node.id
+    return None
+
+
+class ContractEraser(ast.NodeTransformer):
+    """
+    AST transformer removing all Nagini contracts from a module.
+
+    - Contract statements (``Requires(...)``, ``Fold(...)``, ...), and
+      ``IOExists*(...)(...)`` blocks, are removed.
+    - ``Unfolding(pred, expr)`` is replaced by ``expr``.
+    - The bodies of ``@Predicate`` functions are replaced by ``return True``.
+    - Bodies left empty are filled with ``pass``.
+    """
+    def visit_Expr(self, node):
+        value = node.value
+        if _call_name(value) in STMT_CONTRACTS:
+            return None
+        if isinstance(value, ast.Call):
+            name = _call_name(value.func)
+            if name and name.startswith("IOExists"):
+                return None
+        return self.generic_visit(node)
+
+    def visit_Call(self, node):
+        if _call_name(node) in EXPR_CONTRACTS and node.args:
+            return self.visit(node.args[-1])
+        return self.generic_visit(node)
+
+    def visit_FunctionDef(self, node):
+        if any(_decorator_name(d) in PREDICATE_DECORATORS
+               for d in node.decorator_list):
+            node.body = [ast.copy_location(
+                ast.parse("return True").body[0], node)]
+            return node
+        return self.generic_visit(node)
+
+    def generic_visit(self, node):
+        node = super().generic_visit(node)
+        if getattr(node, "body", None) == []:
+            node.body.append(ast.copy_location(ast.Pass(), node))
+        return node
+
+
+def erase_contracts(source, path="<string>"):
+    """
+    Compile `source` with its contracts erased.
+
+    :param source: Python source code.
+    :type source: `bytes` or `str`
+    :param str path: file name, for error messages and tracebacks.
+    :returns: a code object.
+    """
+    tree = ast.parse(source, path)
+    tree = ast.fix_missing_locations(ContractEraser().visit(tree))
+    return compile(tree, path, "exec", dont_inherit=True)
+
+
+class ContractErasingLoader(importlib.machinery.SourceFileLoader):
+    """
+    Source loader that erases contracts from modules using them. Bytecode of
+    those modules is neither read from nor written to the bytecode cache, so
+    that it can't get mixed up with the regular bytecode.
+    """
+    def get_code(self, fullname):
+        path = self.get_filename(fullname)
+        source = self.get_data(path)
+        if CONTRACTS_MARKER not in source:
+            return super().get_code(fullname)
+        return erase_contracts(source, path)
+
+
+class ContractErasingFinder(importlib.abc.MetaPathFinder):
+    """
+    Meta path finder using :class:`ContractErasingLoader` for all source
+    modules in the given top-level packages.
+    """
+    def __init__(self, packages=DEFAULT_PACKAGES):
+        self._packages = tuple(packages)
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname.partition(".")[0] not in self._packages:
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path)
+        if (spec is None or
+                not isinstance(spec.loader,
+                               importlib.machinery.SourceFileLoader)):
+            return spec
+        spec.loader = ContractErasingLoader(spec.loader.name,
+                                            spec.loader.path)
+        return spec
+
+
+def install(packages=DEFAULT_PACKAGES):
+    """
+    Install the contract erasing import hook. Only affects modules imported
+    afterwards.
+    """
+    for finder in sys.meta_path:
+        if isinstance(finder, ContractErasingFinder):
+            return
+    sys.meta_path.insert(0, ContractErasingFinder(packages))
+
+
+def main():
+    """
+    Run the script given on the command line with contracts erased.
+    """
+    if len(sys.argv) < 2:
+        sys.exit("Usage: %s <script> [args...]" % sys.argv[0])
+    install()
+    sys.argv = sys.argv[1:]
+    runpy.run_path(sys.argv[0], run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
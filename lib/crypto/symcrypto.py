@@ -15,8 +15,24 @@
 :mod:`symcrypto` --- SCION symmetric crypto functions
 =====================================================
 """
+# Stdlib
+from functools import lru_cache
+
 # External packages
 from Crypto.Cipher import AES
+from Crypto.Util.strxor import strxor
+
+#: Max number of keyed AES contexts kept by :func:`cbcmac`
+CIPHER_CACHE_SIZE = 16
+
+
+@lru_cache(maxsize=CIPHER_CACHE_SIZE)
+def _aes_ecb(key):
+    """
+    Return an AES context for `key`. ECB mode has no chaining state, so a
+    single context can be shared by all callers using the same key.
+    """
+    return AES.new(key, AES.MODE_ECB)
 
 
 def cbcmac(key, msg):
@@ -31,7 +47,8 @@ def cbcmac(key, msg):
         MAC output, as a bytes object.
 
     Raises:
-        ValueError: An error occurred when key is NULL or ciphertext is NULL.
+        ValueError: An error occurred when key is NULL or ciphertext is NULL,
+            or when the message isn't a multiple of the block size.
 
     Warnings:
         CBC-MAC is insecure for variable size messages.
@@ -40,7 +57,12 @@ def cbcmac(key, msg):
         raise ValueError('Key is NULL.')
     elif msg is None:
         raise ValueError('Message is NULL.')
-    else:
-        iv = b"\x00" * 16
-        cipher = AES.new(key, AES.MODE_CBC, iv)
-        return cipher.encrypt(msg)[-16:]  # Return the last block of ciphertext.
+    elif len(msg) % AES.block_size:
+        raise ValueError('Message length must be a multiple of %d.' %
+                         AES.block_size)
+    cipher = _aes_ecb(key)
+    # With an all-zero IV, the first block is encrypted as is.
+    mac = cipher.encrypt(msg[:AES.block_size])
+    for i in range(AES.block_size, len(msg), AES.block_size):
+        mac = cipher.encrypt(strxor(mac, msg[i:i + AES.block_size]))
+    return mac
@@ -55,6 +55,8 @@ AS_LIST_FILE = "as_list.yml"
 
 #: Buffer size for receiving packets
 SCION_BUFLEN = 65535
+#: Max number of packets the router reads and forwards as one batch
+ROUTER_BATCH_SIZE = 32
 #: Default SCION endhost data port
 SCION_UDP_EH_DATA_PORT = 30041
 #: Default SCION filter command port
@@ -18,6 +18,10 @@
 # Stdlib
 import logging
 import logging.handlers
+import queue
+import sys
+import threading
+import time
 import traceback
 from datetime import datetime, timezone
 
@@ -27,6 +31,12 @@ from datetime import datetime, timezone
 #: Bytes
 LOG_MAX_SIZE = 10 * 1024 * 1024
 LOG_BACKUP_COUNT = 1
+#: Max number of records waiting to be written by the async logging thread.
+LOG_QUEUE_SIZE = 10000
+#: Max number of records logged per call site and LOG_RATE_PERIOD.
+LOG_RATE_LIMIT = 20
+#: Length of the rate limiting window, in seconds.
+LOG_RATE_PERIOD = 1
 
 # Logging handlers that will log logging exceptions, and then re-raise them. The
 # default behaviour of python's logging handlers is to catch logging exceptions,
@@ -54,6 +64,127 @@ class _ConsoleErrorHandler(logging.StreamHandler):
     handleError = _handleError
 
 
+class _AsyncHandler(logging.handlers.QueueHandler):
+    """
+    Hands records over to a :class:`logging.handlers.QueueListener`, which
+    formats and writes them from a background thread. The message itself is
+    still merged with its args in the calling thread, so that it reflects the
+    state of the logged objects at the time of the call. If the queue is full,
+    records are dropped, and a warning with the number of dropped records is
+    logged once there is space again.
+
+    Closing the handler (which :func:`logging.shutdown` does at exit) stops
+    the listener, once it has written all queued records.
+    """
+    def __init__(self, queue_, listener, level=logging.NOTSET):
+        super().__init__(queue_)
+        self.setLevel(level)
+        # Only merge the message here, the listener's handlers do the rest.
+        self.setFormatter(logging.Formatter("%(message)s"))
+        self.dropped = 0
+        self._listener = listener
+
+    def enqueue(self, record):
+        if self.dropped:
+            try:
+                self.queue.put_nowait(logging.makeLogRecord({
+                    "name": record.name, "levelno": logging.WARNING,
+                    "levelname": "WARNING",
+                    "msg": "Logging queue full, dropped %d records" %
+                           self.dropped,
+                }))
+            except queue.Full:
+                self.dropped += 1
+                return
+            self.dropped = 0
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
+        super().close()
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limits the number of records logged from each call site (source file and
+    line) to `limit` per `period` seconds. The first record logged from a call
+    site after some of its records were suppressed says how many were. Records
+    with a `site` attribute (see :func:`log_exception`) are counted against
+    that call site instead of the one that created them.
+
+    Records marked as continuations (see :func:`log_exception`) are let through
+    only if the last record logged by the same thread was. Records at ERROR
+    level or above are never dropped, and are not counted against the limit.
+    """
+    def __init__(self, limit=LOG_RATE_LIMIT, period=LOG_RATE_PERIOD):
+        super().__init__()
+        self._limit = limit
+        self._period = period
+        # (pathname, lineno) -> [window start, count, suppressed]
+        self._sites = {}
+        # The filter runs in every thread that logs, so guards _sites.
+        self._lock = threading.Lock()
+        self._last = threading.local()
+
+    def filter(self, record):
+        if getattr(record, "continuation", False):
+            return getattr(self._last, "passed", True)
+        if record.levelno >= logging.ERROR:
+            self._last.passed = True
+            return True
+        self._last.passed = self._check(record)
+        return self._last.passed
+
+    def _check(self, record):
+        key = getattr(record, "site", None) or (record.pathname, record.lineno)
+        with self._lock:
+            return self._check_site(key, record)
+
+    def _check_site(self, key, record):
+        now = time.monotonic()
+        site = self._sites.get(key)
+        if site is None:
+            self._sites[key] = [now, 1, 0]
+            return True
+        if now - site[0] >= self._period:
+            site[0] = now
+            site[1] = 0
+        if site[1] >= self._limit:
+            site[2] += 1
+            return False
+        site[1] += 1
+        if site[2]:
+            record.msg = "%s [%d similar messages suppressed]" % (
+                record.msg, site[2])
+            site[2] = 0
+        return True
+
+
+class Lazy(object):
+    """
+    Defers calling `func(*args, **kwargs)` until the result is formatted, so
+    that log calls whose records are below the configured log level, or are
+    dropped by a :class:`RateLimitFilter`, don't pay for building expensive
+    descriptions. E.g.::
+
+        logging.debug("Added segment: %s", Lazy(pcb.short_desc))
+    """
+    __slots__ = ("_func", "_args", "_kwargs")
+
+    def __init__(self, func, *args, **kwargs):
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+
+    def __str__(self):
+        return str(self._func(*self._args, **self._kwargs))
+
+
 class _Rfc3339Formatter(logging.Formatter):
     def formatTime(self, record, _):  # pragma: no cover
         # Not using lib.util.iso_timestamp here, to avoid potential import
@@ -62,9 +193,19 @@ class _Rfc3339Formatter(logging.Formatter):
 
 
 def init_logging(log_base=None, file_level=logging.DEBUG,
-                 console_level=logging.NOTSET):
+                 console_level=logging.NOTSET, async_=False, rate_limit=None):
     """
     Configure logging for components (servers, routers, gateways).
+
+    :param bool async_:
+        Write log records from a background thread, instead of from the thread
+        doing the logging.
+    :param int rate_limit:
+        If set, log at most this many records per call site every
+        LOG_RATE_PERIOD seconds. ERROR and CRITICAL records are never dropped.
+
+    The root logger's level is set to the lowest level of the handlers, so
+    that records nothing would write are discarded before being formatted.
     """
     formatter = _Rfc3339Formatter(
         "%(asctime)s [%(levelname)s] (%(threadName)s) %(message)s")
@@ -85,18 +226,32 @@ def init_logging(log_base=None, file_level=logging.DEBUG,
         handlers.append(h)
     for h in handlers:
         h.setFormatter(formatter)
-    # Use logging.DEBUG here, so that the handlers themselves can decide what to
-    # filter.
-    logging.basicConfig(level=logging.DEBUG, handlers=handlers)
+    levels = [file_level] if log_base else []
+    if console_level:
+        levels.append(console_level)
+    level = min(levels, default=logging.DEBUG)
+    if rate_limit:
+        logging.getLogger().addFilter(RateLimitFilter(rate_limit))
+    if async_:
+        queue_ = queue.Queue(LOG_QUEUE_SIZE)
+        listener = logging.handlers.QueueListener(
+            queue_, *handlers, respect_handler_level=True)
+        listener.start()
+        handlers = [_AsyncHandler(queue_, listener, level)]
+    logging.basicConfig(level=level, handlers=handlers)
 
 
 def log_exception(msg, *args, level=logging.CRITICAL, **kwargs):
     """
-    Properly format an exception before logging.
+    Properly format an exception before logging. All lines are attributed to
+    the caller, so they are rate limited together.
     """
-    logging.log(level, msg, *args, **kwargs)
+    caller = sys._getframe(1)
+    site = (caller.f_code.co_filename, caller.f_lineno)
+    extra = dict(kwargs.pop("extra", None) or {}, site=site)
+    logging.log(level, msg, *args, extra=extra, **kwargs)
     for line in traceback.format_exc().split("\n"):
-        logging.log(level, line)
+        logging.log(level, line, extra={"site": site, "continuation": True})
 
 
 def log_stack(level=logging.DEBUG):
@@ -23,7 +23,7 @@ import sys
 
 # SCION
 from lib.defines import TOPO_FILE
-from lib.log import init_logging, log_exception
+from lib.log import LOG_RATE_LIMIT, init_logging, log_exception
 from lib.topology import Topology
 from lib.util import handle_signals, trace
 
@@ -44,6 +44,31 @@ def main_wrapper(main, *args, **kwargs):
         sys.exit(1)
 
 
+def default_arg_parser():
+    """
+    Return an argument parser for the cmdline args common to all servers.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('server_id', help='Server identifier')
+    parser.add_argument('conf_dir', nargs='?', default='.',
+                        help='Configuration directory (Default: ./)')
+    parser.add_argument('log_dir', nargs='?', default="logs/",
+                        help='Log dir (Default: logs/)')
+    parser.add_argument('--stats', metavar='PATH',
+                        help='Serve processing stats on a UNIX socket at PATH')
+    parser.add_argument('--state-dir', metavar='DIR',
+                        help='Keep state (e.g. path segments) in DIR across '
+                        'restarts')
+    parser.add_argument('--log-async', action='store_true',
+                        help='Write log files from a background thread')
+    parser.add_argument('--log-rate-limit', metavar='N', type=int, nargs='?',
+                        const=LOG_RATE_LIMIT,
+                        help='Log at most N records (Default: %d) per second '
+                        'from each line of code. Errors are never dropped.' %
+                        LOG_RATE_LIMIT)
+    return parser
+
+
 def main_default(type_, local_type=None, trace_=False, **kwargs):
     """
     Default main() method. Parses cmdline args, setups up signal handling,
@@ -57,14 +82,9 @@ def main_default(type_, local_type=None, trace_=False, **kwargs):
     :param bool trace_: Should a periodic thread stacktrace report be created?
     """
     handle_signals()
-    parser = argparse.ArgumentParser()
-    parser.add_argument('server_id', help='Server identifier')
-    parser.add_argument('conf_dir', nargs='?', default='.',
-                        help='Configuration directory (Default: ./)')
-    parser.add_argument('log_dir', nargs='?', default="logs/",
-                        help='Log dir (Default: logs/)')
-    args = parser.parse_args()
-    init_logging(os.path.join(args.log_dir, args.server_id))
+    args = default_arg_parser().parse_args()
+    init_logging(os.path.join(args.log_dir, args.server_id),
+                 async_=args.log_async, rate_limit=args.log_rate_limit)
 
     if local_type is None:
         inst = type_(args.server_id, args.conf_dir, **kwargs)
@@ -77,5 +97,10 @@ def main_default(type_, local_type=None, trace_=False, **kwargs):
             inst = local_type(args.server_id, args.conf_dir, **kwargs)
     if trace_:
         trace(inst.id)
+    if args.stats:
+        inst.stats.serve(args.stats)
+    if args.state_dir:
+        os.makedirs(args.state_dir, exist_ok=True)
+        inst.persist_state(args.state_dir)
     logging.info("Started %s", args.server_id)
     inst.run()
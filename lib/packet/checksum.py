@@ -0,0 +1,101 @@
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`checksum` --- Internet checksum
+=====================================
+
+16-bit one's complement sums and checksums (RFC 1071), and incremental
+checksum updates (RFC 1624).
+
+Packed checksums are in host byte order, as written by libscion.
+
+As 2**16 is 1 modulo 2**16 - 1, the sum of the 16-bit words of a buffer is,
+modulo 2**16 - 1, the buffer itself read as one big-endian integer. Summing a
+buffer is thus a single conversion to an integer and a single modulo, both of
+which run in C, instead of a Python loop over its words.
+"""
+# Stdlib
+import struct
+
+_MOD = 0xFFFF
+
+
+def _fold(total):
+    """
+    Reduce a sum to 16 bits. Only an all-zero input sums to 0; any other
+    multiple of 0xFFFF is represented as 0xFFFF, as end-around carry addition
+    yields.
+    """
+    if not total:
+        return 0
+    return total % _MOD or _MOD
+
+
+def ones_sum(*chunks, offset=0):
+    """
+    Return the 16-bit one's complement sum of the concatenation of `chunks`.
+
+    :param chunks:
+        bytes-like objects (e.g. `bytes` or `memoryview`). They are neither
+        copied nor joined.
+    :param int offset:
+        offset of the first chunk in the checksummed data. Only its parity
+        matters, as it determines whether the chunks start on a word boundary.
+    """
+    total = 0
+    pos = offset
+    for chunk in chunks:
+        pos += len(chunk)
+        val = int.from_bytes(chunk, "big")
+        # A chunk ending at an odd offset is followed by the low byte of its
+        # last word.
+        total += val << 8 if pos & 1 else val
+    return _fold(total)
+
+
+def ones_add(*sums):
+    """
+    Add 16-bit one's complement sums.
+    """
+    return _fold(sum(sums))
+
+
+def sum_to_checksum(sum_):
+    """
+    :returns: the packed checksum corresponding to `sum_`.
+    """
+    return struct.pack("H", ~sum_ & _MOD)
+
+
+def checksum(*chunks):
+    """
+    :returns: the packed Internet checksum of the concatenation of `chunks`.
+    """
+    return sum_to_checksum(ones_sum(*chunks))
+
+
+def update_checksum(old_checksum, old_sum, new_sum):
+    """
+    Update a checksum for a change to the data it covers, without summing the
+    unchanged data again (RFC 1624, eqn. 3: HC' = ~(~HC + ~m + m')).
+
+    The change must not shift the rest of the data by an odd number of bytes.
+
+    :param bytes old_checksum: the current packed checksum.
+    :param int old_sum: :func:`ones_sum` of the old version of the changed data.
+    :param int new_sum: :func:`ones_sum` of the new version of the changed data.
+    :returns: the updated packed checksum.
+    """
+    old, = struct.unpack("H", old_checksum)
+    return sum_to_checksum(ones_add(~old & _MOD, ~old_sum & _MOD, new_sum))
@@ -15,11 +15,17 @@
 :mod:`ext_hdr` --- Extension header classes
 ===========================================
 """
+# Stdlib
+import struct
+
 # SCION
 from lib.types import ExtensionClass
 from lib.packet.packet_base import Serializable
 from lib.util import hex_str
 
+#: Extension subheader: next header(1B), header length(1B), type(1B).
+EXT_SUBHDR = struct.Struct("!BBB")
+
 
 class ExtensionHeader(Serializable):
     """
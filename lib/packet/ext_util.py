@@ -17,15 +17,15 @@
 """
 # Stdlib
 import logging
-import struct
 from collections import defaultdict
+from collections.abc import MutableSequence
 
 # SCION
 from lib.packet.ext.one_hop_path import OneHopPathExt
 from lib.packet.ext.path_probe import PathProbeExt
 from lib.packet.ext.path_transport import PathTransportExt
 from lib.packet.ext.traceroute import TracerouteExt
-from lib.packet.ext_hdr import ExtensionHeader
+from lib.packet.ext_hdr import EXT_SUBHDR, ExtensionHeader
 from lib.packet.scmp.ext import SCMPExt
 from lib.sibra.ext.util import parse_sibra_ext
 from lib.types import ExtensionClass, ExtEndToEndType, ExtHopByHopType, L4Proto
@@ -42,18 +42,135 @@ EXTENSION_MAP = {
 }
 
 
+class RawExtension(object):
+    """
+    An extension header which hasn't been parsed yet. It packs back to the
+    bytes it was found in, and supports the same packing interface as
+    :class:`ExtensionHeader`.
+    """
+    __slots__ = ("EXT_CLASS", "EXT_TYPE", "_parser", "_raw")
+
+    def __init__(self, class_, type_, parser, raw):  # pragma: no cover
+        """
+        :param int class_: extension class.
+        :param int type_: extension type.
+        :param parser: callable parsing the extension from `raw`.
+        :param raw: the extension, excluding its subheader.
+        """
+        self.EXT_CLASS = class_
+        self.EXT_TYPE = type_
+        self._parser = parser
+        self._raw = raw
+
+    def parse(self):  # pragma: no cover
+        return self._parser(self._raw)
+
+    def hdr_len(self):  # pragma: no cover
+        return ExtensionHeader.bytes_to_hdr_len(len(self._raw))
+
+    def pack(self):  # pragma: no cover
+        return bytes(self._raw)
+
+    def pack_into(self, buf, offset=0):  # pragma: no cover
+        end = offset + len(self._raw)
+        buf[offset:end] = self._raw
+        return end
+
+    def __len__(self):  # pragma: no cover
+        return len(self._raw) + ExtensionHeader.SUBHDR_LEN
+
+    def __reduce__(self):
+        # The raw data can be a memoryview, which can't be pickled.
+        return (type(self), (self.EXT_CLASS, self.EXT_TYPE, self._parser,
+                             bytes(self._raw)))
+
+    def __str__(self):  # pragma: no cover
+        return "RawExtension(%dB): class: %s, type: %s" % (
+            len(self), self.EXT_CLASS, self.EXT_TYPE)
+
+
+class ExtensionList(MutableSequence):
+    """
+    The extension headers of a packet. Parsed extensions are kept as
+    :class:`RawExtension` until first accessed, so forwarding only pays for
+    parsing the hop-by-hop extensions it processes, and end-to-end extensions
+    are passed through as the bytes they were received as.
+
+    :ivar list entries:
+        the extension headers, with :class:`RawExtension` in place of those
+        which haven't been accessed yet. Allows packing without parsing them.
+    """
+    def __init__(self, hdrs=()):  # pragma: no cover
+        self.entries = list(hdrs)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return ExtensionList(self.entries[idx])
+        hdr = self.entries[idx]
+        if isinstance(hdr, RawExtension):
+            hdr = self.entries[idx] = hdr.parse()
+        return hdr
+
+    def __setitem__(self, idx, hdr):  # pragma: no cover
+        self.entries[idx] = hdr
+
+    def __delitem__(self, idx):  # pragma: no cover
+        del self.entries[idx]
+
+    def __len__(self):  # pragma: no cover
+        return len(self.entries)
+
+    def insert(self, idx, hdr):  # pragma: no cover
+        self.entries.insert(idx, hdr)
+
+    def hop_by_hop(self):
+        """
+        Yield the hop-by-hop extensions, parsing them if needed.
+        """
+        return self._by_class(ExtensionClass.HOP_BY_HOP)
+
+    def end_to_end(self):  # pragma: no cover
+        """
+        Yield the end-to-end extensions, parsing them if needed.
+        """
+        return self._by_class(ExtensionClass.END_TO_END)
+
+    def _by_class(self, class_):
+        for idx, hdr in enumerate(self.entries):
+            if hdr.EXT_CLASS == class_:
+                yield self[idx]
+
+    def find(self, class_, type_):
+        """
+        Return the first extension of the given class and type, or ``None``.
+        Other extensions aren't parsed.
+        """
+        for idx, hdr in enumerate(self.entries):
+            if hdr.EXT_CLASS == class_ and hdr.EXT_TYPE == type_:
+                return self[idx]
+        return None
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, ExtensionList)):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __str__(self):  # pragma: no cover
+        return "[%s]" % ", ".join(str(hdr) for hdr in self.entries)
+
+
 def parse_extensions(data, next_hdr):
     """
     Parses the raw data and populates the extension header fields
-    accordingly.
+    accordingly. The extensions themselves are only parsed when accessed
+    (see :class:`ExtensionList`).
     """
     cur_hdr_type = next_hdr
-    ext_hdrs = []
+    ext_hdrs = ExtensionList()
     unknown = defaultdict(list)
     idx = 0
     while cur_hdr_type not in L4Proto.L4:
-        next_hdr_type, hdr_len, ext_no = struct.unpack(
-            "!BBB", data.pop(ExtensionHeader.SUBHDR_LEN))
+        next_hdr_type, hdr_len, ext_no = data.pop_struct(EXT_SUBHDR)
         # Calculate correct hdr_len in bytes
         hdr_len = (hdr_len + 1) * ExtensionHeader.LINE_LEN
         logging.debug("Found extension hdr of type (%d, %d) with len %dB",
@@ -61,7 +178,8 @@ def parse_extensions(data, next_hdr):
         ext_class = EXTENSION_MAP.get((cur_hdr_type, ext_no))
         ext_data = data.pop(hdr_len - ExtensionHeader.SUBHDR_LEN)
         if ext_class:
-            ext_hdrs.append(ext_class(ext_data))
+            ext_hdrs.append(
+                RawExtension(cur_hdr_type, ext_no, ext_class, ext_data))
         else:
             logging.error("Unknown extension: %s-%s", cur_hdr_type, ext_no)
             unknown[cur_hdr_type].append(idx)
@@ -71,6 +189,8 @@ def parse_extensions(data, next_hdr):
 
 
 def find_ext_hdr(spkt, class_, type_):  # pragma: no cover
+    if isinstance(spkt.ext_hdrs, ExtensionList):
+        return spkt.ext_hdrs.find(class_, type_)
     for hdr in spkt.ext_hdrs:
         if (hdr.EXT_CLASS == class_ and hdr.EXT_TYPE == type_):
             return hdr
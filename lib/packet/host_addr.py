@@ -34,6 +34,9 @@ from lib.packet.packet_base import Serializable
 from lib.types import AddrType
 from lib.util import Raw
 
+#: SVC address(2B).
+_SVC = struct.Struct("!H")
+
 
 class HostAddrBaseError(SCIONBaseError):
     """
@@ -55,6 +58,7 @@ class HostAddrBase(Serializable):
     """
     TYPE = None
     LEN = None
+    __slots__ = ("addr",)
 
     def __init__(self, addr, raw=True):  # pragma: no cover
         """
@@ -98,6 +102,7 @@ class HostAddrNone(HostAddrBase):  # pragma: no cover
     """
     TYPE = AddrType.NONE
     LEN = 0
+    __slots__ = ()
 
     def __init__(self):
         self.addr = None
@@ -115,13 +120,16 @@ class HostAddrIPv4(HostAddrBase):
     """
     TYPE = AddrType.IPV4
     LEN = IPV4LENGTH // 8
+    __slots__ = ()
 
     def _parse(self, raw):
         """
         Parse IPv4 address
 
-        :param raw: Can be either `bytes` or `str`
+        :param raw: Can be either bytes-like or `str`
         """
+        if not isinstance(raw, str):
+            raw = bytes(raw)
         try:
             intf = IPv4Interface(raw)
         except AddressValueError as e:
@@ -139,13 +147,16 @@ class HostAddrIPv6(HostAddrBase):
     """
     TYPE = AddrType.IPV6
     LEN = IPV6LENGTH // 8
+    __slots__ = ()
 
     def _parse(self, raw):
         """
         Parse IPv6 address
 
-        :param raw: Can be either `bytes` or `str`
+        :param raw: Can be either bytes-like or `str`
         """
+        if not isinstance(raw, str):
+            raw = bytes(raw)
         try:
             intf = IPv6Interface(raw)
         except AddressValueError as e:
@@ -165,13 +176,18 @@ class HostAddrSVC(HostAddrBase):
     LEN = 2
     NAME = "HostAddrSVC"
     MCAST = 0x8000
+    __slots__ = ()
 
     def _parse(self, raw):
         data = Raw(raw, self.NAME, self.LEN)
-        self.addr = struct.unpack("!H", data.pop(self.LEN))[0]
+        self.addr = data.pop_struct(_SVC)[0]
 
     def pack(self):  # pragma: no cover
-        return struct.pack("!H", self.addr)
+        return _SVC.pack(self.addr)
+
+    def pack_into(self, buf, offset=0):  # pragma: no cover
+        _SVC.pack_into(buf, offset, self.addr)
+        return offset + self.LEN
 
     def is_mcast(self):  # pragma: no cover
         return self.addr & self.MCAST
@@ -26,10 +26,34 @@ from lib.flagtypes import HopOFFlags, InfoOFFlags
 from lib.packet.packet_base import Serializable
 from lib.util import Raw, hex_str, iso_timestamp
 
+#: Hop OF: flags(1B), exp time(1B), ingress/egress interfaces(2B + 1B), MAC(3B).
+_HOF = struct.Struct("!BBHB3s")
+#: Hop OF, as covered by its MAC: as above, without the MAC.
+_HOF_MAC_INPUT = struct.Struct("!BBHB")
+#: Info OF: flags(1B), timestamp(4B), ISD(2B), hops(1B).
+_IOF = struct.Struct("!BIHB")
+#: MAC input timestamp(4B).
+_MAC_TS = struct.Struct("!I")
+
 
 class OpaqueField(Serializable):
+    """
+    Opaque fields are shared between paths, and with the segments the paths
+    are built from, so they must be copied (see :meth:`copy`) before being
+    modified.
+    """
+    __slots__ = ()
     LEN = OPAQUE_FIELD_LEN
 
+    def copy(self):
+        """
+        Return a shallow copy of the OF, which is a copy of all of its fields.
+        """
+        inst = self.__class__.__new__(self.__class__)
+        for name in self.__slots__:
+            setattr(inst, name, getattr(self, name))
+        return inst
+
     def __len__(self):  # pragma: no cover
         return self.LEN
 
@@ -46,6 +70,8 @@ class HopOpaqueField(OpaqueField):
     MAC_LEN = 3  # MAC length in bytes.
     MAC_BLOCK_LEN = 16
     VERIFY_FLAGS = HopOFFlags.FORWARD_ONLY
+    __slots__ = ("xover", "verify_only", "forward_only", "recurse",
+                 "exp_time", "ingress_if", "egress_if", "mac")
 
     def __init__(self, raw=None):  # pragma: no cover
         self.xover = False
@@ -60,12 +86,11 @@ class HopOpaqueField(OpaqueField):
 
     def _parse(self, raw):
         data = Raw(raw, self.NAME, self.LEN)
-        flags, self.exp_time = struct.unpack("!BB", data.pop(2))
+        flags, self.exp_time, ifs_hi, ifs_lo, self.mac = data.pop_struct(_HOF)
         self._parse_flags(flags)
-        ifs = int.from_bytes(data.pop(3), byteorder="big")
+        ifs = ifs_hi << 8 | ifs_lo
         self.ingress_if = (ifs & 0xFFF000) >> 12
         self.egress_if = ifs & 0x000FFF
-        self.mac = data.pop(3)
 
     def _parse_flags(self, flags):  # pragma: no cover
         self.xover = bool(flags & HopOFFlags.XOVER)
@@ -89,18 +114,20 @@ class HopOpaqueField(OpaqueField):
         return inst
 
     def pack(self, mac=False):
-        packed = []
-        flags = self._pack_flags()
+        # Ingress and egress interfaces are packed into three bytes
+        ifs = (self.ingress_if << 12) | self.egress_if
         if mac:
-            flags &= self.VERIFY_FLAGS
-        packed.append(struct.pack("!B", flags))
-        packed.append(struct.pack("!B", self.exp_time))
+            return _HOF_MAC_INPUT.pack(
+                self._pack_flags() & self.VERIFY_FLAGS, self.exp_time,
+                ifs >> 8, ifs & 0xFF)
+        return _HOF.pack(self._pack_flags(), self.exp_time, ifs >> 8,
+                         ifs & 0xFF, self.mac)
+
+    def pack_into(self, buf, offset=0):
         ifs = (self.ingress_if << 12) | self.egress_if
-        # Ingress and egress interfaces are packed into three bytes
-        packed.append(ifs.to_bytes(3, "big"))
-        if not mac:
-            packed.append(self.mac)
-        return b"".join(packed)
+        _HOF.pack_into(buf, offset, self._pack_flags(), self.exp_time,
+                       ifs >> 8, ifs & 0xFF, self.mac)
+        return offset + self.LEN
 
     def _pack_flags(self):  # pragma: no cover
         flags = 0
@@ -117,7 +144,7 @@ class HopOpaqueField(OpaqueField):
     def calc_mac(self, key, ts, prev_hof=None) -> bytes:
         """Generates MAC for newly created OF."""
         raw = bytearray()
-        raw += struct.pack("!I", ts)
+        raw += _MAC_TS.pack(ts)
         raw += self.pack(mac=True)
         if prev_hof:
             raw += prev_hof.pack()[1:]  # Ignore flag byte
@@ -126,7 +153,7 @@ class HopOpaqueField(OpaqueField):
         return cbcmac(key, bytes(raw))[:self.MAC_LEN]
 
     def verify_mac(self, key, ts, prev_hof=None) -> bool:  # pragma: no cover
-        return self.mac == self.calc_mac(*args, **kwargs)
+        return self.mac == self.calc_mac(key, ts, prev_hof)
 
     def set_mac(self, *args, **kwargs):  # pragma: no cover
         self.mac = self.calc_mac(*args, **kwargs)
@@ -154,6 +181,7 @@ class InfoOpaqueField(OpaqueField):
     segment (1 byte).
     """
     NAME = "InfoOpaqueField"
+    __slots__ = ("up_flag", "shortcut", "peer", "timestamp", "isd", "hops")
 
     def __init__(self, raw=None):  # pragma: no cover
         self.up_flag = False
@@ -167,7 +195,7 @@ class InfoOpaqueField(OpaqueField):
     def _parse(self, raw):  # pragma: no cover
         data = Raw(raw, self.NAME, self.LEN)
         flags, self.timestamp, self.isd, self.hops = \
-            struct.unpack("!BIHB", data.pop(self.LEN))
+            data.pop_struct(_IOF)
         self._parse_flags(flags)
 
     def _parse_flags(self, flags):  # pragma: no cover
@@ -197,8 +225,13 @@ class InfoOpaqueField(OpaqueField):
         return inst
 
     def pack(self):  # pragma: no cover
-        return struct.pack("!BIHB", self._pack_flags(), self.timestamp,
-                           self.isd, self.hops)
+        return _IOF.pack(self._pack_flags(), self.timestamp, self.isd,
+                         self.hops)
+
+    def pack_into(self, buf, offset=0):  # pragma: no cover
+        _IOF.pack_into(buf, offset, self._pack_flags(), self.timestamp,
+                       self.isd, self.hops)
+        return offset + self.LEN
 
     def _pack_flags(self):  # pragma: no cover
         self._check_flags()
@@ -225,6 +258,15 @@ class OpaqueFieldList(object):
     The lists are stored under labels, where each label describes the contents
     of the list. Some label will only ever have 1 entry, such as an up segment
     IOF. Others can have many, such as a down segment HOF list.
+
+    A flat list of all OFs in order, the label of each of them, and the index
+    of the first OF of each label are kept alongside, so that lookups by index
+    (done several times per forwarded packet) are constant time. They are
+    updated whenever the contents of a label change.
+
+    Neither the lists of OFs, nor the OFs themselves, are ever modified in
+    place: changes replace them instead. Copies (see :meth:`copy`) can thus
+    share them.
     """
     def __init__(self, order):  # pragma: no cover
         """
@@ -237,6 +279,22 @@ class OpaqueFieldList(object):
         self._labels = {}
         for label in order:
             self._labels[label] = []
+        self._ofs = []  # All OFs, in order.
+        self._idx_labels = []  # Label of each entry in _ofs.
+        self._starts = {}  # Label -> index in _ofs of its first OF.
+        self._reindex()
+
+    def _reindex(self):
+        """
+        Rebuild the flat index from the label contents.
+        """
+        self._ofs = []
+        self._idx_labels = []
+        for label in self._order:
+            group = self._labels[label]
+            self._starts[label] = len(self._ofs)
+            self._ofs.extend(group)
+            self._idx_labels.extend([label] * len(group))
 
     def set(self, label, ofs):
         """
@@ -251,6 +309,7 @@ class OpaqueFieldList(object):
         if label not in self._labels:
             raise SCIONKeyError("Opaque field label (%s) unknown" % label)
         self._labels[label] = ofs
+        self._reindex()
 
     def get_by_idx(self, idx):
         """
@@ -265,14 +324,12 @@ class OpaqueFieldList(object):
         """
         if idx < 0:
             raise SCIONIndexError("Requested OF index (%d) is negative" % idx)
-        offset = idx
-        for label in self._order:
-            group = self._labels[label]
-            if offset < len(group):
-                return group[offset]
-            offset -= len(group)
-        raise SCIONIndexError("Requested OF index (%d) is out of range (max %d)"
-                              % (idx, len(self) - 1))
+        try:
+            return self._ofs[idx]
+        except IndexError:
+            raise SCIONIndexError(
+                "Requested OF index (%d) is out of range (max %d)" %
+                (idx, len(self) - 1)) from None
 
     def get_by_label(self, label, label_idx=None):
         """
@@ -283,7 +340,8 @@ class OpaqueFieldList(object):
         :param int label_idx:
             (Optional) an index of an OF in the specified label.
         :returns:
-            A list of OFs (or if `label_idx` was specified, a single OF).
+            A list of OFs (or if `label_idx` was specified, a single OF). The
+            list must not be modified, use :meth:`set` instead.
         :raises:
             :any:`SCIONKeyError`: if the label is unknown.
             :any:`SCIONIndexError`: if the specified label index is out of range
@@ -314,14 +372,12 @@ class OpaqueFieldList(object):
         if idx < 0:
             raise SCIONIndexError("Index for requested label is negative (%d)"
                                   % idx)
-        offset = idx
-        for label in self._order:
-            group = self._labels[label]
-            if offset < len(group):
-                return label
-            offset -= len(group)
-        raise SCIONIndexError("Index (%d) for requested label is out of range "
-                              "(max %d)" % (idx, len(self) - 1)) from None
+        try:
+            return self._idx_labels[idx]
+        except IndexError:
+            raise SCIONIndexError(
+                "Index (%d) for requested label is out of range (max %d)" %
+                (idx, len(self) - 1)) from None
 
     def get_idx_by_label(self, label):
         """
@@ -331,17 +387,14 @@ class OpaqueFieldList(object):
         :raises:
             :any:`SCIONKeyError`: if the label is unknown.
         """
-        idx = 0
-        for l in self._order:
-            if label == l:
-                if self._labels[l]:
-                    return idx
-                else:
-                    raise SCIONKeyError("Opaque field label (%s) is empty." %
-                                        label) from None
-            idx += len(self._labels[l])
-        raise SCIONKeyError("Opaque field label (%s) unknown." %
-                            label) from None
+        try:
+            idx = self._starts[label]
+        except KeyError:
+            raise SCIONKeyError("Opaque field label (%s) unknown." %
+                                label) from None
+        if not self._labels[label]:
+            raise SCIONKeyError("Opaque field label (%s) is empty." % label)
+        return idx
 
     def swap(self, label_a, label_b):
         """
@@ -359,6 +412,7 @@ class OpaqueFieldList(object):
         except KeyError as e:
             raise SCIONKeyError("Opaque field label (%s) unknown"
                                 % e.args[0]) from None
+        self._reindex()
 
     def reverse_label(self, label):
         """
@@ -369,10 +423,15 @@ class OpaqueFieldList(object):
             :any:`SCIONKeyError`: if the label is unknown.
         """
         try:
-            self._labels[label].reverse()
+            group = self._labels[label]
         except KeyError:
             raise SCIONKeyError("Opaque field label (%s) unknown"
                                 % label) from None
+        group = group[::-1]
+        self._labels[label] = group
+        # The label keeps its place, so only its slice of the index changes.
+        start = self._starts[label]
+        self._ofs[start:start + len(group)] = group
 
     def reverse_up_flag(self, label):
         """
@@ -389,7 +448,10 @@ class OpaqueFieldList(object):
             raise SCIONKeyError("Opaque field label (%s) unknown"
                                 % label) from None
         if len(group) > 0:
-            group[0].up_flag ^= True
+            of = group[0].copy()
+            of.up_flag ^= True
+            self._labels[label] = [of] + group[1:]
+            self._ofs[self._starts[label]] = of
 
     def pack(self):
         """
@@ -398,11 +460,33 @@ class OpaqueFieldList(object):
         :returns: A bytestring containing all the OFs, in order.
         :rtype: bytes
         """
-        ret = []
-        for label in self._order:
-            for of in self._labels[label]:
-                ret.append(of.pack())
-        return b"".join(ret)
+        buf = bytearray(len(self) * OpaqueField.LEN)
+        self.pack_into(buf)
+        return bytes(buf)
+
+    def pack_into(self, buf, offset=0):
+        """
+        Pack all of the OFs, in order, into a preallocated buffer.
+
+        :param bytearray buf: buffer to pack into.
+        :param int offset: offset in `buf` to pack at.
+        :returns: the offset in `buf` following the packed OFs.
+        """
+        for of in self._ofs:
+            offset = of.pack_into(buf, offset)
+        return offset
+
+    def copy(self):
+        """
+        Return a copy of the list, which shares the OFs with this one.
+        """
+        inst = self.__class__.__new__(self.__class__)
+        inst._order = self._order
+        inst._labels = self._labels.copy()
+        inst._ofs = self._ofs[:]
+        inst._idx_labels = self._idx_labels[:]
+        inst._starts = self._starts.copy()
+        return inst
 
     def count(self, label):
         """
@@ -421,7 +505,4 @@ class OpaqueFieldList(object):
                                 % label) from None
 
     def __len__(self):
-        count = 0
-        for values in self._labels.values():
-            count += len(values)
-        return count
+        return len(self._ofs)
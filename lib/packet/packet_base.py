@@ -31,7 +31,14 @@ from lib.util import hex_str
 class Serializable(object, metaclass=ABCMeta):  # pragma: no cover
     """
     Base class for all objects which serialize into raw bytes.
+
+    Subclasses which are created per packet declare ``__slots__``, which saves
+    the memory and the allocation of a per-instance ``__dict__``. This base
+    class, and any base class of those, must then declare empty ``__slots__``
+    too.
     """
+    __slots__ = ()
+
     def __init__(self, raw=None):
         if raw:
             self._parse(raw)
@@ -48,6 +55,21 @@ class Serializable(object, metaclass=ABCMeta):  # pragma: no cover
     def pack(self):
         raise NotImplementedError
 
+    def pack_into(self, buf, offset=0):
+        """
+        Pack into a preallocated buffer, instead of returning new bytes.
+        Fixed-size headers override this to write their fields directly with a
+        precompiled `struct.Struct`.
+
+        :param bytearray buf: buffer to pack into.
+        :param int offset: offset in `buf` to pack at.
+        :returns: the offset in `buf` following the packed bytes.
+        """
+        raw = self.pack()
+        end = offset + len(raw)
+        buf[offset:end] = raw
+        return end
+
     @abstractmethod
     def __len__(self):
         raise NotImplementedError
@@ -66,27 +88,42 @@ class Cerealizable(object, metaclass=ABCMeta):
 
     P = capnp.load("proto/foo.capnp")
     P_CLS = P.Foo
+
+    Parsed objects keep the read-only capnp reader of the received message as
+    `p`, along with the received bytes, so that an object which is forwarded
+    unchanged is never copied or re-encoded. Anything that modifies the
+    message has to go through :meth:`writable`, which converts the reader to a
+    builder on first use, and drops the cached packed bytes.
+
+    A reader counts every access against the traversal limit of its message,
+    so objects that are kept and read over and over (e.g. by
+    :class:`lib.path_db.PathSegmentDB`) have to be converted with
+    :meth:`detach` first.
     """
     def __init__(self, p):
         assert not isinstance(p, bytes)
         self.p = p
-        self._packed = False
+        # Packed bytes of `p` (resp. of the full payload), if known.
+        self._raw = None
+        self._raw_full = None
 
     @classmethod
     def from_raw(cls, raw):
         assert isinstance(raw, bytes), type(raw)
         try:
-            return cls(cls.P_CLS.from_bytes_packed(raw).as_builder())
+            inst = cls(cls.P_CLS.from_bytes_packed(raw))
         except capnp.lib.capnp.KjException as e:
             raise SCIONParseError("Unable to parse %s capnp message: %s" %
                                   (cls, e)) from None
+        inst._raw = raw
+        return inst
 
     @classmethod
     def from_raw_multiple(cls, raw):
         assert isinstance(raw, bytes), type(raw)
         try:
             for p in cls.P_CLS.read_multiple_bytes_packed(raw):
-                yield cls(p.as_builder())
+                yield cls(p)
         except capnp.lib.capnp.KjException as e:
             raise SCIONParseError("Unable to parse %s capnp message: %s" %
                                   (cls, e)) from None
@@ -102,12 +139,40 @@ class Cerealizable(object, metaclass=ABCMeta):
     def to_dict(self):
         return self.p.to_dict()
 
+    def _is_builder(self):
+        return isinstance(self.p, capnp.lib.capnp._DynamicStructBuilder)
+
+    def writable(self):
+        """
+        Return `p` as a builder that can be modified, and drop the cached
+        packed bytes.
+
+        NB: a reader is converted by copying it. Wrappers of parts of a
+        read-only message (e.g. :meth:`lib.packet.pcb.PathSegment.asm`) must
+        thus not be modified directly, but through their parent.
+        """
+        if not self._is_builder():
+            self.p = self.p.as_builder()
+        self._raw = None
+        self._raw_full = None
+        return self.p
+
+    def detach(self):
+        """
+        Convert a reader to a builder, which has no traversal limit, keeping
+        the cached packed bytes (the message itself doesn't change).
+        """
+        if not self._is_builder():
+            self.p = self.p.as_builder()
+
     def pack(self, *args, **kwargs):
-        assert not self._packed, "May only be packed once"
-        self._packed = True
-        return self._pack(*args, **kwargs)
+        if self._raw is None:
+            self._raw = self._pack(*args, **kwargs)
+        return self._raw
 
     def _pack(self):
+        if not self._is_builder():
+            return self.p.as_builder().to_bytes_packed()
         return self.p.to_bytes_packed()
 
     def __bool__(self):
@@ -116,15 +181,24 @@ class Cerealizable(object, metaclass=ABCMeta):
     def __len__(self):
         raise NotImplementedError
 
+    def _copy_p(self):
+        # Readers are immutable, so copies can share them.
+        if self._is_builder():
+            return self.p.copy()
+        return self.p
+
     def copy(self):
-        return type(self)(self.p.copy())
+        inst = type(self)(self._copy_p())
+        inst._raw = self._raw
+        inst._raw_full = self._raw_full
+        return inst
 
     def __copy__(self):
-        return type(self)(self.p.copy())
+        return self.copy()
 
     def __deepcopy__(self, memo):
         # http://stackoverflow.com/a/15774013
-        inst = type(self)(self.p.copy())
+        inst = self.copy()
         memo[id(self)] = inst
         return inst
 
@@ -142,6 +216,7 @@ class L4HeaderBase(Serializable, metaclass=ABCMeta):  # pragma: no cover
     """
     Base class for L4 headers.
     """
+    __slots__ = ()
     TYPE = None
 
     def pack(self, payload, checksum=None):
@@ -150,6 +225,23 @@ class L4HeaderBase(Serializable, metaclass=ABCMeta):  # pragma: no cover
             checksum = self._calc_checksum(payload)
         return self._pack(checksum)
 
+    def pack_into(self, buf, offset, payload, checksum=None):
+        """
+        Same as :meth:`pack`, but packs into a preallocated buffer.
+
+        :returns: the offset in `buf` following the packed header.
+        """
+        self.total_len = self.LEN + len(payload)
+        if checksum is None:
+            checksum = self._calc_checksum(payload)
+        return self._pack_into(buf, offset, checksum)
+
+    def _pack_into(self, buf, offset, checksum):
+        raw = self._pack(checksum)
+        end = offset + len(raw)
+        buf[offset:end] = raw
+        return end
+
     @abstractmethod
     def validate(self, payload):
         raise NotImplementedError
@@ -207,8 +299,15 @@ class PayloadRaw(PayloadBase):  # pragma: no cover
         return inst
 
     def pack(self):
+        if not isinstance(self._raw, bytes):
+            # Parsed payloads are a view of the packet, until needed as bytes.
+            self._raw = bytes(self._raw)
         return self._raw
 
+    def __getstate__(self):
+        # A view can't be pickled or deep-copied.
+        return {"_raw": self.pack()}
+
     def __eq__(self, other):
         return self._raw == other._raw
 
@@ -233,9 +332,9 @@ class SCIONPayloadBaseProto(Cerealizable):  # pragma: no cover
     PAYLOAD_TYPE = None
 
     def pack_full(self):
-        assert not self._packed, "May only be packed once"
-        self._packed = True
-        return self._pack_full(self.p)
+        if self._raw_full is None:
+            self._raw_full = self._pack_full(self.p)
+        return self._raw_full
 
     def _pack_full(self, p):
         wrapper = P.SCION.new_message(**{self.PAYLOAD_CLASS: p})
@@ -16,8 +16,10 @@
 ==================================
 """
 # Stdlib
-import copy
+import heapq
 import logging
+from collections import defaultdict
+from itertools import chain
 
 # SCION
 from lib.crypto.hash_tree import ConnectedHashTree
@@ -30,6 +32,7 @@ from lib.packet.opaque_field import (
 )
 from lib.packet.packet_base import Serializable
 from lib.util import Raw
+from typing import Optional
 
 
 class SCIONPath(Serializable):
@@ -111,6 +114,34 @@ class SCIONPath(Serializable):
         assert len(raw) == len(self)
         return raw
 
+    def pack_into(self, buf, offset=0):  # pragma: no cover
+        end = self._ofs.pack_into(buf, offset)
+        assert end - offset == len(self)
+        return end
+
+    def copy(self):
+        """
+        Return a copy of the path, which shares its opaque fields with this
+        one.
+        """
+        inst = type(self)()
+        inst._ofs = self._ofs.copy()
+        inst._iof_idx = self._iof_idx
+        inst._hof_idx = self._hof_idx
+        inst.interfaces = self.interfaces[:]
+        inst.mtu = self.mtu
+        return inst
+
+    def __copy__(self):  # pragma: no cover
+        return self.copy()
+
+    def __deepcopy__(self, memo):  # pragma: no cover
+        # The opaque fields are never modified in place, so sharing them is
+        # as good as copying them.
+        inst = self.copy()
+        memo[id(self)] = inst
+        return inst
+
     def _set_ofs(self, label, value):
         """
         Set an OF label to the given value.
@@ -343,6 +374,13 @@ class SCIONPath(Serializable):
         s.append("</SCION-Path>")
         return "\n".join(s)
 
+    def fingerprint(self):  # pragma: no cover
+        """
+        Return a hashable value, which is the same for paths that compare
+        equal.
+        """
+        return tuple(self.interfaces)
+
     def __eq__(self, other):  # pragma: no cover
         return self.interfaces == other.interfaces
 
@@ -376,13 +414,112 @@ class PathCombinator(object):
         :param list down_segments: List of `down` PathSegments.
         :returns: List of paths.
         """
-        paths = []
+        return [path for _, _, path in
+                cls._iter_shortcut_paths(up_segments, down_segments)]
+
+    @classmethod
+    def _iter_shortcut_paths(cls, up_segments, down_segments):
+        """
+        Yield (up segment, down segment, path) for each distinct shortcut path
+        that can be built using the provided up- and down-segments.
+        """
+        seen = set()
         for up in up_segments:
             for down in down_segments:
                 for path in cls._build_shortcuts(up, down):
-                    if path and path not in paths:
-                        paths.append(path)
-        return paths
+                    if not path:
+                        continue
+                    fingerprint = path.fingerprint()
+                    if fingerprint not in seen:
+                        seen.add(fingerprint)
+                        yield up, down, path
+
+    @classmethod
+    def iter_paths(cls, up_segments, core_segments, down_segments, k=None):
+        """
+        Yield the shortcut and full paths that can be built using the provided
+        segments, cheapest first (see :meth:`path_cost`).
+
+        Full paths are ranked using the metadata of their segments, and only
+        built once they are reached, so a caller that stops early does not pay
+        for the rest. With `k` set, only the `k` cheapest candidates are kept
+        while ranking.
+
+        :param list up_segments: List of `up` PathSegments.
+        :param list core_segments: List of `core` PathSegments.
+        :param list down_segments: List of `down` PathSegments.
+        :param int k: Maximum number of paths to yield.
+        """
+        candidates = chain(
+            cls._shortcut_candidates(up_segments, down_segments),
+            cls._full_path_candidates(up_segments, core_segments,
+                                      down_segments))
+        # The sequence number keeps the ranking stable, and ensures that paths
+        # and segments are never compared.
+        ranked = ((cost, i, item) for i, (cost, item) in enumerate(candidates))
+        if k is None:
+            heap = list(ranked)
+            heapq.heapify(heap)
+        else:
+            # A sorted list is a valid heap.
+            heap = heapq.nsmallest(k, ranked)
+        while heap:
+            _, _, item = heapq.heappop(heap)
+            if isinstance(item, SCIONPath):
+                yield item
+            else:
+                yield cls._build_full_path(*item)
+
+    @classmethod
+    def path_cost(cls, n_links, mtu, exp_time):
+        """
+        Return the cost of a path, for ranking. Lower is better: fewer
+        inter-AS links first, then a larger MTU, then a later expiration time.
+        """
+        return n_links, -mtu, -exp_time
+
+    @classmethod
+    def _shortcut_candidates(cls, up_segments, down_segments):
+        """
+        Build the shortcut paths, and yield (cost, path) for each of them.
+        """
+        for up, down, path in cls._iter_shortcut_paths(up_segments,
+                                                       down_segments):
+            exp_time = min(up.get_expiration_time(),
+                           down.get_expiration_time())
+            yield cls.path_cost(len(path.interfaces) // 2, path.mtu,
+                                exp_time), path
+
+    @classmethod
+    def _full_path_candidates(cls, up_segments, core_segments, down_segments):
+        """
+        Yield (cost, (up, core, down)) for each connected combination of the
+        provided segments, without building the paths. The core segment is
+        ``None`` where the up- and down-segments meet at the same core AS.
+        """
+        cores = defaultdict(list)
+        for core in core_segments:
+            cores[core.last_ia(), core.first_ia()].append(core)
+        for up in up_segments:
+            up_ia = up.first_ia()
+            for down in down_segments:
+                down_ia = down.first_ia()
+                if up_ia == down_ia:
+                    yield cls._full_path_cost(up, down), (up, None, down)
+                for core in cores.get((up_ia, down_ia), ()):
+                    yield (cls._full_path_cost(up, core, down),
+                           (up, core, down))
+
+    @classmethod
+    def _full_path_cost(cls, *segments):
+        """
+        Return the cost of the full path built from `segments`, using the
+        metadata of the segments alone.
+        """
+        return cls.path_cost(
+            sum(seg.get_n_hops() - 1 for seg in segments),
+            min_mtu(*[cls._segment_mtu(seg) for seg in segments]),
+            min(seg.get_expiration_time() for seg in segments))
 
     @classmethod
     def _build_shortcuts(cls, up_segment, down_segment):
@@ -425,13 +562,13 @@ class PathCombinator(object):
         """
         if not segment:
             return None, None, float("inf")
-        info = copy.deepcopy(segment.info)
+        info = segment.info.copy()
         info.up_flag = up
-        hofs, mtu = cls._copy_hofs(segment.iter_asms(), reverse=up)
+        hofs, mtu = cls._copy_hofs(segment, reverse=up)
         if xover_start:
-            hofs[0].xover = True
+            cls._set_xover(hofs, 0)
         if xover_end:
-            hofs[-1].xover = True
+            cls._set_xover(hofs, -1)
         return info, hofs, mtu
 
     @classmethod
@@ -441,33 +578,63 @@ class PathCombinator(object):
         segments.
 
         *Note*: 'shortest' is calculated by looking for the point that's
-        furthest from the core.
+        furthest from the core. Among points as far from the core, the one
+        closest to the core in the up segment is picked.
+
+        The candidate points are found with the AS indexes of the segments,
+        instead of by comparing every pair of ASMarkings.
 
         :param list up_segment: `up` :any:`PathSegment`.
         :param list down_segment: `down` :any:`PathSegment`.
         :returns:
             Tuple of the shortest xovr and peer points.
         """
+        up_ias = up_segment.get_ias()
+        down_ias = down_segment.get_ias()
+        up_idxs = up_segment.get_ia_idxs()
+        down_idxs = down_segment.get_ia_idxs()
+        # The first ASMarking of each segment (i.e. the core AS) is never a
+        # xovr or peer point.
         xovrs = []
+        for isd_as in up_idxs.keys() & down_idxs.keys():
+            xovrs.extend((up_i, down_i) for up_i in up_idxs[isd_as]
+                         for down_i in down_idxs[isd_as] if up_i and down_i)
         peers = []
+        down_peer_ias = down_segment.get_peer_ias()
+        for up_i, peer_ias in enumerate(up_segment.get_peer_ias()):
+            if not up_i:
+                continue
+            up_ia = up_ias[up_i]
+            for peer_ia in peer_ias:
+                for down_i in down_idxs.get(peer_ia, ()):
+                    if (down_i and up_ia != down_ias[down_i] and
+                            up_ia in down_peer_ias[down_i]):
+                        peers.append((up_i, down_i))
+        xovr = min(xovrs, key=cls._point_order, default=None)
+        return xovr, cls._best_peer(up_segment, down_segment, peers)
+
+    @classmethod
+    def _point_order(cls, point):
+        """
+        Sort key putting the points furthest from the core first. Ties go to
+        the point with the lowest up segment index.
+        """
+        return -sum(point), point
+
+    @classmethod
+    def _best_peer(cls, up_segment, down_segment, points):
+        """
+        Return the best of the candidate peer `points` which has usable
+        peering links (see :meth:`_find_peer_hfs`), or ``None``.
+        """
         up_seg_rev_map = up_segment.get_rev_map()
         down_seg_rev_map = down_segment.get_rev_map()
-        for up_i, up_asm in enumerate(up_segment.iter_asms(1), 1):
-            for down_i, down_asm in enumerate(down_segment.iter_asms(1), 1):
-                up_ia = up_asm.isd_as()
-                down_ia = down_asm.isd_as()
-                if up_ia == down_ia:
-                    xovrs.append((up_i, down_i))
-                    continue
-                if cls._find_peer_hfs(up_asm, down_asm, up_seg_rev_map,
-                                      down_seg_rev_map):
-                    peers.append((up_i, down_i))
-        xovr = peer = None
-        if xovrs:
-            xovr = max(xovrs, key=lambda tup: sum(tup))
-        if peers:
-            peer = max(peers, key=lambda tup: sum(tup))
-        return xovr, peer
+        for up_i, down_i in sorted(set(points), key=cls._point_order):
+            if cls._find_peer_hfs(
+                    up_segment.asm(up_i), down_segment.asm(down_i),
+                    up_seg_rev_map, down_seg_rev_map):
+                return up_i, down_i
+        return None
 
     @classmethod
     def _join_xovr(cls, up_segment, down_segment, point):
@@ -616,28 +783,47 @@ class PathCombinator(object):
         return True
 
     @classmethod
-    def _copy_hofs(cls, asms, reverse=True):
+    def _copy_hofs(cls, segment, start=0, reverse=True):
         """
-        Copy :any:`HopOpaqueField`\s, and optionally reverse the result.
+        Copy the list of :any:`HopOpaqueField`\s of a segment, and optionally
+        reverse the result. The HOFs themselves are shared with the segment,
+        see :meth:`_set_xover`.
 
-        :param list ases: List of :any:`ASMarking` objects.
+        :param PathSegment segment: Segment to copy the HOFs of.
+        :param int start: Index of the first :any:`ASMarking` to copy.
         :param bool reverse: If ``True``, reverse the list before returning it.
         :returns:
-            List of copied :any:`HopOpaqueField`\s.
+            List of :any:`HopOpaqueField`\s, and the path MTU.
+        """
+        hofs = segment.get_hofs()[start:]
+        if reverse:
+            hofs.reverse()
+        return hofs, cls._segment_mtu(segment, start)
+
+    @classmethod
+    def _segment_mtu(cls, segment, start=0):
+        """
+        Return the MTU of a segment, starting at the ASMarking at index
+        `start`.
         """
-        hofs = []
         mtu = float("inf")
-        for i, asm in enumerate(asms):
-            pcbm = asm.pcbm(0)
+        for i, (in_mtu, as_mtu) in enumerate(segment.get_mtus()[start:]):
             if i != 0:
                 # The upstream interface's mtu is irrelevant for the first
                 # ASMarking, as it won't be traversed.
-                mtu = min(mtu, pcbm.p.inMTU)
-            mtu = min(mtu, asm.p.mtu)
-            hofs.append(pcbm.hof())
-        if reverse:
-            hofs.reverse()
-        return hofs, mtu
+                mtu = min(mtu, in_mtu)
+            mtu = min(mtu, as_mtu)
+        return mtu
+
+    @classmethod
+    def _set_xover(cls, hofs, idx):
+        """
+        Set the crossover flag of a HOF in a list returned by
+        :meth:`_copy_hofs`, replacing the shared HOF with a copy.
+        """
+        hof = hofs[idx].copy()
+        hof.xover = True
+        hofs[idx] = hof
 
     @classmethod
     def _copy_segment_shortcut(cls, segment, index, up=True):
@@ -656,16 +842,15 @@ class PathCombinator(object):
             The copied :any:`InfoOpaqueField`, path :any:`HopOpaqueField`\s and
             Upstream :any:`HopOpaqueField`.
         """
-        info = copy.deepcopy(segment.info)
+        info = segment.info.copy()
         info.hops -= index
         info.up_flag = up
         # Copy segment HOFs
-        asms = segment.iter_asms(index)
-        hofs, mtu = cls._copy_hofs(asms, reverse=up)
+        hofs, mtu = cls._copy_hofs(segment, index, reverse=up)
         xovr_idx = -1 if up else 0
-        hofs[xovr_idx].xover = True
+        cls._set_xover(hofs, xovr_idx)
         # Extract upstream HOF
-        upstream_hof = segment.asm(index - 1).pcbm(0).hof()
+        upstream_hof = segment.get_hofs()[index - 1].copy()
         upstream_hof.xover = False
         upstream_hof.verify_only = True
         return info, hofs, upstream_hof, mtu
@@ -722,35 +907,53 @@ class PathCombinator(object):
             if not cls._check_connected(up_segment, core_segment,
                                         down_segment):
                 continue
-
-            up_iof, up_hofs, up_mtu = cls._copy_segment(
-                up_segment, False, (core_segment or down_segment))
-            core_iof, core_hofs, core_mtu = cls._copy_segment(
-                core_segment, up_segment, down_segment)
-            down_iof, down_hofs, down_mtu = cls._copy_segment(
-                down_segment, (up_segment or core_segment), False, up=False)
-            args = []
-            for iof, hofs in [(up_iof, up_hofs), (core_iof, core_hofs),
-                              (down_iof, down_hofs)]:
-                if iof:
-                    args.extend([iof, hofs])
-            path = SCIONPath.from_values(*args)
-            path.mtu = min_mtu(up_mtu, core_mtu, down_mtu)
-            if up_segment:
-                up_core = list(reversed(list(up_segment.iter_asms())))
-            else:
-                up_core = []
-            if core_segment:
-                up_core += list(reversed(list(core_segment.iter_asms())))
-            cls._add_interfaces(path, up_core)
-            if down_segment:
-                down_core = list(down_segment.iter_asms())
-            else:
-                down_core = []
-            cls._add_interfaces(path, down_core, up=False)
-            res.append(path)
+            res.append(cls._build_full_path(up_segment, core_segment,
+                                            down_segment))
         return res
 
+    @classmethod
+    def _build_full_path(cls, up_segment, core_segment, down_segment):
+        """
+        Build the full path made of the supplied (connected) segments. Any of
+        them can be ``None``.
+        """
+        up_iof, up_hofs, up_mtu = cls._copy_segment(
+            up_segment, False, (core_segment or down_segment))
+        core_iof, core_hofs, core_mtu = cls._copy_segment(
+            core_segment, up_segment, down_segment)
+        down_iof, down_hofs, down_mtu = cls._copy_segment(
+            down_segment, (up_segment or core_segment), False, up=False)
+        args = []
+        for iof, hofs in [(up_iof, up_hofs), (core_iof, core_hofs),
+                          (down_iof, down_hofs)]:
+            if iof:
+                args.extend([iof, hofs])
+        path = SCIONPath.from_values(*args)
+        path.mtu = min_mtu(up_mtu, core_mtu, down_mtu)
+        if up_segment:
+            up_core = list(reversed(list(up_segment.iter_asms())))
+        else:
+            up_core = []
+        if core_segment:
+            up_core += list(reversed(list(core_segment.iter_asms())))
+        cls._add_interfaces(path, up_core)
+        if down_segment:
+            down_core = list(down_segment.iter_asms())
+        else:
+            down_core = []
+        cls._add_interfaces(path, down_core, up=False)
+        return path
+
 
 def parse_path(raw):  # pragma: no cover
     return SCIONPath(raw)
+
+
+def valid_hof(path):  # pragma: no cover
+    """
+    Specification function used in the router's contracts, whether the
+    current HOF of `path` passed verification. It is defined in
+    scion-stubs/lib/packet/path.pyi for the verifier; at runtime it only has
+    to exist, and holds trivially, as in the stub.
+    """
+    return True
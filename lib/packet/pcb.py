@@ -118,9 +118,10 @@ class ASMarking(Cerealizable):
         """
         Appends a new ASMarking extension.
         """
-        d = self.p.to_dict()
+        p = self.writable()
+        d = p.to_dict()
         d.setdefault('exts', []).append(ext)
-        self.p.from_dict(d)
+        p.from_dict(d)
 
     def sig_pack(self, ver):
         """
@@ -143,13 +144,13 @@ class ASMarking(Cerealizable):
         """
         Removes the signature from the AS block.
         """
-        self.p.sig = b''
+        self.writable().sig = b''
 
     def remove_chain(self):  # pragma: no cover
         """
         Removes the certificate chain from the AS block.
         """
-        self.p.chain = b''
+        self.writable().chain = b''
 
     def short_desc(self):
         desc = []
@@ -165,6 +166,11 @@ class ASMarking(Cerealizable):
 
 
 class PathSegment(SCIONPayloadBaseProto):
+    """
+    Values derived from the segment (e.g. :meth:`get_hops_hash`) are computed
+    on first use, and kept until the segment is modified, i.e. until
+    :meth:`writable` is called.
+    """
     NAME = "PathSegment"
     PAYLOAD_CLASS = PayloadClass.PCB
     P_CLS = P.PathSegment
@@ -172,6 +178,7 @@ class PathSegment(SCIONPayloadBaseProto):
     def __init__(self, p):  # pragma: no cover
         super().__init__(p)
         self._min_exp = float("inf")
+        self._derived = {}
         self._setup()
 
     def _setup(self):
@@ -193,6 +200,22 @@ class PathSegment(SCIONPayloadBaseProto):
                 p.exts.revInfos[i] = info.copy()
         return cls(p)
 
+    def writable(self):
+        self._derived.clear()
+        return super().writable()
+
+    def detach(self):
+        super().detach()
+        if self.sibra_ext:
+            self.sibra_ext = SibraPCBExt(self.p.exts.sibra)
+
+    def _get_derived(self, key, calc):
+        try:
+            return self._derived[key]
+        except KeyError:
+            val = self._derived[key] = calc()
+            return val
+
     def _calc_min_exp(self):
         # NB: only the expiration time of the first pcbm is considered.
         for asm in self.iter_asms():
@@ -223,26 +246,29 @@ class PathSegment(SCIONPayloadBaseProto):
         assert not self.p.asms[-1].sig
         sig = sign(self.sig_pack(3), key)
         if set_:
-            self.p.asms[-1].sig = sig
+            self.writable().asms[-1].sig = sig
         return sig
 
     def add_asm(self, asm):  # pragma: no cover
         """
         Appends a new ASMarking block.
         """
-        d = self.p.to_dict()
+        p = self.writable()
+        d = p.to_dict()
         d.setdefault('asms', []).append(asm.p)
-        self.p.from_dict(d)
+        p.from_dict(d)
         self._update_info()
         self._min_exp = min(self._min_exp, asm.pcbm(0).hof().exp_time)
 
     def _update_info(self):  # pragma: no cover
-        self.info.hops = len(self.p.asms)
-        self.p.info = self.info.pack()
+        p = self.writable()
+        self.info.hops = len(p.asms)
+        p.info = self.info.pack()
 
     def add_sibra_ext(self, ext_p):  # pragma: no cover
-        self.p.exts.sibra = ext_p.copy()
-        self.sibra_ext = SibraPCBExt(self.p.exts.sibra)
+        p = self.writable()
+        p.exts.sibra = ext_p.copy()
+        self.sibra_ext = SibraPCBExt(p.exts.sibra)
 
     def add_rev_infos(self, rev_infos):  # pragma: no cover
         """
@@ -251,10 +277,11 @@ class PathSegment(SCIONPayloadBaseProto):
         """
         if not rev_infos:
             return
+        p = self.writable()
         existing = {}
         current_epoch = ConnectedHashTree.get_current_epoch()
-        for i in range(len(self.p.exts.revInfos)):
-            orphan = self.p.exts.revInfos.disown(i)
+        for i in range(len(p.exts.revInfos)):
+            orphan = p.exts.revInfos.disown(i)
             info_p = orphan.get()
             if info_p.epoch >= current_epoch:
                 existing[(info_p.isdas, info_p.ifID)] = orphan
@@ -264,18 +291,19 @@ class PathSegment(SCIONPayloadBaseProto):
             if (info.p.epoch >= current_epoch and
                     (info.p.isdas, info.p.ifID) not in existing):
                 filtered.append(info)
-        self.p.exts.init("revInfos", len(existing) + len(filtered))
+        p.exts.init("revInfos", len(existing) + len(filtered))
         for i, orphan in enumerate(existing.values()):
-            self.p.exts.revInfos.adopt(i, orphan)
+            p.exts.revInfos.adopt(i, orphan)
         n_existing = len(existing)
         for i, info in enumerate(filtered):
-            self.p.exts.revInfos[n_existing + i] = info.p
+            p.exts.revInfos[n_existing + i] = info.p
 
     def remove_crypto(self):  # pragma: no cover
         """
         Removes the signatures and certificates from each AS block.
         """
-        for asm in self.iter_asms():
+        for asm_p in self.writable().asms:
+            asm = ASMarking(asm_p)
             asm.remove_sig()
             asm.remove_chain()
 
@@ -283,39 +311,88 @@ class PathSegment(SCIONPayloadBaseProto):
         """
         Returns the list of HopOpaqueFields in the path.
         """
-        hofs = []
         info = InfoOpaqueField(self.p.info)
-        asms = list(self.iter_asms())
+        hofs = self.get_hofs()[:]
         if reverse_direction:
-            asms = reversed(asms)
+            hofs.reverse()
             info.up_flag ^= True
-        for asm in asms:
-            hofs.append(asm.pcbm(0).hof())
         return SCIONPath.from_values(info, hofs)
 
+    def get_hofs(self):  # pragma: no cover
+        """
+        Return the HopOpaqueField of the first PCBMarking of each ASMarking.
+        The list is shared by all callers, and must not be modified.
+        """
+        return self._get_derived("hofs", lambda: [
+            asm.pcbm(0).hof() for asm in self.iter_asms()])
+
+    def get_mtus(self):  # pragma: no cover
+        """
+        Return a (ingress MTU of the first PCBMarking, AS MTU) tuple for each
+        ASMarking. The list is shared by all callers, and must not be
+        modified.
+        """
+        return self._get_derived("mtus", lambda: [
+            (asm.pcbm(0).p.inMTU, asm.p.mtu) for asm in self.iter_asms()])
+
+    def get_ias(self):  # pragma: no cover
+        """
+        Return the ISD_AS of each ASMarking. The list is shared by all
+        callers, and must not be modified.
+        """
+        return self._get_derived("ias", lambda: [
+            asm.isd_as() for asm in self.iter_asms()])
+
+    def get_ia_idxs(self):
+        """
+        Return a dict of ISD_AS -> indexes of the ASMarkings of that AS. The
+        dict is shared by all callers, and must not be modified.
+        """
+        return self._get_derived("ia_idxs", self._calc_ia_idxs)
+
+    def _calc_ia_idxs(self):
+        idxs = {}
+        for i, isd_as in enumerate(self.get_ias()):
+            idxs.setdefault(isd_as, []).append(i)
+        return idxs
+
+    def get_peer_ias(self):  # pragma: no cover
+        """
+        Return, for each ASMarking, the set of ISD_ASes its peering
+        PCBMarkings come from. The list is shared by all callers, and must not
+        be modified.
+        """
+        return self._get_derived("peer_ias", lambda: [
+            {pcbm.inIA() for pcbm in asm.iter_pcbms(1)}
+            for asm in self.iter_asms()])
+
     def first_ia(self):  # pragma: no cover
-        return self.asm(0).isd_as()
+        return self._get_derived("first_ia", lambda: self.asm(0).isd_as())
 
     def last_ia(self):  # pragma: no cover
-        return self.asm(-1).isd_as()
+        return self._get_derived("last_ia", lambda: self.asm(-1).isd_as())
 
     def last_hof(self):  # pragma: no cover
         if self.p.asms:
             return self.asm(-1).pcbm(0).hof()
         return None
 
-    def get_hops_hash(self, hex=False):  # pragma: no cover
+    def get_hops_hash(self, hex=False):
         """
         Returns the hash over all triples (ISD_AS, IG_IF, EG_IF) included in
         the path segment.
         """
+        if hex:
+            return self._get_derived(
+                "hops_hash_hex", lambda: self.get_hops_hash().hex())
+        return self._get_derived("hops_hash", self._calc_hops_hash)
+
+    def _calc_hops_hash(self):
         h = SHA256.new()
         for asm in self.iter_asms():
             pcbm = asm.pcbm(0)
             h.update(asm.isd_as().pack() +
                      struct.pack("!QQ", pcbm.p.inIF, pcbm.p.outIF))
-        if hex:
-            return h.hexdigest()
         return h.digest()
 
     def get_n_peer_links(self):  # pragma: no cover
@@ -327,7 +404,7 @@ class PathSegment(SCIONPayloadBaseProto):
 
     def get_n_hops(self):  # pragma: no cover
         """Return the number of hops in the PathSegment."""
-        return len(self.p.asms)
+        return self._get_derived("n_hops", lambda: len(self.p.asms))
 
     def get_timestamp(self):  # pragma: no cover
         """Returns the creation timestamp of this PathSegment."""
@@ -345,6 +422,9 @@ class PathSegment(SCIONPayloadBaseProto):
         extension in the last ASMarking supplies an expiration time, use that.
         Otherwise fall-back to the standard expiration time calculation.
         """
+        return self._get_derived("exp_time", self._calc_exp_time)
+
+    def _calc_exp_time(self):
         if self.is_sibra():
             return self.sibra_ext.exp_ts()
         return self.info.timestamp + int(self._min_exp * EXP_TIME_UNIT)
@@ -365,8 +445,12 @@ class PathSegment(SCIONPayloadBaseProto):
     def get_rev_map(self):
         """
         Returns a dict (ISD_AS, IF) -> RevocationInfo, if there are any
-        revocations in the PCB extensions, otherwise an empty dict.
+        revocations in the PCB extensions, otherwise an empty dict. The dict
+        is shared by all callers, and must not be modified.
         """
+        return self._get_derived("rev_map", self._calc_rev_map)
+
+    def _calc_rev_map(self):
         result = {}
         for rev_info in self.iter_rev_infos():
             key = (rev_info.isd_as(), rev_info.p.ifID)
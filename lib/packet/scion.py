@@ -27,8 +27,8 @@ import proto.scion_capnp as P
 from lib.defines import MAX_HOPBYHOP_EXT, SCION_PROTO_VERSION
 from lib.errors import SCIONIndexError, SCIONParseError
 from lib.packet.cert_mgmt import parse_certmgmt_payload
-from lib.packet.ext_hdr import ExtensionHeader
-from lib.packet.ext_util import parse_extensions
+from lib.packet.ext_hdr import EXT_SUBHDR, ExtensionHeader
+from lib.packet.ext_util import ExtensionList, parse_extensions
 from lib.packet.host_addr import HostAddrInvalidType, haddr_get_type
 from lib.packet.ifid import parse_ifid_payload
 from lib.packet.opaque_field import OpaqueField
@@ -70,6 +70,10 @@ from lib.util import Raw, calc_padding
 
 from nagini_contracts.contracts import *
 
+#: Common header: version/address types(2B), total length(2B), IOF/HOF
+#: offsets(2 * 1B), next header(1B), header length(1B).
+_CMN_HDR = struct.Struct("!HHBBBB")
+
 
 class SCIONCommonHdr(Serializable):
     """
@@ -77,6 +81,8 @@ class SCIONCommonHdr(Serializable):
     """
     NAME = "SCIONCommonHdr"
     LEN = 8
+    __slots__ = ("version", "src_addr_type", "dst_addr_type", "addrs_len",
+                 "total_len", "_iof_idx", "_hof_idx", "next_hdr", "hdr_len")
 
     def __init__(self, raw=None):  # pragma: no cover
         self.version = 0  # Version of SCION packet.
@@ -96,7 +102,7 @@ class SCIONCommonHdr(Serializable):
         """
         data = Raw(raw, self.NAME, self.LEN)
         (types, self.total_len, curr_iof_p, curr_hof_p,
-         self.next_hdr, self.hdr_len) = struct.unpack("!HHBBBB", data.pop())
+         self.next_hdr, self.hdr_len) = data.pop_struct(_CMN_HDR)
         self.version = types >> 12
         if self.version != SCION_PROTO_VERSION:
             raise SCMPBadVersion("Unsupported SCION version: %s" % self.version)
@@ -134,20 +140,22 @@ class SCIONCommonHdr(Serializable):
         return inst
 
     def pack(self):
-        packed = []
+        return _CMN_HDR.pack(*self._pack_fields())
+
+    def pack_into(self, buf, offset=0):
+        _CMN_HDR.pack_into(buf, offset, *self._pack_fields())
+        return offset + self.LEN
+
+    def _pack_fields(self):
         types = ((self.version << 12) | (self.src_addr_type << 6) |
                  self.dst_addr_type)
-        packed.append(struct.pack("!HH", types, self.total_len))
         curr_iof_p = curr_hof_p = self.LEN + self.addrs_len
         if self._iof_idx:
             curr_iof_p += self._iof_idx * OpaqueField.LEN
         if self._hof_idx:
             curr_hof_p += self._hof_idx * OpaqueField.LEN
-        packed.append(struct.pack("!BB", curr_iof_p, curr_hof_p))
-        packed.append(struct.pack("!BB", self.next_hdr, self.hdr_len))
-        raw = b"".join(packed)
-        assert len(raw) == self.LEN
-        return raw
+        return (types, self.total_len, curr_iof_p, curr_hof_p, self.next_hdr,
+                self.hdr_len)
 
     def validate(self, pkt_len, path_len):
         if pkt_len != self.total_len:
@@ -194,6 +202,7 @@ class SCIONAddrHdr(Serializable):
     """SCION Address header."""
     NAME = "SCIONAddrHdr"
     BLK_SIZE = 8
+    __slots__ = ("src", "dst", "_pad_len", "_total_len")
 
     def __init__(self, raw_values=()):  # pragma: no cover
         """
@@ -231,14 +240,21 @@ class SCIONAddrHdr(Serializable):
 
     def pack(self) -> bytes:
         self.update()
-        packed = []
-        packed.append(self.src.pack())
-        packed.append(self.dst.pack())
-        packed.append(bytes(self._pad_len))
-        raw = b"".join(packed)
-        assert len(raw) % self.BLK_SIZE == 0
-        assert len(raw) == self._total_len
-        return raw
+        buf = bytearray(self._total_len)
+        self._pack_into(buf, 0)
+        return bytes(buf)
+
+    def pack_into(self, buf, offset=0):
+        self.update()
+        return self._pack_into(buf, offset)
+
+    def _pack_into(self, buf, offset):
+        end = offset + self._total_len
+        offset = self.src.pack_into(buf, offset)
+        offset = self.dst.pack_into(buf, offset)
+        assert offset + self._pad_len == end
+        buf[offset:end] = bytes(self._pad_len)
+        return end
 
     def validate(self):  # pragma: no cover
         if self.dst.host.TYPE == AddrType.SVC:
@@ -357,23 +373,58 @@ class SCIONBasePacket(PacketBase):
         self.path = path_hdr
 
     def pack(self) -> bytes:
+        pld = self._prepare_pack()
+        buf = bytearray(self.cmn_hdr.total_len)
+        self._pack_into(buf, 0, pld)
+        return bytes(buf)
+
+    def pack_into(self, buf, offset=0):
+        """
+        Pack the packet into a preallocated buffer, e.g. one that is reused for
+        every packet sent.
+
+        :param bytearray buf:
+            buffer to pack into. It must have room for the whole packet after
+            `offset`.
+        :param int offset: offset in `buf` to pack at.
+        :returns: the offset in `buf` following the packed packet.
+        """
+        pld = self._prepare_pack()
+        assert len(buf) - offset >= self.cmn_hdr.total_len, \
+            "Buffer too small (%dB) for packet (%dB)" % (
+                len(buf) - offset, self.cmn_hdr.total_len)
+        return self._pack_into(buf, offset, pld)
+
+    def _prepare_pack(self):
+        """
+        Update the headers, including the total length of the packet, so that
+        it is known before anything gets packed.
+
+        :returns: the packed payload, to pass to :meth:`_pack_into`.
+        """
         self.update()
-        packed = []
-        inner = self._inner_pack()
-        self.cmn_hdr.total_len = self.cmn_hdr.hdr_len + len(inner)
-        packed.append(self.cmn_hdr.pack())
-        packed.append(self.addrs.pack())
-        packed.append(self.path.pack())
-        packed.append(inner)
-        raw = b"".join(packed)
-        assert len(raw) == self.cmn_hdr.total_len
-        return raw
-
-    def _inner_pack(self):  # pragma: no cover
-        return b""
+        pld = self._pack_payload()
+        self.cmn_hdr.total_len = self.cmn_hdr.hdr_len + self._inner_len(pld)
+        return pld
+
+    def _pack_into(self, buf, offset, pld):
+        start = offset
+        offset = self.cmn_hdr.pack_into(buf, offset)
+        offset = self.addrs.pack_into(buf, offset)
+        offset = self.path.pack_into(buf, offset)
+        offset = self._inner_pack_into(buf, offset, pld)
+        assert offset - start == self.cmn_hdr.total_len
+        return offset
+
+    def _inner_len(self, pld):  # pragma: no cover
+        return 0
+
+    def _inner_pack_into(self, buf, offset, pld):  # pragma: no cover
+        return offset
 
     def _pack_payload(self):  # pragma: no cover
-        return self._payload.pack_full()
+        # The payload is only packed as part of L4 packets.
+        return b""
 
     def validate(self, pkt_len):
         """Called after parsing, to check for errors that don't break parsing"""
@@ -419,10 +470,21 @@ class SCIONBasePacket(PacketBase):
         self.path.reverse()
 
     def reversed_copy(self):  # pragma: no cover
-        inst = copy.deepcopy(self)
+        inst = copy.copy(self)
+        inst._copy_hdrs()
         inst.reverse()
         return inst
 
+    def _copy_hdrs(self):
+        """
+        Give a shallow copy of a packet copies of the headers, so that they
+        can be modified without affecting the original packet. The opaque
+        fields of the path, and the payload, are shared.
+        """
+        self.cmn_hdr = copy.copy(self.cmn_hdr)
+        self.addrs = copy.copy(self.addrs)
+        self.path = self.path.copy()
+
     def convert_to_scmp_error(self, addr, class_, type_, pkt, *args,
                               hopbyhop=False, **kwargs):
         self.addrs.src = addr
@@ -476,7 +538,7 @@ class SCIONExtPacket(SCIONBasePacket):
     NAME = "SCIONExtPacket"
 
     def __init__(self, raw=None):  # pragma: no cover
-        self.ext_hdrs = []  # type: List[Union[SCMPExt, SibraExtBase]]
+        self.ext_hdrs = ExtensionList()  # type: ExtensionList
         self._unknown_exts = {}
         super().__init__(raw)
 
@@ -500,33 +562,53 @@ class SCIONExtPacket(SCIONBasePacket):
             self.ext_hdrs.append(hdr)
 
     def pack_exts(self):
-        packed = []
-        max_idx = len(self.ext_hdrs) - 1
-        for i, hdr in enumerate(self.ext_hdrs):
-            ext_packed = []
+        buf = bytearray(self._exts_len())
+        self._pack_exts_into(buf, 0)
+        return bytes(buf)
+
+    def _ext_entries(self):
+        """
+        The extension headers, leaving those which haven't been parsed as
+        :class:`lib.packet.ext_util.RawExtension`.
+        """
+        if isinstance(self.ext_hdrs, ExtensionList):
+            return self.ext_hdrs.entries
+        return self.ext_hdrs
+
+    def _pack_exts_into(self, buf, offset):
+        ext_hdrs = self._ext_entries()
+        max_idx = len(ext_hdrs) - 1
+        for i, hdr in enumerate(ext_hdrs):
             next_hdr = self._l4_proto
             if i < max_idx:
-                next_hdr = self.ext_hdrs[i+1].EXT_CLASS
-            ext_packed.append(struct.pack("!BBB", next_hdr, hdr.hdr_len(),
-                                          hdr.EXT_TYPE))
-            ext_packed.append(hdr.pack())
-            ext = b"".join(ext_packed)
-            assert len(ext) % ExtensionHeader.LINE_LEN == 0
-            packed.append(ext)
-        return b"".join(packed)
-
-    def _inner_pack(self):
-        return super()._inner_pack() + self.pack_exts()
-
-    def _get_offset_len(self):
-        l = super()._get_offset_len()
-        for hdr in self.ext_hdrs:
+                next_hdr = ext_hdrs[i+1].EXT_CLASS
+            start = offset
+            EXT_SUBHDR.pack_into(buf, offset, next_hdr, hdr.hdr_len(),
+                                 hdr.EXT_TYPE)
+            offset = hdr.pack_into(buf, offset + EXT_SUBHDR.size)
+            assert (offset - start) % ExtensionHeader.LINE_LEN == 0
+        return offset
+
+    def _exts_len(self):
+        l = 0
+        for hdr in self._ext_entries():
             l += len(hdr)
         return l
 
+    def _inner_len(self, pld):
+        return super()._inner_len(pld) + self._exts_len()
+
+    def _inner_pack_into(self, buf, offset, pld):
+        offset = super()._inner_pack_into(buf, offset, pld)
+        return self._pack_exts_into(buf, offset)
+
+    def _get_offset_len(self):
+        return super()._get_offset_len() + self._exts_len()
+
     def _get_next_hdr(self):
-        if self.ext_hdrs:
-            return self.ext_hdrs[0].EXT_CLASS
+        ext_hdrs = self._ext_entries()
+        if ext_hdrs:
+            return ext_hdrs[0].EXT_CLASS
         else:
             return self._l4_proto
 
@@ -555,6 +637,11 @@ class SCIONExtPacket(SCIONBasePacket):
             hdr.reverse()
         super().reverse()
 
+    def _copy_hdrs(self):  # pragma: no cover
+        super()._copy_hdrs()
+        self.ext_hdrs = copy.deepcopy(self.ext_hdrs)
+        self._unknown_exts = self._unknown_exts.copy()
+
 
 class SCIONL4Packet(SCIONExtPacket):
     """
@@ -589,18 +676,22 @@ class SCIONL4Packet(SCIONExtPacket):
         self.l4_hdr = l4_hdr
         self._l4_proto = l4_hdr.TYPE
 
-    def _inner_pack(self):
-        self.update()
-        packed = [super()._inner_pack()]
-        pld = super()._pack_payload()
+    def _pack_payload(self):  # pragma: no cover
+        return self._payload.pack_full()
+
+    def _inner_len(self, pld):
+        l = super()._inner_len(pld)
         if self.l4_hdr:
-            packed.append(self.l4_hdr.pack(pld))
-        packed.append(pld)
-        return b"".join(packed)
+            l += self.l4_hdr.LEN
+        return l + len(pld)
 
-    def _pack_payload(self):  # pragma: no cover
-        # Payload is already packed and included as part of _inner_pack
-        return b""
+    def _inner_pack_into(self, buf, offset, pld):
+        offset = super()._inner_pack_into(buf, offset, pld)
+        if self.l4_hdr:
+            offset = self.l4_hdr.pack_into(buf, offset, pld)
+        end = offset + len(pld)
+        buf[offset:end] = pld
+        return end
 
     def validate(self, pkt_len):  # pragma: no cover
         super().validate(pkt_len)
@@ -618,6 +709,10 @@ class SCIONL4Packet(SCIONExtPacket):
             self.l4_hdr.reverse()
         super().reverse()
 
+    def _copy_hdrs(self):  # pragma: no cover
+        super()._copy_hdrs()
+        self.l4_hdr = copy.copy(self.l4_hdr)
+
     def parse_payload(self):
         data = Raw(self._payload.pack(), "SCIONL4Packet.parse_payload")
         if not self.l4_hdr:
@@ -664,7 +759,7 @@ def build_base_hdrs(src, dst, l4=L4Proto.UDP):
 
 def msg_from_raw(raw):
     try:
-        wrapper = P.SCION.from_bytes_packed(raw).as_builder()
+        wrapper = P.SCION.from_bytes_packed(raw)
     except capnp.lib.capnp.KjException as e:
         raise SCIONParseError(
             "Unable to parse SCION capnp message: %s" % e) from None
@@ -679,4 +774,24 @@ def msg_from_raw(raw):
     handler = class_map.get(pld_class)
     if not handler:
         raise SCIONParseError("Unsupported payload class: %s" % pld_class)
-    return handler(getattr(wrapper, pld_class))
+    pld = handler(getattr(wrapper, pld_class))
+    # Unless it gets modified, the payload is sent on exactly as received.
+    pld._raw_full = struct.pack("!I", len(raw)) + bytes(raw)
+    return pld
+
+
+def is_wellformed_packet(packet):  # pragma: no cover
+    """
+    Specification function used in contracts, whether `packet` can be parsed
+    into a :class:`SCIONL4Packet`. It is left abstract in
+    scion-stubs/lib/packet/scion.pyi, for the verifier. At runtime it only has
+    to exist, and does not parse `packet` again.
+    """
+    return True
+
+
+def packed(spkt):  # pragma: no cover
+    """
+    Specification function used in contracts, the packed form of `spkt`.
+    """
+    return spkt.pack()
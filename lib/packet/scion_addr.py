@@ -17,6 +17,7 @@
 """
 # Stdlib
 import struct
+import weakref
 
 # SCION
 from lib.errors import SCIONIndexError, SCIONParseError
@@ -27,73 +28,123 @@ from lib.packet.host_addr import (
 )
 from lib.util import Raw
 
+#: ISD (12 bits) and AS (20 bits).
+_ISD_AS = struct.Struct("!I")
+
 
 class ISD_AS(Serializable):
     """
     Class for representing isd-as pair.
+
+    Instances are immutable, and backed by the 32-bit integer representation
+    (see :meth:`int`). Equal ISD_AS objects are a single shared instance, so
+    creating one doesn't normally allocate, and they compare and hash as fast
+    as an int.
     """
     NAME = "ISD_AS"
     LEN = 4
+    __slots__ = ("_int", "__weakref__")
+    #: Live ISD_AS instances, by integer representation.
+    _interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, raw=None):
+        return cls._get(cls._parse(raw) if raw else 0)
+
+    def __init__(self, raw=None):  # pragma: no cover
+        # All the work is done by __new__.
+        pass
+
+    @classmethod
+    def _get(cls, isd_as):
+        """
+        Return the instance for the integer representation `isd_as`.
+        """
+        if cls is not ISD_AS:
+            # Subclasses aren't interned, as they'd otherwise be handed out for
+            # plain ISD_AS values.
+            return cls._new(isd_as)
+        inst = cls._interned.get(isd_as)
+        if inst is None:
+            inst = cls._interned.setdefault(isd_as, cls._new(isd_as))
+        return inst
 
-    def __init__(self, raw=None):
-        self._isd = 0
-        self._as = 0
-        super().__init__(raw)
+    @classmethod
+    def _new(cls, isd_as):
+        inst = object.__new__(cls)
+        object.__setattr__(inst, "_int", isd_as)
+        return inst
 
-    def _parse(self, raw):  # pragma: no cover
-        if isinstance(raw, bytes):
-            self._parse_bytes(raw)
-        elif isinstance(raw, int):
-            self._parse_int(raw)
+    @classmethod
+    def _parse(cls, raw):
+        """
+        :returns: the integer representation of `raw`.
+        """
+        if isinstance(raw, int):
+            return cls._parse_int(raw)
+        elif isinstance(raw, str):
+            return cls._parse_str(raw)
         else:
-            self._parse_str(raw)
+            return cls._parse_bytes(raw)
 
-    def _parse_bytes(self, raw):
+    @classmethod
+    def _parse_bytes(cls, raw):
         """
         :param bytes raw:
             a byte string containing ISD ID, AS ID. ISD and AS are respectively
             represented as 12 and 20 most significant bits.
         """
-        data = Raw(raw, self.NAME, self.LEN)
-        isd_as = struct.unpack("!I", data.pop())[0]
-        self._parse_int(isd_as)
+        data = Raw(raw, cls.NAME, cls.LEN)
+        return data.pop_struct(_ISD_AS)[0]
 
-    def _parse_str(self, raw):
+    @classmethod
+    def _parse_str(cls, raw):
         """
         :param str raw: a string of the format "isd-as".
         """
         isd, as_ = raw.split("-", 1)
         try:
-            self._isd = int(isd)
+            isd = int(isd)
         except ValueError:
             raise SCIONParseError("Unable to parse ISD from string: %s", raw)
         try:
-            self._as = int(as_)
+            as_ = int(as_)
         except ValueError:
             raise SCIONParseError("Unable to parse AS from string: %s", raw)
+        return cls._join(isd, as_)
 
-    def _parse_int(self, raw):
+    @classmethod
+    def _parse_int(cls, raw):
         """
         :param int raw: a 32bit int containing the ISD ID in the 12 MSBs and the
             AS ID in the remaining 20 bits.
         """
-        self._isd = raw >> 20
-        self._as = raw & 0x000fffff
+        return raw
+
+    @staticmethod
+    def _join(isd, as_):
+        return (isd << 20) | (as_ & 0x000fffff)
 
     @classmethod
     def from_values(cls, isd, as_):  # pragma: no cover
-        inst = cls()
-        inst._isd = isd
-        inst._as = as_
-        return inst
+        return cls._get(cls._join(isd, as_))
+
+    @property
+    def _isd(self):  # pragma: no cover
+        return self._int >> 20
+
+    @property
+    def _as(self):  # pragma: no cover
+        return self._int & 0x000fffff
 
     def pack(self):
-        return struct.pack("!I", self.int())
+        return _ISD_AS.pack(self._int)
+
+    def pack_into(self, buf, offset=0):  # pragma: no cover
+        _ISD_AS.pack_into(buf, offset, self._int)
+        return offset + self.LEN
 
-    def int(self):
-        isd_as = self._isd << 20
-        isd_as |= self._as & 0x000fffff
-        return isd_as
+    def int(self):  # pragma: no cover
+        return self._int
 
     def any_as(self):  # pragma: no cover
         return self.from_values(self._isd, 0)
@@ -105,8 +156,25 @@ class ISD_AS(Serializable):
         else:
             return {"%s_ia" % name: self}
 
+    def __setattr__(self, name, value):  # pragma: no cover
+        raise AttributeError("%s objects are immutable" % self.NAME)
+
+    def __delattr__(self, name):  # pragma: no cover
+        raise AttributeError("%s objects are immutable" % self.NAME)
+
+    def __copy__(self):  # pragma: no cover
+        return self
+
+    def __deepcopy__(self, memo):  # pragma: no cover
+        return self
+
+    def __reduce__(self):  # pragma: no cover
+        return type(self), (self._int,)
+
     def __eq__(self, other):  # pragma: no cover
-        return self._isd == other._isd and self._as == other._as
+        if isinstance(other, ISD_AS):
+            return self._int == other._int
+        return NotImplemented
 
     def __getitem__(self, idx):  # pragma: no cover
         if idx == 0:
@@ -118,7 +186,7 @@ class ISD_AS(Serializable):
                                   (self.NAME, idx)))
 
     def __int__(self):  # pragma: no cover
-        return self.int()
+        return self._int
 
     def __iter__(self):  # pragma: no cover
         yield self._isd
@@ -134,7 +202,7 @@ class ISD_AS(Serializable):
         return self.LEN
 
     def __hash__(self):  # pragma: no cover
-        return hash(str(self))
+        return hash(self._int)
 
 
 class SCIONAddr(object):
@@ -145,6 +213,8 @@ class SCIONAddr(object):
     :ivar HostAddrBase host: host address.
     :ivar int addr_len: address length.
     """
+    __slots__ = ("isd_as", "host")
+
     def __init__(self, addr_info=()):  # pragma: no cover
         """
         Initialize an instance of the class SCIONAddr.
@@ -192,6 +262,15 @@ class SCIONAddr(object):
         """
         return self.isd_as.pack() + self.host.pack()
 
+    def pack_into(self, buf, offset=0):  # pragma: no cover
+        """
+        Pack into a preallocated buffer.
+
+        :returns: the offset in `buf` following the packed address.
+        """
+        offset = self.isd_as.pack_into(buf, offset)
+        return self.host.pack_into(buf, offset)
+
     @classmethod
     def calc_len(cls, type_):  # pragma: no cover
         class_ = haddr_get_type(type_)
@@ -25,6 +25,7 @@ from lib.types import L4Proto
 
 class SCIONL4Unknown(L4HeaderBase):  # pragma: no cover
     NAME = "Unknown"
+    __slots__ = ()
 
     def __init__(self, proto):
         raise NotImplementedError
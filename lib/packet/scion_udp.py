@@ -18,17 +18,23 @@
 # Stdlib
 import struct
 
-# External
-import scapy.utils
-
 # SCION
 from lib.errors import SCIONChecksumFailed
+from lib.packet.checksum import (
+    ones_add,
+    ones_sum,
+    sum_to_checksum,
+    update_checksum,
+)
 from lib.packet.packet_base import L4HeaderBase
 from lib.packet.scion_addr import SCIONAddr
 from lib.packet.scmp.errors import SCMPBadPktLen
 from lib.util import Raw, hex_str
 from lib.types import L4Proto
 
+#: Src port(2B), Dst port(2B), Len(2B), Checksum(2B)
+_UDP_HDR = struct.Struct("!HHH2s")
+
 
 class SCIONUDPHeader(L4HeaderBase):
     """
@@ -38,6 +44,8 @@ class SCIONUDPHeader(L4HeaderBase):
     TYPE = L4Proto.UDP
     NAME = "SCIONUDPHeader"
     CHKSUM_LEN = 2
+    __slots__ = ("_src", "src_port", "_dst", "dst_port", "total_len",
+                 "_checksum", "_chk_cache")
 
     def __init__(self, raw=None):  # pragma: no cover
         """
@@ -52,6 +60,9 @@ class SCIONUDPHeader(L4HeaderBase):
         self.dst_port = None
         self.total_len = self.LEN
         self._checksum = b""
+        # (payload, payload offset, pseudo-header sum, checksum) of the last
+        # checksum computed over a `bytes` payload.
+        self._chk_cache = None
 
         if raw:
             src, dst, raw_hdr = raw
@@ -62,7 +73,7 @@ class SCIONUDPHeader(L4HeaderBase):
         self._src = src
         self._dst = dst
         self.src_port, self.dst_port, self.total_len, self._checksum = \
-            struct.unpack("!HHH2s", data.pop(self.LEN))
+            data.pop_struct(_UDP_HDR)
 
     @classmethod
     def from_values(cls, src, src_port, dst, dst_port):  # pragma: no cover
@@ -83,8 +94,13 @@ class SCIONUDPHeader(L4HeaderBase):
             self.dst_port = dst_port
 
     def _pack(self, checksum):  # pragma: no cover
-        return struct.pack("!HHH2s", self.src_port, self.dst_port,
+        return _UDP_HDR.pack(self.src_port, self.dst_port, self.total_len,
+                             checksum)
+
+    def _pack_into(self, buf, offset, checksum):  # pragma: no cover
+        _UDP_HDR.pack_into(buf, offset, self.src_port, self.dst_port,
                            self.total_len, checksum)
+        return offset + self.LEN
 
     def validate(self, payload):
         # Strip off udp header size.
@@ -108,16 +124,30 @@ class SCIONUDPHeader(L4HeaderBase):
             - Destination address
             - L4 protocol type (UDP)
             - UDP header, excluding checksum
+
+        If the payload is the same `bytes` object as for the last checksum
+        computed, that checksum is updated for the changes to the pseudo-header
+        instead (RFC 1624), so the payload isn't summed again. Mutable payloads
+        (e.g. `bytearray` or `memoryview`) are always summed.
         """
         assert isinstance(self._src, SCIONAddr)
         assert isinstance(self._dst, SCIONAddr)
-        pseudo_header = b"".join([
+        pseudo_header = (
             self._src.pack(), self._dst.pack(), struct.pack("!B", L4Proto.UDP),
-            self.pack(payload, checksum=bytes(2)), payload,
-        ])
-        chk_int = scapy.utils.checksum(pseudo_header)
-        # scapy's checksum always outputs in network-byte-order.
-        return struct.pack("H", chk_int)
+            self.pack(payload, checksum=bytes(2)),
+        )
+        hdr_sum = ones_sum(*pseudo_header)
+        offset = sum(map(len, pseudo_header))
+        cached = self._chk_cache
+        if cached and payload is cached[0] and offset % 2 == cached[1] % 2:
+            checksum = update_checksum(cached[3], cached[2], hdr_sum)
+        else:
+            pld_sum = ones_sum(payload, offset=offset)
+            checksum = sum_to_checksum(ones_add(hdr_sum, pld_sum))
+        self._chk_cache = None
+        if isinstance(payload, bytes):
+            self._chk_cache = payload, offset, hdr_sum, checksum
+        return checksum
 
     def reverse(self):
         self._src, self._dst = self._dst, self._src
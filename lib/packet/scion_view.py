@@ -0,0 +1,303 @@
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`scion_view` --- Read-only views of raw SCION packets
+==========================================================
+"""
+# Stdlib
+import struct
+
+# SCION
+from lib.defines import SCION_PROTO_VERSION
+from lib.errors import SCIONIndexError, SCIONParseError
+from lib.flagtypes import InfoOFFlags
+from lib.packet.opaque_field import (
+    HopOpaqueField,
+    InfoOpaqueField,
+    OpaqueField,
+)
+from lib.packet.scion import SCIONAddrHdr, SCIONCommonHdr
+from lib.packet.scion_addr import ISD_AS, SCIONAddr
+from lib.types import AddrType
+
+
+class SCIONPacketView(object):
+    """
+    View of a raw SCION packet, used by the router's forwarding fast path.
+
+    Only the common header is decoded when the view is created. The address
+    header and the opaque fields are decoded on first access, directly from the
+    underlying buffer, and nothing past the path is ever looked at. Packets that
+    need more than that (extensions, local delivery, SCMP errors) have to be
+    parsed into a full :any:`SCIONL4Packet` instead.
+
+    The only thing that can be changed through the view are the IOF/HOF
+    offsets in the common header (see :meth:`set_of_idxs`), which are patched
+    in place.
+    """
+    NAME = "SCIONPacketView"
+    MAX_SEGMENTS = 3
+    #: Offset of the IOF/HOF offset bytes in the common header.
+    OF_PTRS_OFFSET = 4
+
+    def __init__(self, raw):
+        """
+        :param raw: Raw packet.
+        :type raw: `bytes`, `bytearray` or `memoryview`.
+        """
+        self._raw = memoryview(raw)
+        self._dst_ia = None
+        self._segments = None
+        self._ofs = {}
+        self._parse_cmn_hdr()
+
+    def _parse_cmn_hdr(self):
+        if len(self._raw) < SCIONCommonHdr.LEN:
+            raise SCIONParseError(
+                "%s: packet too short for common header (%sB)" %
+                (self.NAME, len(self._raw)))
+        (types, self.total_len, self._iof_p, self._hof_p,
+         self.next_hdr, self.hdr_len) = struct.unpack_from(
+            "!HHBBBB", self._raw)
+        self.version = types >> 12
+        self.src_addr_type = (types & 0x0fc0) >> 6
+        self.dst_addr_type = types & 0x003f
+        self.addrs_len, _ = SCIONAddrHdr.calc_lens(
+            self.src_addr_type, self.dst_addr_type)
+        self._path_off = SCIONCommonHdr.LEN + self.addrs_len
+
+    def validate(self):
+        """
+        Check that the packet can be handled using only this view. This is
+        stricter than :any:`SCIONBasePacket.validate`; anything that fails here
+        should be handed to the full object model, which produces the relevant
+        SCMP errors.
+
+        :raises:
+            lib.errors.SCIONParseError: the view can't handle the packet.
+        """
+        if self.version != SCION_PROTO_VERSION:
+            raise SCIONParseError("%s: unsupported SCION version: %s" %
+                                  (self.NAME, self.version))
+        if self.total_len != len(self._raw):
+            raise SCIONParseError("%s: packet length mismatch" % self.NAME)
+        if AddrType.SVC in (self.src_addr_type, self.dst_addr_type):
+            raise SCIONParseError("%s: SVC address" % self.NAME)
+        if not self._path_off < self.hdr_len <= self.total_len:
+            raise SCIONParseError("%s: no path, or invalid header length" %
+                                  self.NAME)
+        for p in self._iof_p, self._hof_p:
+            if (p - self._path_off) % OpaqueField.LEN:
+                raise SCIONParseError("%s: unaligned OF offset" % self.NAME)
+        iof_idx, hof_idx = self.get_of_idxs()
+        for start, hops in self._get_segments():
+            if iof_idx == start:
+                if not start < hof_idx <= start + hops:
+                    raise SCIONParseError(
+                        "%s: HOF index outside current segment" % self.NAME)
+                return
+        raise SCIONParseError("%s: IOF index doesn't point to an IOF" %
+                              self.NAME)
+
+    def _get_segments(self):
+        """
+        Return a list of (IOF index, number of hops) tuples, one per segment.
+        """
+        if self._segments is not None:
+            return self._segments
+        n_ofs, rem = divmod(self.hdr_len - self._path_off, OpaqueField.LEN)
+        if rem:
+            raise SCIONParseError("%s: path length isn't a multiple of the "
+                                  "OF length" % self.NAME)
+        segments = []
+        idx = 0
+        while idx < n_ofs:
+            if len(segments) == self.MAX_SEGMENTS:
+                raise SCIONParseError("%s: too many segments" % self.NAME)
+            off = self._of_offset(idx)
+            flags, hops = self._raw[off], self._raw[off + OpaqueField.LEN - 1]
+            if flags & InfoOFFlags.PEER_SHORTCUT and not (
+                    flags & InfoOFFlags.SHORTCUT):
+                raise SCIONParseError("%s: peer flag set on non-shortcut IOF" %
+                                      self.NAME)
+            if (len(segments) == self.MAX_SEGMENTS - 1 and
+                    self.get_of(segments[0][0], InfoOpaqueField).shortcut):
+                raise SCIONParseError("%s: 3 segments in shortcut path" %
+                                      self.NAME)
+            segments.append((idx, hops))
+            idx += 1 + hops
+        if idx != n_ofs:
+            raise SCIONParseError("%s: last segment is truncated" % self.NAME)
+        self._segments = segments
+        return segments
+
+    def _of_offset(self, idx):
+        return self._path_off + idx * OpaqueField.LEN
+
+    def get_of(self, idx, type_):
+        """
+        Get the opaque field at `idx`, decoding it on first access.
+
+        :param int idx: Index of the OF in the path.
+        :param type\_:
+            :any:`InfoOpaqueField` or :any:`HopOpaqueField`.
+        :raises:
+            lib.errors.SCIONIndexError: if the index is out of range.
+        """
+        of = self._ofs.get(idx)
+        if of is not None:
+            return of
+        off = self._of_offset(idx)
+        if idx < 0 or off + OpaqueField.LEN > self.hdr_len:
+            raise SCIONIndexError("%s: OF index (%d) out of range" %
+                                  (self.NAME, idx))
+        of = type_(self._raw[off:off + OpaqueField.LEN].tobytes())
+        self._ofs[idx] = of
+        return of
+
+    def get_of_idxs(self):
+        """
+        Get current InfoOpaqueField and HopOpaqueField indexes.
+
+        :return: Tuple (int, int) of IOF index and HOF index, respectively.
+        """
+        return ((self._iof_p - self._path_off) // OpaqueField.LEN,
+                (self._hof_p - self._path_off) // OpaqueField.LEN)
+
+    def set_of_idxs(self, iof_idx, hof_idx):
+        """
+        Set current InfoOpaqueField and HopOpaqueField indexes, by rewriting
+        the offsets in the common header of the underlying buffer. If the view
+        was created from a read-only buffer (e.g. `bytes`), the packet is copied
+        into a `bytearray` first.
+        """
+        if self._raw.readonly:
+            self._raw = memoryview(bytearray(self._raw))
+        self._iof_p = self._of_offset(iof_idx)
+        self._hof_p = self._of_offset(hof_idx)
+        struct.pack_into("!BB", self._raw, self.OF_PTRS_OFFSET,
+                         self._iof_p, self._hof_p)
+
+    def next_of_idxs(self):
+        """
+        Calculate the IOF and HOF indexes that :any:`SCIONPath.inc_hof_idx`
+        would move to, without changing the packet.
+
+        :returns:
+            Tuple of (IOF index, HOF index, whether any VERIFY_ONLY HOFs were
+            skipped).
+        :raises:
+            lib.errors.SCIONIndexError: if the path runs out of HOFs.
+        """
+        iof_idx, hof_idx = self.get_of_idxs()
+        iof = self.get_iof()
+        skipped_verify_only = False
+        while True:
+            hof_idx += 1
+            if hof_idx - iof_idx > iof.hops:
+                # Switch to the next segment
+                iof_idx = hof_idx
+                iof = self.get_of(iof_idx, InfoOpaqueField)
+                continue
+            if not self.get_of(hof_idx, HopOpaqueField).verify_only:
+                break
+            skipped_verify_only = True
+        return iof_idx, hof_idx, skipped_verify_only
+
+    def get_iof(self):
+        """Get current :any:`InfoOpaqueField`."""
+        return self.get_of(self.get_of_idxs()[0], InfoOpaqueField)
+
+    def get_hof(self):
+        """Get current :any:`HopOpaqueField`."""
+        return self.get_of(self.get_of_idxs()[1], HopOpaqueField)
+
+    def get_hof_ver(self, ingress=True):
+        """
+        Return the :any:`HopOpaqueField` needed to verify the current HOF. This
+        mirrors :any:`SCIONPath.get_hof_ver`.
+        """
+        iof_idx, hof_idx = self.get_of_idxs()
+        iof = self.get_iof()
+        hof = self.get_hof()
+        if not hof.xover or (iof.shortcut and not iof.peer):
+            if (iof.up_flag and hof_idx == iof_idx + iof.hops) or (
+                    not iof.up_flag and hof_idx == iof_idx + 1):
+                return None
+            offset = 1 if iof.up_flag else -1
+        elif iof.peer:
+            offset = {(True, True): +2, (True, False): +1,
+                      (False, True): -1, (False, False): -2}[
+                          ingress, iof.up_flag]
+        else:
+            offset = {(True, True): None, (True, False): -1,
+                      (False, True): +1, (False, False): None}[
+                          ingress, iof.up_flag]
+            if offset is None:
+                return None
+        return self.get_of(hof_idx + offset, HopOpaqueField)
+
+    def get_fwd_if(self):
+        """Return the interface to forward the current packet to."""
+        hof = self.get_hof()
+        if self.get_iof().up_flag:
+            return hof.ingress_if
+        return hof.egress_if
+
+    def get_curr_if(self, ingress=True):
+        """
+        Return the current interface, depending on the direction of the
+        segment.
+        """
+        hof = self.get_hof()
+        if ingress == self.get_iof().up_flag:
+            return hof.egress_if
+        return hof.ingress_if
+
+    def is_on_last_segment(self):
+        hof_idx = self.get_of_idxs()[1]
+        return hof_idx > self._get_segments()[-1][0]
+
+    def get_dst(self):
+        """
+        Return the destination address as a tuple of (address type, packed
+        :any:`SCIONAddr`), without decoding it.
+        """
+        off = SCIONCommonHdr.LEN + SCIONAddr.calc_len(self.src_addr_type)
+        end = off + SCIONAddr.calc_len(self.dst_addr_type)
+        return self.dst_addr_type, self._raw[off:end].tobytes()
+
+    def get_dst_ia(self):
+        """Return the destination :any:`ISD_AS`."""
+        if self._dst_ia is None:
+            off = SCIONCommonHdr.LEN + SCIONAddr.calc_len(self.src_addr_type)
+            self._dst_ia = ISD_AS(self._raw[off:off + ISD_AS.LEN].tobytes())
+        return self._dst_ia
+
+    def get_raw(self):
+        """
+        Return the packet, including any changes made through the view.
+        """
+        return self._raw
+
+    def __len__(self):  # pragma: no cover
+        return len(self._raw)
+
+    def __str__(self):
+        iof_idx, hof_idx = self.get_of_idxs()
+        return ("%s(%dB): src type: %s, dst type: %s, IOF idx: %s, "
+                "HOF idx: %s, next hdr: %s, hdr len: %sB" % (
+                    self.NAME, len(self), self.src_addr_type,
+                    self.dst_addr_type, iof_idx, hof_idx, self.next_hdr,
+                    self.hdr_len))
@@ -35,6 +35,9 @@ class SCMPError(SCIONBaseError):
     # INFO = None  # type: None
     CLASS = None  # type: Optional[int]
     TYPE = None # type: Optional[int]
+    #: Whether the drop this error causes has been counted already, e.g. by
+    #: the handler that translated another error into it.
+    counted = False  # type: bool
 
 
 ############################
@@ -19,11 +19,14 @@
 import struct
 import time
 
-# External
-import scapy.utils
-
 # SCION
 from lib.errors import SCIONChecksumFailed
+from lib.packet.checksum import (
+    ones_add,
+    ones_sum,
+    sum_to_checksum,
+    update_checksum,
+)
 from lib.packet.packet_base import L4HeaderBase
 from lib.packet.scion_addr import SCIONAddr
 from lib.packet.scmp.errors import SCMPBadPktLen
@@ -32,16 +35,19 @@ from lib.packet.scmp.util import scmp_type_name
 from lib.types import L4Proto
 from lib.util import Raw, hex_str, iso_timestamp
 
+#: Class(2B), Type(2B), Len(2B), Checksum(2B), Timestamp(8B)
+_SCMP_HDR = struct.Struct("!HHH2sQ")
+
 
 class SCMPHeader(L4HeaderBase):
     """
     Encapsulates the SCMP Header for SCMP packets.
     """
     NAME = "SCMPHeader"
-    # Class(2B), Type(2B), Len(2B), Checksum(2B), Timestamp(8B)
-    STRUCT_FMT = "!HHH2sQ"
-    LEN = struct.calcsize(STRUCT_FMT)
+    LEN = _SCMP_HDR.size
     TYPE = L4Proto.SCMP
+    __slots__ = ("class_", "type", "total_len", "_checksum", "_chk_cache",
+                 "timestamp", "_src", "_dst")
 
     def __init__(self, raw=None):  # pragma: no cover
         """
@@ -55,6 +61,9 @@ class SCMPHeader(L4HeaderBase):
         self.type = None
         self.total_len = self.LEN
         self._checksum = b""
+        # (payload, payload offset, pseudo-header sum, checksum) of the last
+        # checksum computed over a `bytes` payload.
+        self._chk_cache = None
         self.timestamp = 0
         # Meta-data
         self._src = None
@@ -68,7 +77,7 @@ class SCMPHeader(L4HeaderBase):
         self._src = src
         self._dst = dst
         (self.class_, self.type, self.total_len, self._checksum,
-         self.timestamp) = struct.unpack(self.STRUCT_FMT, data.pop())
+         self.timestamp) = data.pop_struct(_SCMP_HDR)
 
     @classmethod
     def from_values(cls, src, dst, class_, type_):
@@ -92,8 +101,13 @@ class SCMPHeader(L4HeaderBase):
             self.type = type_
 
     def _pack(self, checksum):  # pragma: no cover
-        return struct.pack(self.STRUCT_FMT, self.class_, self.type,
-                           self.total_len, checksum, self.timestamp)
+        return _SCMP_HDR.pack(self.class_, self.type, self.total_len,
+                              checksum, self.timestamp)
+
+    def _pack_into(self, buf, offset, checksum):  # pragma: no cover
+        _SCMP_HDR.pack_into(buf, offset, self.class_, self.type,
+                            self.total_len, checksum, self.timestamp)
+        return offset + self.LEN
 
     def reverse(self):  # pragma: no cover
         pass
@@ -120,16 +134,30 @@ class SCMPHeader(L4HeaderBase):
             - Destination address
             - L4 protocol type (SCMP)
             - SCMP header, excluding checksum
+
+        If the payload is the same `bytes` object as for the last checksum
+        computed, that checksum is updated for the changes to the pseudo-header
+        instead (RFC 1624), so the payload isn't summed again. Mutable payloads
+        (e.g. `bytearray` or `memoryview`) are always summed.
         """
         assert isinstance(self._src, SCIONAddr)
         assert isinstance(self._dst, SCIONAddr)
-        pseudo_header = b"".join([
+        pseudo_header = (
             self._src.pack(), self._dst.pack(), struct.pack("!B", L4Proto.SCMP),
-            self.pack(payload, checksum=bytes(2)), payload,
-        ])
-        chk_int = scapy.utils.checksum(pseudo_header)
-        # scapy's checksum always outputs in network-byte-order.
-        return struct.pack("H", chk_int)
+            self.pack(payload, checksum=bytes(2)),
+        )
+        hdr_sum = ones_sum(*pseudo_header)
+        offset = sum(map(len, pseudo_header))
+        cached = self._chk_cache
+        if cached and payload is cached[0] and offset % 2 == cached[1] % 2:
+            checksum = update_checksum(cached[3], cached[2], hdr_sum)
+        else:
+            pld_sum = ones_sum(payload, offset=offset)
+            checksum = sum_to_checksum(ones_add(hdr_sum, pld_sum))
+        self._chk_cache = None
+        if isinstance(payload, bytes):
+            self._chk_cache = payload, offset, hdr_sum, checksum
+        return checksum
 
     def __len__(self):  # pragma: no cover
         return self.LEN
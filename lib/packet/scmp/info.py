@@ -212,7 +212,7 @@ class SCMPInfoRevocation(SCMPInfoPathOffsets):
     def _parse(self, raw):
         data = Raw(raw, self.NAME)
         self._set_vals(struct.unpack(self.STRUCT_FMT, data.pop(self.LEN)))
-        self.rev_info = data.pop()
+        self.rev_info = bytes(data.pop())
 
     def pack(self):  # pragma: no cover
         assert isinstance(self.rev_info, bytes)
@@ -66,15 +66,14 @@ class SCMPPayload(PayloadBase):
     def _parse(self, class_, type_, raw):
         data = Raw(raw, self.NAME)
         (info_len, cmn_hdr_len, addrs_len, path_len, exts_len, l4_len,
-         self.l4_proto) = struct.unpack(
-             self.STRUCT_FMT, data.pop(self.META_LEN))
+         self.l4_proto) = data.pop_struct(self.STRUCT_FMT)
         self.info = parse_scmp_info(class_, type_,
                                     data.pop(info_len * LINE_LEN))
-        self._cmn_hdr = data.pop(cmn_hdr_len * LINE_LEN)
-        self._addrs = data.pop(addrs_len * LINE_LEN)
-        self._path = data.pop(path_len * LINE_LEN)
-        self._exts = data.pop(exts_len * LINE_LEN)
-        self._l4_hdr = data.pop(l4_len * LINE_LEN)
+        self._cmn_hdr = bytes(data.pop(cmn_hdr_len * LINE_LEN))
+        self._addrs = bytes(data.pop(addrs_len * LINE_LEN))
+        self._path = bytes(data.pop(path_len * LINE_LEN))
+        self._exts = bytes(data.pop(exts_len * LINE_LEN))
+        self._l4_hdr = bytes(data.pop(l4_len * LINE_LEN))
 
     @classmethod
     def from_values(cls, info=None, cmn_hdr=b"", addrs=b"", path=b"", exts=b"",
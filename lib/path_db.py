@@ -16,14 +16,16 @@
 ================================
 """
 # Stdlib
+import heapq
 import logging
+import sqlite3
 import threading
-
-# External packages
-from pydblite.pydblite import Base
+from itertools import count
 
 # SCION
+from lib.log import Lazy
 from lib.packet.pcb import PathSegment
+from lib.packet.scion_addr import ISD_AS
 from lib.util import SCIONTime
 
 
@@ -54,6 +56,35 @@ class PathSegmentDBRecord(object):
         self.fidelity = pcb.get_n_hops()
         self.exp_time = min(pcb.get_expiration_time(), exp_time)
 
+    @classmethod
+    def from_snapshot(cls, id_, fidelity, exp_time, raw):
+        """
+        Create a record from the values stored in a
+        :class:`PathSegmentDBSnapshot`. The PCB is only parsed from `raw` when
+        it is first accessed.
+        """
+        inst = cls.__new__(cls)
+        inst._pcb = None
+        inst._raw = raw
+        inst.id = id_
+        inst.fidelity = fidelity
+        inst.exp_time = exp_time
+        return inst
+
+    @property
+    def pcb(self):
+        if self._pcb is None:
+            self.pcb = PathSegment.from_raw(self._raw)
+        return self._pcb
+
+    @pcb.setter
+    def pcb(self, pcb):
+        # Records are read for as long as they are stored, so they must not
+        # keep a reader (see Cerealizable.detach).
+        pcb.detach()
+        self._pcb = pcb
+        self._raw = None
+
     def __eq__(self, other):  # pragma: no cover
         if type(other) is type(self):
             return self.id == other.id
@@ -64,8 +95,115 @@ class PathSegmentDBRecord(object):
         return self.id
 
 
+class PathSegmentDBSnapshot(object):
+    """
+    On-disk snapshot of a :class:`PathSegmentDB`, kept in an SQLite file.
+    Changes are written as they are made, so that the snapshot is always
+    current. Write errors are logged, and otherwise ignored: the snapshot
+    only serves to speed up restarts.
+    """
+    #: Max size of the memory map used to access the file (in bytes).
+    MMAP_SIZE = 64 * 1024 * 1024
+
+    def __init__(self, path):
+        """
+        :param str path: path of the SQLite file, which is created if needed.
+        :raises sqlite3.Error: if the file can't be opened.
+        """
+        self._path = path
+        self._conn = sqlite3.connect(path, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA mmap_size=%d" % self.MMAP_SIZE)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS segments ("
+            "id BLOB NOT NULL, sibra INTEGER NOT NULL, "
+            "first_ia INTEGER NOT NULL, last_ia INTEGER NOT NULL, "
+            "fidelity INTEGER NOT NULL, exp_time INTEGER NOT NULL, "
+            "pcb BLOB NOT NULL, PRIMARY KEY (id, sibra))")
+
+    def load(self, now):
+        """
+        Drop the segments which expired before `now` from the snapshot, and
+        return the (record, fields) of the remaining ones. The PCBs are only
+        parsed when first accessed (see
+        :meth:`PathSegmentDBRecord.from_snapshot`).
+
+        :raises sqlite3.Error: if the file can't be read.
+        """
+        self._conn.execute("DELETE FROM segments WHERE exp_time < ?", (now,))
+        rows = self._conn.execute(
+            "SELECT id, sibra, first_ia, last_ia, fidelity, exp_time, pcb "
+            "FROM segments")
+        ret = []
+        for id_, sibra, first_ia, last_ia, fidelity, exp_time, raw in rows:
+            first_ia = ISD_AS(first_ia)
+            last_ia = ISD_AS(last_ia)
+            record = PathSegmentDBRecord.from_snapshot(
+                id_, fidelity, exp_time, raw)
+            ret.append((record, {
+                "first_ia": first_ia, "last_ia": last_ia,
+                "first_isd": first_ia[0], "last_isd": last_ia[0],
+                "sibra": bool(sibra),
+            }))
+        return ret
+
+    def put(self, record, fields):
+        """Add or replace the row of `record`."""
+        self._write(
+            "INSERT OR REPLACE INTO segments VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (record.id, fields["sibra"], fields["first_ia"].int(),
+             fields["last_ia"].int(), record.fidelity, record.exp_time,
+             record.pcb.pack()))
+
+    def delete(self, segment_id):
+        self._write("DELETE FROM segments WHERE id = ?", (segment_id,))
+
+    def expire(self, now):
+        self._write("DELETE FROM segments WHERE exp_time < ?", (now,))
+
+    def _write(self, sql, params):
+        try:
+            self._conn.execute(sql, params)
+        except sqlite3.Error as e:
+            logging.error("Unable to update segment snapshot %s: %s",
+                          self._path, e)
+
+
 class PathSegmentDB(object):
-    """Simple database for paths using PyDBLite"""
+    """
+    Simple in-memory database for paths.
+
+    Records are keyed by (segment ID, SIBRA flag), and indexed by the
+    fields that queries select by (see :meth:`__call__`).
+
+    Expired records are found through a min-heap of expiration times, and
+    removed by :meth:`expire`, which is called periodically by the owner of
+    the database. Until then, queries skip them, and updates replace them.
+    When the expiration time of a record changes, a new heap entry is pushed,
+    and the old one is skipped once it comes up.
+
+    The database can be kept on disk, to survive restarts (see
+    :meth:`persist`).
+    """
+    #: Fields that can be selected by.
+    FIELDS = ("first_ia", "last_ia", "first_isd", "last_isd", "sibra")
+    #: Indexes, most selective first. Queries use the first index that only
+    #: contains fields they select by, and filter by the remaining ones.
+    INDEXES = (
+        ("first_ia", "last_ia", "sibra"),
+        ("first_ia", "sibra"),
+        ("last_ia", "sibra"),
+        ("first_isd", "last_isd", "sibra"),
+        ("first_isd", "sibra"),
+        ("last_isd", "sibra"),
+        ("sibra",),
+    )
+    #: Number of outdated heap entries tolerated beyond the number of
+    #: records, before the heap gets rebuilt.
+    HEAP_SLACK = 64
+
     def __init__(self, segment_ttl=None, max_res_no=None):  # pragma: no cover
         """
         :param int segment_ttl:
@@ -73,12 +211,12 @@ class PathSegmentDB(object):
             the segment's expiration time.
         :param int max_res_no: Number of results returned for a query.
         """
-        self._db = Base("", save_to_file=False)
-        self._db.create('record', 'id', 'first_isd', 'first_as', 'last_isd',
-                        'last_as', 'sibra', mode='override')
-        self._db.create_index('id')
-        self._db.create_index('last_isd')
-        self._db.create_index('last_as')
+        self._entries = {}  # (id, sibra) -> (record, fields)
+        # Index fields -> index key -> dict of (id, sibra) (as ordered set)
+        self._indexes = {names: {} for names in self.INDEXES}
+        self._exp_heap = []  # (exp_time, seq no, (id, sibra))
+        self._exp_seq = count()
+        self._snapshot = None
         self._lock = threading.Lock()
         self._segment_ttl = segment_ttl
         self._max_res_no = max_res_no
@@ -86,15 +224,14 @@ class PathSegmentDB(object):
     def __getitem__(self, seg_id):  # pragma: no cover
         """Return a path object by segment id."""
         with self._lock:
-            recs = self._db(id=seg_id)
-        if recs:
-            return recs[0]['record'].pcb
+            for sibra in False, True:
+                entry = self._entries.get((seg_id, sibra))
+                if entry:
+                    return entry[0].pcb
         return None
 
     def __contains__(self, seg_id):  # pragma: no cover
-        with self._lock:
-            recs = self._db(id=seg_id)
-        return len(recs) > 0
+        return self[seg_id] is not None
 
     def update(self, pcb, reverse=False):
         """
@@ -110,35 +247,140 @@ class PathSegmentDB(object):
             record = PathSegmentDBRecord(pcb, now + self._segment_ttl)
         else:
             record = PathSegmentDBRecord(pcb)
+        sibra = pcb.is_sibra()
+        key = record.id, sibra
         with self._lock:
-            recs = self._db(id=record.id, sibra=pcb.is_sibra())
-            assert len(recs) <= 1, "PathDB contains > 1 path with the same ID"
-            if not recs:
-                self._db.insert(
-                    record, record.id, first_ia[0], first_ia[1],
-                    last_ia[0], last_ia[1], pcb.is_sibra())
+            entry = self._entries.get(key)
+            if entry and entry[0].exp_time < int(SCIONTime.get_time()):
+                # Not reaped yet.
+                self._remove(key)
+                entry = None
+            if not entry:
+                fields = {
+                    "first_ia": first_ia, "last_ia": last_ia,
+                    "first_isd": first_ia[0], "last_isd": last_ia[0],
+                    "sibra": sibra,
+                }
+                self._add(key, record, fields)
+                if self._snapshot:
+                    self._snapshot.put(record, fields)
                 logging.debug("Added segment from %s to %s: %s",
-                              first_ia, last_ia, pcb.short_desc())
+                              first_ia, last_ia, Lazy(pcb.short_desc))
                 return DBResult.ENTRY_ADDED
-            cur_rec = recs[0]['record']
+            cur_rec = entry[0]
             if pcb.get_expiration_time() < cur_rec.pcb.get_expiration_time():
                 return DBResult.NONE
             cur_rec.pcb = pcb
+            old_exp_time = cur_rec.exp_time
             if self._segment_ttl:
                 cur_rec.exp_time = now + self._segment_ttl
             else:
                 cur_rec.exp_time = pcb.get_expiration_time()
+            if cur_rec.exp_time != old_exp_time:
+                self._push_exp(key, cur_rec.exp_time)
+            if self._snapshot:
+                self._snapshot.put(cur_rec, entry[1])
             return DBResult.ENTRY_UPDATED
 
+    def _add(self, key, record, fields):
+        self._entries[key] = record, fields
+        self._push_exp(key, record.exp_time)
+        for names in self.INDEXES:
+            idx_key = tuple(fields[name] for name in names)
+            self._indexes[names].setdefault(idx_key, {})[key] = None
+
+    def _remove(self, key):
+        _, fields = self._entries.pop(key)
+        for names in self.INDEXES:
+            index = self._indexes[names]
+            idx_key = tuple(fields[name] for name in names)
+            bucket = index[idx_key]
+            del bucket[key]
+            if not bucket:
+                del index[idx_key]
+
+    def _push_exp(self, key, exp_time):
+        heapq.heappush(self._exp_heap, (exp_time, next(self._exp_seq), key))
+        if len(self._exp_heap) > 2 * len(self._entries) + self.HEAP_SLACK:
+            self._rebuild_exp_heap()
+
+    def _rebuild_exp_heap(self):
+        """Drop outdated entries from the expiration heap."""
+        self._exp_heap = [(record.exp_time, next(self._exp_seq), key)
+                          for key, (record, _) in self._entries.items()]
+        heapq.heapify(self._exp_heap)
+
+    def expire(self):
+        """
+        Remove expired segments from the db.
+
+        :returns: The number of removed segments.
+        :rtype: int
+        """
+        with self._lock:
+            return self._expire(int(SCIONTime.get_time()))
+
+    def _expire(self, now):
+        removed = 0
+        heap = self._exp_heap
+        while heap and heap[0][0] < now:
+            _, _, key = heapq.heappop(heap)
+            entry = self._entries.get(key)
+            # Skip entries of deleted records, and outdated entries of
+            # records which have been updated since.
+            if not entry or entry[0].exp_time >= now:
+                continue
+            self._remove(key)
+            removed += 1
+            logging.debug("Path-Segment expired: %s",
+                          Lazy(entry[0].pcb.short_desc))
+        if removed and self._snapshot:
+            self._snapshot.expire(now)
+        return removed
+
     def delete(self, segment_id):
         """Deletes a path segment with a given ID."""
+        deleted = False
         with self._lock:
-            recs = self._db(id=segment_id)
-            if not recs:
-                return DBResult.NONE
-            self._db.delete(recs)
+            for sibra in False, True:
+                if (segment_id, sibra) in self._entries:
+                    self._remove((segment_id, sibra))
+                    deleted = True
+            if deleted and self._snapshot:
+                self._snapshot.delete(segment_id)
+        if not deleted:
+            return DBResult.NONE
         return DBResult.ENTRY_DELETED
 
+    def persist(self, path):
+        """
+        Keep a snapshot of the database in the SQLite file at `path`. The
+        segments of an existing snapshot which haven't expired yet are loaded
+        first, and every later change is written through to the snapshot.
+        If the file can't be used, the database carries on without it.
+
+        :param str path: path of the snapshot file.
+        """
+        with self._lock:
+            try:
+                snapshot = PathSegmentDBSnapshot(path)
+                loaded = snapshot.load(int(SCIONTime.get_time()))
+            except sqlite3.Error as e:
+                logging.error("Unable to load segment snapshot %s: %s",
+                              path, e)
+                return
+            # Segments added before the snapshot was enabled take precedence.
+            for key, (record, fields) in self._entries.items():
+                snapshot.put(record, fields)
+            added = 0
+            for record, fields in loaded:
+                key = record.id, fields["sibra"]
+                if key not in self._entries:
+                    self._add(key, record, fields)
+                    added += 1
+            self._snapshot = snapshot
+        logging.info("Loaded %d segments from %s", added, path)
+
     def delete_all(self, segment_ids):
         """
         Deletes paths with the given IDs and returns the number of deletions.
@@ -153,9 +395,9 @@ class PathSegmentDB(object):
                 deletions += 1
         return deletions
 
-    def __call__(self, *args, full=False, **kwargs):
+    def __call__(self, *, full=False, **kwargs):
         """
-        Selection by field values.
+        Selection by field values (see :attr:`FIELDS`).
 
         Returns a sorted (path fidelity) list of paths according to the
         criterias specified.
@@ -164,47 +406,54 @@ class PathSegmentDB(object):
             Return list of results not bounded by self._max_res_no.
         """
         kwargs = self._parse_call_kwargs(kwargs)
+        now = int(SCIONTime.get_time())
         with self._lock:
-            recs = self._db(*args, **kwargs)
-            valid_recs = self._exp_call_records(recs)
-        return self._sort_call_pcbs(full, valid_recs)
-
-    def _parse_call_kwargs(self, kwargs):  # pragma: no cover
-        first_ia = kwargs.pop("first_ia", None)
-        if first_ia:
-            kwargs["first_isd"] = first_ia[0]
-            kwargs["first_as"] = first_ia[1]
-        last_ia = kwargs.pop("last_ia", None)
-        if last_ia:
-            kwargs["last_isd"] = last_ia[0]
-            kwargs["last_as"] = last_ia[1]
+            recs = [self._entries[key][0] for key in self._select(kwargs)]
+        recs = [rec for rec in recs if rec.exp_time >= now]
+        return self._sort_call_pcbs(full, recs)
+
+    def _parse_call_kwargs(self, kwargs):
+        # Callers pass None for fields they don't select by.
+        kwargs = {name: val for name, val in kwargs.items() if val is not None}
         if "sibra" not in kwargs:
             kwargs["sibra"] = False
         return kwargs
 
-    def _exp_call_records(self, recs):
-        """Remove expired segments from the db."""
-        now = int(SCIONTime.get_time())
+    def _select(self, kwargs):
+        """
+        Return the keys of the records matching all the field values in
+        `kwargs`.
+        """
+        for name in kwargs:
+            if name not in self.FIELDS:
+                raise KeyError("Unknown PathSegmentDB field: %s" % name)
+        for names in self.INDEXES:
+            if all(name in kwargs for name in names):
+                break
+        else:
+            names = ()
+        if names:
+            idx_key = tuple(kwargs[name] for name in names)
+            keys = self._indexes[names].get(idx_key, ())
+        else:
+            keys = self._entries
+        rest = [(name, val) for name, val in kwargs.items()
+                if name not in names]
+        if not rest:
+            return list(keys)
         ret = []
-        expired = []
-        for r in recs:
-            if r['record'].exp_time < now:
-                expired.append(r)
-                logging.debug("Path-Segment expired: %s",
-                              r['record'].pcb.short_desc())
-                continue
-            ret.append(r)
-        if expired:
-            self._db.delete(expired)
+        for key in keys:
+            fields = self._entries[key][1]
+            if all(fields[name] == val for name, val in rest):
+                ret.append(key)
         return ret
 
     def _sort_call_pcbs(self, full, valid_recs):  # pragma: no cover
-        seg_recs = sorted([r['record'] for r in valid_recs],
-                          key=lambda x: x.fidelity)
+        seg_recs = sorted(valid_recs, key=lambda x: x.fidelity)
         if self._max_res_no and not full:
             seg_recs = seg_recs[:self._max_res_no]
         return [r.pcb for r in seg_recs]
 
     def __len__(self):  # pragma: no cover
         with self._lock:
-            return len(self._db)
+            return len(self._entries)
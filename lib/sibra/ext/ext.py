@@ -165,8 +165,8 @@ class SibraExtBase(HopByHopExtension):
     def _parse_path_id(self, data, steady=True):  # pragma: no cover
         """Read a path ID."""
         if steady:
-            return data.pop(SIBRA_STEADY_ID_LEN)
-        return data.pop(SIBRA_EPHEMERAL_ID_LEN)
+            return bytes(data.pop(SIBRA_STEADY_ID_LEN))
+        return bytes(data.pop(SIBRA_EPHEMERAL_ID_LEN))
 
     def _parse_block(self, data, num_hops, steady=True):
         """Parse a reservation block."""
@@ -60,7 +60,7 @@ class SibraOpaqueField(Serializable):
         data = Raw(raw, self.NAME, self.LEN)
         self.ingress, self.egress = struct.unpack(
             "!HH", data.pop(self.IF_LEN * 2))
-        self.mac = data.pop(self.MAC_LEN)
+        self.mac = bytes(data.pop(self.MAC_LEN))
 
     @classmethod
     def from_values(cls, ingress, egress):  # pragma: no cover
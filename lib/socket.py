@@ -32,6 +32,7 @@ from socket import (
     SOCK_STREAM,
     SOL_SOCKET,
     SO_REUSEADDR,
+    SO_REUSEPORT,
     socket,
 )
 import threading
@@ -57,6 +58,7 @@ from lib.util import recv_all
 from lib.thread import kill_self
 from lib.types import AddrType
 from lib.util import hex_str
+from typing import Tuple
 
 
 class Socket(object):
@@ -90,11 +92,21 @@ class Socket(object):
         return True
 
 
+def udp_send(t_pre, data, dst_addr, dst_port, t_post=None):  # pragma: no cover
+    """
+    IO operation used in contracts, sending `data` to `dst_addr`:`dst_port`
+    over UDP. It is defined in scion-stubs/lib/socket.pyi for the verifier; at
+    runtime it only has to exist.
+    """
+    return True
+
+
 class UDPSocket(Socket):
     """
     Thin wrapper around BSD/POSIX UDP sockets.
     """
-    def __init__(self, bind=None, addr_type=AddrType.IPV6, reuse=False):
+    def __init__(self, bind=None, addr_type=AddrType.IPV6, reuse=False,
+                 reuse_port=False):
         """
         Initialize a UDP socket, then call superclass init for socket options
         and binding.
@@ -107,6 +119,10 @@ class UDPSocket(Socket):
             :const:`~lib.types.AddrType.IPV6` (default).
         :param reuse:
             Boolean value indicating whether SO_REUSEADDR option should be set.
+        :param reuse_port:
+            Boolean value indicating whether SO_REUSEPORT option should be set,
+            so that several processes can bind the same address and port, and
+            have the kernel spread incoming datagrams between them.
         """
         assert addr_type in (AddrType.IPV4, AddrType.IPV6)
         self._addr_type = addr_type
@@ -116,10 +132,15 @@ class UDPSocket(Socket):
         self.sock = socket(af_domain, SOCK_DGRAM)
         if reuse:
             self.sock.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
+        if reuse_port:
+            self.sock.setsockopt(SOL_SOCKET, SO_REUSEPORT, 1)
         self.port = None
         if bind:
             self.bind(*bind)
         self.active = True
+        self._batch = None
+        # Scratch buffer datagrams are received into, see _recvfrom().
+        self._recv_buf = bytearray(SCION_BUFLEN)
 
     def bind(self, addr, port=0, desc=None):
         """
@@ -152,6 +173,12 @@ class UDPSocket(Socket):
             Tuple of (`str`, `int`) describing the destination address and port,
             respectively.
         """
+        if self._batch is not None:
+            self._batch.append((data, dst))
+            return True
+        return self._send(data, dst)
+
+    def _send(self, data, dst):
         try:
             ret = self.sock.sendto(data, dst)
         except OSError as e:
@@ -172,18 +199,82 @@ class UDPSocket(Socket):
         Read data from socket.
 
         :returns:
-            Tuple of (`bytes`, (`str`, `int`) containing the data, and remote
-            host/port respectively.
+            Tuple of (`bytearray`, (`str`, `int`) containing the data, and
+            remote host/port respectively.
         """
         flags = 0
         if not block:
             flags = MSG_DONTWAIT
         while True:
             try:
-                return self.sock.recvfrom(SCION_BUFLEN, flags)
+                return self._recvfrom(flags)
             except InterruptedError:
                 pass
 
+    def _recvfrom(self, flags):
+        """
+        Receive a datagram into the scratch buffer, and return a writable copy
+        of just the datagram, so that the router can rewrite it in place.
+        (Receiving into a fresh `SCION_BUFLEN` buffer instead costs more than
+        the copy, as the whole buffer has to be zeroed first.)
+        """
+        n, addr = self.sock.recvfrom_into(self._recv_buf, SCION_BUFLEN, flags)
+        return self._recv_buf[:n], addr
+
+    def recv_batch(self, count, block=True):
+        """
+        Read up to `count` datagrams from the socket. Only the first read can
+        block, the rest of the batch is made up of whatever is already queued
+        on the socket.
+
+        :param int count: Maximum number of datagrams to read.
+        :returns:
+            List of (`bytearray`, (`str`, `int`)) tuples, as returned by
+            :meth:`recv`.
+        """
+        batch = []
+        flags = 0
+        if not block:
+            flags = MSG_DONTWAIT
+        while len(batch) < count:
+            try:
+                batch.append(self._recvfrom(flags))
+            except InterruptedError:
+                continue
+            except BlockingIOError:
+                break
+            flags = MSG_DONTWAIT
+        return batch
+
+    def start_batch(self):
+        """
+        Queue outgoing datagrams instead of sending them immediately, until
+        :meth:`flush_batch` is called.
+        """
+        if self._batch is None:
+            self._batch = []
+
+    def flush_batch(self):
+        """
+        Send all datagrams queued since :meth:`start_batch`, and go back to
+        sending immediately. As the senders of the queued datagrams have
+        already moved on, unreachable destinations are returned to the caller
+        instead of being raised, so that it can report them per datagram.
+
+        :returns:
+            List of (`bytes`, `tuple`, `SCMPError`) tuples, the datagrams that
+            could not be sent due to an unreachable destination, with the error
+            raised for them.
+        """
+        batch, self._batch = self._batch, None
+        unreachable = []
+        for data, dst in batch or ():
+            try:
+                self._send(data, dst)
+            except (SCMPUnreachHost, SCMPUnreachNet) as e:
+                unreachable.append((data, dst, e))
+        return unreachable
+
 
 class ReliableSocket(Socket):
     """
@@ -0,0 +1,236 @@
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`stats` --- Per-stage latency and drop statistics
+======================================================
+
+Stage latencies are collected by wrapping the methods implementing each stage
+with a timer on the element instance. The wrappers are only installed while
+collection is enabled, so a disabled :class:`ElementStats` costs nothing on the
+packet path. Drop counters are cheap enough to be kept all the time.
+
+Stats can be read, and collection switched on and off, through a local UNIX
+socket (see :meth:`ElementStats.serve`)::
+
+    echo show | socat - UNIX-CONNECT:<path>
+"""
+# Stdlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+
+# SCION
+from lib.thread import thread_safety_net
+
+#: Number of bits of precision kept by :class:`Histogram` buckets.
+HISTOGRAM_SUB_BUCKET_BITS = 4
+#: Max length of a command sent to the stats socket.
+STATS_CMD_LEN = 64
+#: Percentiles reported for each stage.
+STATS_PERCENTILES = (50, 90, 99, 99.9)
+
+
+class Histogram(object):
+    """
+    Log-linear histogram of non-negative integers, in the style of
+    HdrHistogram. Each power of 2 is split into 2**sub_bits buckets, so the
+    relative error of a reported value is below 2**-sub_bits.
+    """
+    def __init__(self, sub_bits=HISTOGRAM_SUB_BUCKET_BITS):
+        self._sub_bits = sub_bits
+        self._sub_count = 1 << sub_bits
+        self.reset()
+
+    def reset(self):
+        self._counts = []
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _bucket(self, value):
+        exp = max(value.bit_length() - self._sub_bits - 1, 0)
+        return exp * self._sub_count + (value >> exp)
+
+    def _bucket_low(self, idx):
+        """Return the lowest value falling into bucket `idx`."""
+        exp = max(idx // self._sub_count - 1, 0)
+        return (idx - exp * self._sub_count) << exp
+
+    def record(self, value):
+        """
+        :param int value: value to add to the histogram.
+        """
+        idx = self._bucket(value)
+        if idx >= len(self._counts):
+            self._counts.extend([0] * (idx + 1 - len(self._counts)))
+        self._counts[idx] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, pct):
+        """
+        Return the (lower bound of the bucket of the) value below which `pct`
+        percent of the recorded values fall, or ``None`` if there are none.
+        """
+        if not self.count:
+            return None
+        target = self.count * pct / 100
+        seen = 0
+        for idx, cnt in enumerate(self._counts):
+            seen += cnt
+            if cnt and seen >= target:
+                return max(self._bucket_low(idx), self.min)
+        return self.max  # pragma: no cover
+
+    def to_dict(self):
+        d = {"count": self.count, "min": self.min, "max": self.max}
+        if self.count:
+            d["mean"] = self.total / self.count
+        for pct in STATS_PERCENTILES:
+            d["p%s" % pct] = self.percentile(pct)
+        return d
+
+
+class ElementStats(object):
+    """
+    Latency histograms per processing stage, and drop counters per reason, for
+    a :class:`infrastructure.scion_elem.SCIONElement`.
+
+    :ivar bool enabled:
+        whether latencies are currently being collected. Drops are always
+        counted.
+    """
+    def __init__(self, owner, stages):
+        """
+        :param owner: the object whose methods get timed.
+        :param dict stages: map of stage name to method name.
+        """
+        self._owner = owner
+        self._stages = stages
+        self.enabled = False
+        self.histograms = defaultdict(Histogram)
+        self.drops = defaultdict(int)
+        self._since = time.time()
+
+    def enable(self):
+        """
+        Start collecting stats, by wrapping each stage method with a timer.
+        """
+        if self.enabled:
+            return
+        for stage, name in self._stages.items():
+            setattr(self._owner, name,
+                    self._timed(self.histograms[stage],
+                                getattr(self._owner, name)))
+        self.enabled = True
+
+    def disable(self):
+        """
+        Stop collecting stats, and remove the timing wrappers.
+        """
+        if not self.enabled:
+            return
+        self.enabled = False
+        for name in self._stages.values():
+            self._owner.__dict__.pop(name, None)
+
+    def reset(self):
+        for hist in self.histograms.values():
+            hist.reset()
+        self.drops.clear()
+        self._since = time.time()
+
+    @staticmethod
+    def _timed(hist, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.monotonic()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                hist.record(int((time.monotonic() - start) * 1000000))
+        return wrapper
+
+    def drop(self, reason):
+        """
+        Count a dropped packet.
+
+        :param reason:
+            the exception that caused the drop, or a short string describing
+            the reason.
+        """
+        if isinstance(reason, BaseException):
+            reason = type(reason).__name__
+        self.drops[reason] += 1
+
+    def to_dict(self):
+        return {
+            "enabled": self.enabled,
+            "since": self._since,
+            "stages_usec": {stage: hist.to_dict() for stage, hist in
+                            list(self.histograms.items())},
+            "drops": dict(self.drops),
+        }
+
+    def handle_cmd(self, cmd):
+        """
+        Handle a command received on the stats socket. Supported commands are
+        ``show`` (the default), ``enable``, ``disable`` and ``reset``. All of
+        them reply with the current stats, as JSON.
+        """
+        if cmd == "enable":
+            self.enable()
+        elif cmd == "disable":
+            self.disable()
+        elif cmd == "reset":
+            self.reset()
+        elif cmd not in ("", "show"):
+            return json.dumps({"error": "unknown command: %s" % cmd})
+        return json.dumps(self.to_dict(), sort_keys=True)
+
+    def serve(self, path):
+        """
+        Serve stats on a UNIX socket at `path`, from a background thread.
+        Clients send a single command line, and get the reply back before the
+        connection is closed.
+        """
+        if os.path.exists(path):
+            os.unlink(path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(path)
+        sock.listen(5)
+        threading.Thread(
+            target=thread_safety_net, args=(self._serve_loop, sock),
+            name="ElementStats.serve", daemon=True).start()
+        logging.info("Serving stats on %s", path)
+
+    def _serve_loop(self, sock):  # pragma: no cover
+        while True:
+            conn, _ = sock.accept()
+            with conn:
+                try:
+                    cmd = conn.recv(STATS_CMD_LEN).decode("utf-8", "replace")
+                    conn.sendall(self.handle_cmd(cmd.strip()).encode("utf-8"))
+                except OSError as e:
+                    logging.warning("Error serving stats: %s", e)
@@ -23,6 +23,7 @@ import logging
 import os
 import shutil
 import signal
+import struct
 import sys
 import time
 from binascii import hexlify
@@ -210,7 +211,7 @@ def load_yaml_file(file_path):
     """
     try:
         with open(file_path) as f:
-            return yaml.load(f)
+            return yaml.safe_load(f)
     except OSError as e:
         raise SCIONIOError("Error opening '%s': %s" %
                            (file_path, e.strerror)) from None
@@ -350,7 +351,14 @@ class SCIONTime(object):
 
 
 class Raw(object):
-    """A class to wrap raw bytes objects."""
+    """
+    A cursor over raw bytes.
+
+    The data is never copied: :meth:`get` and :meth:`pop` return `memoryview`
+    slices of it, and :meth:`get_struct`/:meth:`pop_struct` decode fields in
+    place. Parsers which keep (parts of) a returned slice beyond the parse
+    either convert it to `bytes`, or rely on the data not being modified.
+    """
     def __init__(self, data, desc="", len_=None,
                  min_=False):  # pragma: no cover
         self._data = data
@@ -359,16 +367,20 @@ class Raw(object):
         self._min = min_
         self._offset = 0
         self.check_type()
+        self._data = memoryview(data)
+        if self._data.format != "B":
+            self._data = self._data.cast("B")
         self.check_len()
 
     def check_type(self):
         """
-        Check that the data is a `bytes` instance. If not, raise an exception.
+        Check that the data is a `bytes`, `bytearray` or `memoryview`
+        instance. If not, raise an exception.
 
         :raises:
             lib.errors.SCIONTypeError: data is the wrong type
         """
-        if not isinstance(self._data, bytes):
+        if not isinstance(self._data, (bytes, bytearray, memoryview)):
             raise SCIONTypeError(
                 "Error parsing raw %s: Expected %s, got %s" %
                 (self._desc, bytes, type(self._data)))
@@ -396,22 +408,26 @@ class Raw(object):
             "Error parsing raw %s: Expected len %s %s, got %s" %
             (self._desc, op, self._len, len(self._data)))
 
+    def _check_bounds(self, n):
+        dlen = len(self._data)
+        if (self._offset + n) > dlen:
+            raise SCIONIndexError("%s: Attempted to access beyond end of raw "
+                                  "data (len=%d, offset=%d, request=%d)" %
+                                  (self._desc, dlen, self._offset, n))
+
     def get(self, n=None, bounds=True):
         """
         Return next elements from data.
 
         If `n` is not specified, return all remaining elements of data.
         If `n` is 1, return the next element of data (as an int).
-        If `n` is > 1, return the next `n` elements of data (as bytes).
+        If `n` is > 1, return the next `n` elements of data (as a memoryview).
 
         :param n: How many elements to return (see above)
         :param bool bounds: Perform bounds checking on access if True
         """
-        dlen = len(self._data)
-        if n and bounds and (self._offset + n) > dlen:
-            raise SCIONIndexError("%s: Attempted to access beyond end of raw "
-                                  "data (len=%d, offset=%d, request=%d)" %
-                                  (self._desc, dlen, self._offset, n))
+        if n and bounds:
+            self._check_bounds(n)
         if n is None:
             return self._data[self._offset:]
         elif n == 1:
@@ -437,6 +453,33 @@ class Raw(object):
             self._offset = dlen
         return ret
 
+    def get_struct(self, fmt):
+        """
+        Decode the next elements of data with `struct.unpack_from`.
+
+        :param fmt: a `struct.Struct` instance, or a struct format string.
+        :returns: tuple of the decoded values.
+        """
+        if isinstance(fmt, struct.Struct):
+            self._check_bounds(fmt.size)
+            return fmt.unpack_from(self._data, self._offset)
+        self._check_bounds(struct.calcsize(fmt))
+        return struct.unpack_from(fmt, self._data, self._offset)
+
+    def pop_struct(self, fmt):
+        """
+        Decode the next elements of data with `struct.unpack_from`, and
+        advance the internal offset past them.
+
+        Arguments have the same meaning as for Raw.get_struct
+        """
+        ret = self.get_struct(fmt)
+        if isinstance(fmt, struct.Struct):
+            self._offset += fmt.size
+        else:
+            self._offset += struct.calcsize(fmt)
+        return ret
+
     def offset(self):  # pragma: no cover
         return self._offset
 
@@ -0,0 +1,21 @@
+from lib.packet.host_addr import HostAddrBase
+from lib.socket import UDPSocket
+from lib.topology import InterfaceElement, Topology
+from infrastructure.router.if_state import InterfaceState
+from typing import Dict, Tuple
+
+class FwdEntry:
+    def __init__(self, if_id: int, addr: HostAddrBase, port: int, link_type: str,
+                 is_active: bool, sock: UDPSocket) -> None:
+        self.if_id = if_id
+        self.addr = addr
+        self.port = port
+        self.dst = (str(addr), port)  # type: Tuple[str, int]
+        self.link_type = link_type
+        self.is_active = is_active
+        self.sock = sock
+
+def build_fwd_table(topology: Topology, interface: InterfaceElement,
+                    if_states: Dict[int, InterfaceState], int_sock: UDPSocket,
+                    ext_sock: UDPSocket) -> Dict[int, FwdEntry]:
+    ...
@@ -1,5 +1,12 @@
+from lib.packet.path_mgmt.ifstate import IFStateInfo
+from lib.packet.path_mgmt.rev_info import RevocationInfo
+from typing import Optional
 
 
 class InterfaceState:
     def __init__(self) -> None:
-        self.is_active = True
\ No newline at end of file
+        self.is_active = True
+        self.rev_info = None  # type: Optional[RevocationInfo]
+
+    def update(self, info: IFStateInfo) -> None:
+        ...
@@ -0,0 +1,16 @@
+from lib.packet.opaque_field import HopOpaqueField
+from typing import Optional
+
+
+class HOFMacCache(object):
+    MAX_LEN = 4096
+
+    def __init__(self, key: bytes, max_len: int=MAX_LEN) -> None:
+        self.key = key
+
+    def verify(self, hof: HopOpaqueField, ts: int,
+               prev_hof: Optional[HopOpaqueField], now: int) -> bool:
+        ...
+
+    def __len__(self) -> int:
+        ...
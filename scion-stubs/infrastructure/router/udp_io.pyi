@@ -0,0 +1,12 @@
+from lib.socket import UDPSocket, udp_send
+from typing import Tuple
+from nagini_contracts.contracts import *
+from nagini_contracts.io_builtins import Place, token, IOExists1
+
+
+def sock_send(t: Place, sock: UDPSocket, data: bytes, dst: Tuple[str, int]) -> Tuple[bool, Place]:
+    IOExists1(Place)(lambda t2: (
+        Requires(token(t, 1) and udp_send(t, data, dst[0], dst[1], t2)),
+        Ensures(Result()[1] is t2 and token(t2))
+    ))
+    ...
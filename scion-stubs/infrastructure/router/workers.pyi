@@ -0,0 +1,22 @@
+from typing import Optional, Tuple
+
+CTRL_IFSTATE = 0
+CTRL_REVOCATION = 1
+CTRL_BUFLEN = 65535
+
+
+class WorkerLink(object):
+    def __init__(self, sock: object) -> None:
+        self.sock = sock
+
+    def is_active(self) -> bool:
+        ...
+
+    def close(self) -> None:
+        ...
+
+    def send(self, type_: int, raw: bytes) -> None:
+        ...
+
+    def recv(self, block: bool=True) -> Optional[Tuple[int, bytes]]:
+        ...
@@ -1,4 +1,14 @@
 import logging
+from typing import Any, Callable, Optional
 
+LOG_RATE_LIMIT = ...  # type: int
 
-def log_exception(msg: str, level: int  = logging.CRITICAL) -> None: ...
\ No newline at end of file
+
+class Lazy(object):
+    def __init__(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> None: ...
+
+
+def init_logging(log_base: Optional[str] = None, file_level: int = logging.DEBUG, console_level: int = logging.NOTSET, async_: bool = False, rate_limit: Optional[int] = None) -> None: ...
+
+
+def log_exception(msg: str, *args: object, level: int = logging.CRITICAL, **kwargs: Any) -> None: ...
@@ -1,10 +1,34 @@
 from lib.packet.packet_base import Cerealizable
 from lib.packet.path_mgmt.base import PathMgmtPayloadBase
+from lib.packet.path_mgmt.rev_info import RevocationInfo
+from typing import Any, List
 
 
 class IFStateInfo(Cerealizable):  # pragma: no cover
-    pass
+    def __init__(self, p: object) -> None:
+        self.p = p  # type: Any
+        self.rev_info = RevocationInfo()
+
+    @classmethod
+    def from_values(cls, if_id: int, active: bool, rev_info: RevocationInfo) -> 'IFStateInfo':
+        ...
+
+
+class IFStatePayload(PathMgmtPayloadBase):  # pragma: no cover
+    def __init__(self, p: object) -> None:
+        self.p = p  # type: Any
+
+    @classmethod
+    def from_raw(cls, raw: bytes) -> 'IFStatePayload':
+        ...
+
+    @classmethod
+    def from_values(cls, infos: List[IFStateInfo]) -> 'IFStatePayload':
+        ...
+
+    def pack(self) -> bytes:
+        ...
 
 
 class IFStateRequest(PathMgmtPayloadBase):  # pragma: no cover
-    pass
\ No newline at end of file
+    pass
@@ -2,4 +2,9 @@ from lib.packet.path_mgmt.base import PathMgmtPayloadBase
 
 
 class RevocationInfo(PathMgmtPayloadBase):
-    pass
\ No newline at end of file
+    @classmethod
+    def from_raw(cls, raw: bytes) -> 'RevocationInfo':
+        ...
+
+    def pack(self) -> bytes:
+        ...
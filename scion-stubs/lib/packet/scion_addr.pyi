@@ -24,4 +24,7 @@ class SCIONAddr(object):
 
     @classmethod
     def from_values(cls, isd_as: Optional[ISD_AS], host: Optional[HostAddrBase]) -> 'SCIONAddr':  # pragma: no cover
-        ...
\ No newline at end of file
+        ...
+
+    def pack(self) -> bytes:  # pragma: no cover
+        ...
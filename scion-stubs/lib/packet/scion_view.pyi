@@ -0,0 +1,69 @@
+from lib.packet.opaque_field import HopOpaqueField, InfoOpaqueField, OpaqueField
+from lib.packet.scion_addr import ISD_AS
+from typing import Dict, List, Optional, Tuple, Type, TypeVar, Union
+
+OF = TypeVar('OF', bound=OpaqueField)
+
+
+class SCIONPacketView(object):
+    NAME = "SCIONPacketView"
+    MAX_SEGMENTS = 3
+    OF_PTRS_OFFSET = 4
+
+    def __init__(self, raw: Union[bytes, bytearray, memoryview]) -> None:
+        self._raw = memoryview(raw)
+        self._dst_ia = None  # type: Optional[ISD_AS]
+        self._segments = None  # type: Optional[List[Tuple[int, int]]]
+        self._ofs = {}  # type: Dict[int, OpaqueField]
+        self.version = 0
+        self.src_addr_type = 0
+        self.dst_addr_type = 0
+        self.total_len = 0
+        self.hdr_len = 0
+        self.next_hdr = 0
+        self.addrs_len = 0
+
+    def validate(self) -> None:
+        ...
+
+    def get_of(self, idx: int, type_: Type[OF]) -> OF:
+        ...
+
+    def get_of_idxs(self) -> Tuple[int, int]:
+        ...
+
+    def set_of_idxs(self, iof_idx: int, hof_idx: int) -> None:
+        ...
+
+    def next_of_idxs(self) -> Tuple[int, int, bool]:
+        ...
+
+    def get_iof(self) -> InfoOpaqueField:
+        ...
+
+    def get_hof(self) -> HopOpaqueField:
+        ...
+
+    def get_hof_ver(self, ingress: bool=True) -> Optional[HopOpaqueField]:
+        ...
+
+    def get_fwd_if(self) -> int:
+        ...
+
+    def get_curr_if(self, ingress: bool=True) -> int:
+        ...
+
+    def is_on_last_segment(self) -> bool:
+        ...
+
+    def get_dst(self) -> Tuple[int, bytes]:
+        ...
+
+    def get_dst_ia(self) -> ISD_AS:
+        ...
+
+    def get_raw(self) -> memoryview:
+        ...
+
+    def __len__(self) -> int:
+        ...
@@ -1,5 +1,5 @@
 from lib.types import AddrType
-from typing import Optional, Tuple
+from typing import Any, Callable, Iterator, List, Optional, Tuple, Union
 from nagini_contracts.contracts import *
 from nagini_contracts.io_builtins import Place, token, IOOperation, IOExists1, Terminates
 
@@ -12,15 +12,20 @@ def udp_send(t_pre: Place, data: bytes, dst_addr: str, dst_port: int, t_post: Pl
     Terminates(True)
 
 class UDPSocket(Socket):
-    def __init__(self, bind: Optional[Tuple[str, int]] = None, addr_type: int=AddrType.IPV6,
-                 reuse: bool=False) -> None:
+    def __init__(self, bind: Optional[Union[Tuple[str, int], Tuple[str, Optional[int], str]]] = None, addr_type: int=AddrType.IPV6,
+                 reuse: bool=False, reuse_port: bool=False) -> None:
         ...
 
-    def send(self, t: Place, data: bytes, dst: Tuple[str, int]=None) -> Tuple[bool, Place]:
-        IOExists1(Place)(lambda t2: (
-            Requires(dst is not None and token(t, 1) and udp_send(t, data, dst[0], dst[1], t2)),
-            Ensures(Result()[1] is t2 and token(t2))
-        ))
+    def send(self, data: bytes, dst: Tuple[str, int]=None) -> bool:
+        ...
+
+    def recv_batch(self, count: int, block: bool=True) -> List[Tuple[bytes, Tuple[str, int]]]:
+        ...
+
+    def start_batch(self) -> None:
+        ...
+
+    def flush_batch(self) -> List[Tuple[bytes, Tuple[str, int], Any]]:
         ...
 
 class ReliableSocket(Socket):
@@ -28,7 +33,16 @@ class ReliableSocket(Socket):
 
 
 class SocketMgr(object):
-    def add(self, sock: UDPSocket, callback: object) -> None:
+    def add(self, sock: Any, callback: object) -> None:
+        ...
+
+    def remove(self, sock: Any) -> None:
+        ...
+
+    def select_(self, timeout: float=None) -> Iterator[Tuple[UDPSocket, Callable[[UDPSocket], None]]]:
+        ...
+
+    def close(self) -> None:
         ...
 
 
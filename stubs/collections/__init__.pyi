@@ -1,4 +1,4 @@
-from typing import Generic, TypeVar, Dict, Type
+from typing import Generic, TypeVar, Dict, Tuple, Type
 
 
 T = TypeVar('T')
@@ -6,4 +6,10 @@ V = TypeVar('V')
 
 class defaultdict(Generic[T, V], Dict[T, V]):
     def __init__(self, df: Type[V]) -> None:
-        ...
\ No newline at end of file
+        ...
+class OrderedDict(Generic[T, V], Dict[T, V]):
+    def move_to_end(self, key: T, last: bool = True) -> None:
+        ...
+
+    def popitem(self, last: bool = True) -> Tuple[T, V]:
+        ...
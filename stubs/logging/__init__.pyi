@@ -8,6 +8,8 @@ def debug(msg: str, *args: object) -> None: ...
 
 def info(msg: str, *args: object) -> None: ...
 
+def critical(msg: str, *args: object) -> None: ...
+
 
 CRITICAL = 50
 FATAL = CRITICAL
@@ -3,4 +3,10 @@ class Event:
         ...
 
     def clear(self) -> None:
-        ...
\ No newline at end of file
+        ...
+
+    def is_set(self) -> bool:
+        ...
+
+    def wait(self, timeout: float = None) -> bool:
+        ...
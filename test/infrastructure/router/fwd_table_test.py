@@ -0,0 +1,69 @@
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`fwd_table_test` --- infrastructure.router.fwd_table unit tests
+====================================================================
+"""
+# External packages
+import nose
+import nose.tools as ntools
+
+# SCION
+from infrastructure.router.fwd_table import build_fwd_table
+from test.testcommon import create_mock
+
+
+def _br(if_id, addr, port, link_type):
+    br = create_mock(["addr", "port", "interface"])
+    br.addr, br.port = addr, port
+    br.interface = create_mock(["if_id", "link_type"])
+    br.interface.if_id = if_id
+    br.interface.link_type = link_type
+    return br
+
+
+class TestBuildFwdTable(object):
+    """
+    Unit tests for infrastructure.router.fwd_table.build_fwd_table
+    """
+    def test(self):
+        own = _br(1, "10.0.0.1", 50000, "PARENT")
+        other = _br(2, "10.0.0.2", 50001, "CHILD")
+        topology = create_mock(["get_all_border_routers"])
+        topology.get_all_border_routers.return_value = [own, other]
+        interface = create_mock(["if_id", "link_type", "to_addr",
+                                 "to_udp_port"])
+        interface.if_id = 1
+        interface.link_type = "PARENT"
+        interface.to_addr = "192.168.0.1"
+        interface.to_udp_port = 40000
+        if_state = create_mock(["is_active"])
+        if_state.is_active = False
+        # Call
+        table = build_fwd_table(topology, interface, {2: if_state},
+                                "int_sock", "ext_sock")
+        # Tests
+        ntools.eq_(sorted(table), [1, 2])
+        ntools.eq_(table[1].dst, ("192.168.0.1", 40000))
+        ntools.eq_(table[1].link_type, "PARENT")
+        ntools.ok_(table[1].is_active)
+        ntools.eq_(table[1].sock, "ext_sock")
+        ntools.eq_(table[2].dst, ("10.0.0.2", 50001))
+        ntools.eq_(table[2].link_type, "CHILD")
+        ntools.assert_false(table[2].is_active)
+        ntools.eq_(table[2].sock, "int_sock")
+
+
+if __name__ == "__main__":
+    nose.run(defaultTest=__name__)
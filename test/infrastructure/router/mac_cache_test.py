@@ -0,0 +1,80 @@
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`mac_cache_test` --- infrastructure.router.mac_cache unit tests
+====================================================================
+"""
+# External packages
+import nose
+import nose.tools as ntools
+
+# SCION
+from infrastructure.router.mac_cache import HOFMacCache
+from lib.defines import EXP_TIME_UNIT
+from test.testcommon import create_mock
+
+
+def _hof(packed, verified=True):
+    hof = create_mock(["pack", "verify_mac", "exp_time"])
+    hof.pack.return_value = packed
+    hof.verify_mac.return_value = verified
+    hof.exp_time = 2
+    return hof
+
+
+class TestHOFMacCacheVerify(object):
+    """
+    Unit tests for infrastructure.router.mac_cache.HOFMacCache.verify
+    """
+    def test_miss(self):
+        inst = HOFMacCache("key")
+        hof = _hof(b"hof")
+        prev_hof = _hof(b"prev")
+        # Call
+        ntools.ok_(inst.verify(hof, 100, prev_hof, 100))
+        # Tests
+        hof.verify_mac.assert_called_once_with("key", 100, prev_hof)
+        ntools.eq_(inst._entries[(100, b"hof", b"prev")],
+                   100 + 2 * EXP_TIME_UNIT)
+
+    def test_hit(self):
+        inst = HOFMacCache("key")
+        inst._entries[(100, b"hof", None)] = 200
+        hof = _hof(b"hof")
+        # Call
+        ntools.ok_(inst.verify(hof, 100, None, 200))
+        # Tests
+        ntools.assert_false(hof.verify_mac.called)
+
+    def test_expired(self):
+        inst = HOFMacCache("key")
+        inst._entries[(100, b"hof", None)] = 200
+        hof = _hof(b"hof", verified=False)
+        # Call
+        ntools.assert_false(inst.verify(hof, 100, None, 201))
+        # Tests
+        ntools.ok_(hof.verify_mac.called)
+        ntools.eq_(len(inst), 0)
+
+    def test_lru(self):
+        inst = HOFMacCache("key", max_len=2)
+        for packed in b"hof0", b"hof1", b"hof0", b"hof2":
+            inst.verify(_hof(packed), 100, None, 100)
+        # Tests
+        ntools.eq_(list(inst._entries), [(100, b"hof0", None),
+                                         (100, b"hof2", None)])
+
+
+if __name__ == "__main__":
+    nose.run(defaultTest=__name__)
@@ -0,0 +1,136 @@
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`main_test` --- infrastructure.router.main unit tests
+==========================================================
+"""
+# Stdlib
+from unittest.mock import patch
+
+# External packages
+import nose
+import nose.tools as ntools
+
+# SCION
+from infrastructure.router.errors import SCIONOFVerificationError
+from infrastructure.router.mac_cache import HOFMacCache
+from infrastructure.router import main
+from infrastructure.router.main import Router
+from lib.contract_erasure import erase_contracts
+from lib.packet.opaque_field import HopOpaqueField, InfoOpaqueField
+from lib.packet.path import SCIONPath
+from lib.packet.scmp.errors import SCMPBadMAC, SCMPUnreachNet
+from lib.stats import ElementStats
+from test.testcommon import create_mock, create_mock_full
+
+
+def _erased_router_cls():
+    """
+    Return a copy of the Router class with its contracts erased (see
+    :mod:`lib.contract_erasure`), for methods whose contracts can't be
+    evaluated at runtime.
+    """
+    with open(main.__file__, "rb") as f:
+        code = erase_contracts(f.read(), main.__file__)
+    namespace = {"__name__": main.__name__}
+    exec(code, namespace)
+    return namespace["Router"]
+
+
+class TestRouterHandleRequestDrops(object):
+    """
+    Unit tests for the drop counting of
+    infrastructure.router.main.Router.handle_request
+    """
+    def _setup(self):
+        inst = Router.__new__(Router)
+        inst.stats = ElementStats(inst, {})
+        inst._parse_packet = create_mock_full(return_value=create_mock_full(
+            {"cmn_hdr": "cmn_hdr", "addrs": "addrs", "path": ["hof"]}))
+        inst.handle_extensions = create_mock_full(return_value=[])
+        inst._process_flags = create_mock_full(return_value=(False, False))
+        inst._needs_local_processing = create_mock_full(return_value=False)
+        inst._scmp_validate_error = create_mock()
+        return inst
+
+    def _handle(self, inst):
+        return inst.handle_request("t", b"packet", None, True)
+
+    def test_raised_while_handling(self):
+        inst = self._setup()
+
+        def handle_data(*_):
+            try:
+                raise OSError("unreachable")
+            except OSError:
+                raise SCMPUnreachNet(("addr", 1))
+        inst.handle_data = handle_data
+        # Call
+        ntools.eq_(self._handle(inst), "t")
+        # Tests
+        ntools.eq_(inst.stats.drops, {"SCMPUnreachNet": 1})
+        ntools.ok_(inst._scmp_validate_error.called)
+
+    def test_translated(self):
+        inst = self._setup()
+        inst.interface = create_mock(["if_id"])
+        inst._process_data = create_mock_full(
+            side_effect=SCIONOFVerificationError("hof", "prev"))
+        # Call
+        ntools.eq_(self._handle(inst), "t")
+        # Tests
+        ntools.eq_(inst.stats.drops, {"SCIONOFVerificationError": 1})
+        error = inst._scmp_validate_error.call_args[0][1]
+        ntools.assert_is_instance(error, SCMPBadMAC)
+
+
+class TestRouterVerifyHof(object):
+    """
+    Unit tests for infrastructure.router.main.Router.verify_hof
+    """
+    def _path(self, key, ts):
+        hofs = [HopOpaqueField.from_values(63, 0, 2),
+                HopOpaqueField.from_values(63, 1, 3)]
+        path = SCIONPath.from_values(
+            InfoOpaqueField.from_values(ts, 1, hops=2), hofs)
+        path.set_of_idxs(0, 2)
+        hofs[1].mac = hofs[1].calc_mac(key, ts, hofs[0])
+        return path
+
+    @patch("infrastructure.router.main.SCIONTime.get_time", autospec=True)
+    @patch("lib.packet.opaque_field.HopOpaqueField.verify_mac",
+           autospec=True)
+    def test_cached(self, verify_mac, get_time):
+        router_cls = _erased_router_cls()
+        inst = router_cls.__new__(router_cls)
+        inst.interface = create_mock_full({"if_id": 1})
+        inst.of_gen_key = b"key0" * 4
+        inst._mac_cache = HOFMacCache(inst.of_gen_key)
+        get_time.return_value = 1000
+        verify_mac.return_value = True
+        # Call
+        for _ in range(3):
+            inst.verify_hof(self._path(inst.of_gen_key, 1000))
+        # Tests
+        ntools.eq_(verify_mac.call_count, 1)
+        ntools.eq_(len(inst._mac_cache), 1)
+        # A new key starts a new cache.
+        inst.of_gen_key = b"key1" * 4
+        inst.verify_hof(self._path(inst.of_gen_key, 1000))
+        ntools.eq_(verify_mac.call_count, 2)
+        ntools.assert_is(inst._mac_cache.key, inst.of_gen_key)
+
+
+if __name__ == "__main__":
+    nose.run(defaultTest=__name__)
@@ -0,0 +1,41 @@
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`udp_io_test` --- infrastructure.router.udp_io unit tests
+==============================================================
+"""
+# External packages
+import nose
+import nose.tools as ntools
+
+# SCION
+from infrastructure.router.udp_io import sock_send
+from test.testcommon import create_mock
+
+
+class TestSockSend(object):
+    """
+    Unit tests for infrastructure.router.udp_io.sock_send
+    """
+    def test(self):
+        sock = create_mock(["send"])
+        sock.send.return_value = False
+        # Call
+        ntools.eq_(sock_send("t", sock, b"data", ("addr", 1)), (False, "t"))
+        # Tests
+        sock.send.assert_called_once_with(b"data", ("addr", 1))
+
+
+if __name__ == "__main__":
+    nose.run(defaultTest=__name__)
@@ -0,0 +1,131 @@
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`workers_test` --- infrastructure.router.workers unit tests
+================================================================
+"""
+# Stdlib
+import os
+import tempfile
+import time
+from socket import AF_UNIX, SOCK_SEQPACKET, socketpair
+from unittest.mock import patch
+
+# External packages
+import nose
+import nose.tools as ntools
+
+# SCION
+from infrastructure.router.workers import (
+    CTRL_REVOCATION,
+    RouterWorkerPool,
+    WorkerLink,
+)
+from test.testcommon import create_mock
+
+
+class TestWorkerLink(object):
+    """
+    Unit tests for infrastructure.router.workers.WorkerLink.send/recv
+    """
+    def test(self):
+        ends = [WorkerLink(s) for s in socketpair(AF_UNIX, SOCK_SEQPACKET)]
+        # Call
+        ends[0].send(CTRL_REVOCATION, b"rev_info")
+        # Tests
+        ntools.eq_(ends[1].recv(), (CTRL_REVOCATION, b"rev_info"))
+        ends[0].close()
+        ntools.assert_is_none(ends[1].recv())
+        ends[1].close()
+
+
+class TestRouterWorkerPoolFanOut(object):
+    """
+    Unit tests for infrastructure.router.workers.RouterWorkerPool._fan_out
+    """
+    @patch("infrastructure.router.workers.RouterWorkerPool.__init__",
+           autospec=True, return_value=None)
+    def test(self, init):
+        inst = RouterWorkerPool("router_cls", "id", "conf", "logs", 3)
+        inst._links = {}
+        for pid in 1, 2, 3:
+            inst._links[pid] = create_mock(["send"])
+        inst._links[3].send.side_effect = OSError
+        # Call
+        inst._fan_out(1, CTRL_REVOCATION, b"raw")
+        # Tests
+        ntools.assert_false(inst._links[1].send.called)
+        for pid in 2, 3:
+            inst._links[pid].send.assert_called_once_with(
+                CTRL_REVOCATION, b"raw")
+
+
+
+class RelayTestRouter(object):
+    """
+    Stand-in for the router in a worker process: it sends its pid to the
+    other workers, records what it receives in `conf_dir`, and exits once
+    every worker has done so.
+    """
+    WORKERS = 2
+
+    def __init__(self, server_id, conf_dir, reuse_port=False):
+        self.conf_dir = conf_dir
+        self.link = None
+
+    def set_worker_link(self, link):
+        self.link = link
+
+    def run(self):
+        self.link.send(CTRL_REVOCATION, str(os.getpid()).encode())
+        type_, raw = self.link.recv()
+        with open(os.path.join(self.conf_dir, "recv.%d" % os.getpid()),
+                  "w") as f:
+            f.write("%d %s" % (type_, raw.decode()))
+        deadline = time.time() + 10
+        while time.time() < deadline:
+            if len(self._received()) == self.WORKERS:
+                return
+            time.sleep(0.01)
+
+    def _received(self):
+        return [n for n in os.listdir(self.conf_dir) if n.startswith("recv.")]
+
+
+class TestRouterWorkerPoolRun(object):
+    """
+    Unit tests for infrastructure.router.workers.RouterWorkerPool.run
+    """
+    def test(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            inst = RouterWorkerPool(RelayTestRouter, "br1-11-1", tmp_dir,
+                                    tmp_dir, RelayTestRouter.WORKERS)
+            # Call
+            inst.run()
+            received = {}
+            for name in os.listdir(tmp_dir):
+                if name.startswith("recv."):
+                    with open(os.path.join(tmp_dir, name)) as f:
+                        received[name[len("recv."):]] = f.read()
+        # Tests
+        ntools.eq_(len(received), 2)
+        pids = list(received)
+        # Each worker got the other one's message, relayed by the parent.
+        ntools.eq_(received[pids[0]], "%d %s" % (CTRL_REVOCATION, pids[1]))
+        ntools.eq_(received[pids[1]], "%d %s" % (CTRL_REVOCATION, pids[0]))
+        ntools.eq_(inst._links, {})
+
+
+if __name__ == "__main__":
+    nose.run(defaultTest=__name__)
@@ -0,0 +1,102 @@
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`lib_contract_erasure_test` --- lib.contract_erasure unit tests
+====================================================================
+"""
+# Stdlib
+import ast
+import textwrap
+
+# External packages
+import nose
+import nose.tools as ntools
+
+# SCION
+from lib.contract_erasure import ContractEraser, erase_contracts
+
+
+def _erase(source):
+    tree = ContractEraser().visit(ast.parse(textwrap.dedent(source)))
+    return ast.dump(ast.fix_missing_locations(tree))
+
+
+def _dump(source):
+    return ast.dump(ast.parse(textwrap.dedent(source)))
+
+
+class TestContractEraser(object):
+    """
+    Unit tests for lib.contract_erasure.ContractEraser
+    """
+    def test_stmts(self):
+        ntools.eq_(_erase("""
+            def f(x):
+                Requires(Acc(x.State()))
+                Ensures(Result() > 0)
+                Unfold(x.State())
+                y = x.y
+                Fold(x.State())
+                while y:
+                    Invariant(Acc(x.State()))
+                    y -= 1
+                return y
+            """), _dump("""
+            def f(x):
+                y = x.y
+                while y:
+                    y -= 1
+                return y
+            """))
+
+    def test_unfolding(self):
+        ntools.eq_(_erase("y = Unfolding(Rd(x.State()), g(Unfolding(a, b)))"),
+                   _dump("y = g(b)"))
+
+    def test_predicate(self):
+        ntools.eq_(_erase("""
+            @Predicate
+            def State(self):
+                return Acc(self.x) and self.x.State()
+            """), _dump("""
+            @Predicate
+            def State(self):
+                return True
+            """))
+
+    def test_io_exists(self):
+        ntools.eq_(_erase("""
+            def send(t):
+                IOExists1(Place)(lambda t2: (Requires(token(t)),))
+            """), _dump("""
+            def send(t):
+                pass
+            """))
+
+
+class TestEraseContracts(object):
+    """
+    Unit tests for lib.contract_erasure.erase_contracts
+    """
+    def test(self):
+        ns = {}
+        # Call
+        exec(erase_contracts("def f(x):\n    Requires(x > 0)\n    return x\n"),
+             ns)
+        # Tests
+        ntools.eq_(ns["f"](-1), -1)
+
+
+if __name__ == "__main__":
+    nose.run(defaultTest=__name__)
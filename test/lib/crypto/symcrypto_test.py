@@ -0,0 +1,51 @@
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`lib_crypto_symcrypto_test` --- lib.crypto.symcrypto unit tests
+====================================================================
+"""
+# External packages
+import nose
+import nose.tools as ntools
+from Crypto.Cipher import AES
+
+# SCION
+from lib.crypto.symcrypto import cbcmac
+
+
+class TestCBCMAC(object):
+    """
+    Unit tests for lib.crypto.symcrypto.cbcmac
+    """
+    KEY = bytes(range(16))
+
+    def _check(self, msg_len):
+        msg = bytes(i % 256 for i in range(msg_len))
+        expected = AES.new(self.KEY, AES.MODE_CBC, bytes(16)).encrypt(msg)
+        # Call
+        ntools.eq_(cbcmac(self.KEY, msg), expected[-16:])
+
+    def test(self):
+        for msg_len in 16, 32, 80:
+            yield self._check, msg_len
+
+    def test_unaligned(self):
+        ntools.assert_raises(ValueError, cbcmac, self.KEY, bytes(17))
+
+    def test_no_key(self):
+        ntools.assert_raises(ValueError, cbcmac, None, bytes(16))
+
+
+if __name__ == "__main__":
+    nose.run(defaultTest=__name__)
@@ -17,6 +17,8 @@
 """
 # Stdlib
 import logging
+import queue
+import sys
 from unittest.mock import patch, MagicMock, call
 
 # External packages
@@ -27,6 +29,10 @@ import nose.tools as ntools
 from lib.log import (
     LOG_BACKUP_COUNT,
     LOG_MAX_SIZE,
+    LOG_QUEUE_SIZE,
+    Lazy,
+    RateLimitFilter,
+    _AsyncHandler,
     _handleError,
     init_logging,
     log_exception,
@@ -103,7 +109,7 @@ class TestInitLogging(object):
         init_logging("logfile", file_level=logging.CRITICAL)
         # Tests
         basic_config.assert_called_once_with(
-            level=logging.DEBUG, handlers=[rotate.return_value],
+            level=logging.CRITICAL, handlers=[rotate.return_value],
         )
 
     @patch("lib.log._ConsoleErrorHandler", autospec=True)
@@ -116,6 +122,158 @@ class TestInitLogging(object):
             level=logging.DEBUG, handlers=[console.return_value],
         )
 
+    @patch("lib.log.logging.getLogger", autospec=True)
+    @patch("lib.log.RateLimitFilter", autospec=True)
+    @patch("lib.log.logging.handlers.QueueListener", autospec=True)
+    @patch("lib.log.queue.Queue", autospec=True)
+    @patch("lib.log._AsyncHandler", autospec=True)
+    @patch("lib.log._ConsoleErrorHandler", autospec=True)
+    @patch("lib.log.logging.basicConfig", autospec=True)
+    def test_async(self, basic_config, console, async_handler, queue_,
+                   listener, rate_filter, get_logger):
+        # Call
+        init_logging(console_level=logging.INFO, async_=True, rate_limit=5)
+        # Tests
+        rate_filter.assert_called_once_with(5)
+        get_logger.return_value.addFilter.assert_called_once_with(
+            rate_filter.return_value)
+        queue_.assert_called_once_with(LOG_QUEUE_SIZE)
+        listener.assert_called_once_with(
+            queue_.return_value, console.return_value,
+            respect_handler_level=True)
+        listener.return_value.start.assert_called_once_with()
+        async_handler.assert_called_once_with(
+            queue_.return_value, listener.return_value, logging.INFO)
+        basic_config.assert_called_once_with(
+            level=logging.INFO, handlers=[async_handler.return_value],
+        )
+
+
+class TestAsyncHandlerEnqueue(object):
+    """
+    Unit tests for lib.log._AsyncHandler.enqueue
+    """
+    def _record(self, msg):
+        return logging.makeLogRecord({"msg": msg})
+
+    def test_full(self):
+        inst = _AsyncHandler(queue.Queue(1), None)
+        # Call
+        for msg in "abc":
+            inst.enqueue(self._record(msg))
+        # Tests
+        ntools.eq_(inst.dropped, 2)
+        ntools.eq_(inst.queue.get_nowait().msg, "a")
+
+    def test_report_drops(self):
+        inst = _AsyncHandler(queue.Queue(2), None)
+        inst.dropped = 3
+        # Call
+        inst.enqueue(self._record("a"))
+        # Tests
+        ntools.eq_(inst.dropped, 0)
+        warning = inst.queue.get_nowait()
+        ntools.eq_(warning.levelno, logging.WARNING)
+        ntools.assert_in("3", warning.msg)
+        ntools.eq_(inst.queue.get_nowait().msg, "a")
+
+
+class TestAsyncHandlerClose(object):
+    """
+    Unit tests for lib.log._AsyncHandler.close
+    """
+    def test(self):
+        listener = create_mock(["stop"])
+        inst = _AsyncHandler(queue.Queue(), listener)
+        # Call
+        inst.close()
+        inst.close()
+        # Tests
+        listener.stop.assert_called_once_with()
+
+
+class TestRateLimitFilterFilter(object):
+    """
+    Unit tests for lib.log.RateLimitFilter.filter
+    """
+    def _record(self, lineno=1, levelno=logging.DEBUG, **kwargs):
+        kwargs.update({"msg": "msg", "pathname": "file", "lineno": lineno,
+                       "levelno": levelno})
+        return logging.makeLogRecord(kwargs)
+
+    @patch("lib.log.time.monotonic", autospec=True)
+    def test_limit(self, monotonic):
+        inst = RateLimitFilter(2, 1)
+        monotonic.return_value = 10
+        # Call
+        results = [inst.filter(self._record()) for _ in range(4)]
+        # Tests
+        ntools.eq_(results, [True, True, False, False])
+        ntools.ok_(inst.filter(self._record(lineno=2)))
+
+    @patch("lib.log.time.monotonic", autospec=True)
+    def test_new_period(self, monotonic):
+        inst = RateLimitFilter(1, 1)
+        monotonic.return_value = 10
+        inst.filter(self._record())
+        inst.filter(self._record())
+        inst.filter(self._record())
+        monotonic.return_value = 11
+        record = self._record()
+        # Call
+        ntools.ok_(inst.filter(record))
+        # Tests
+        ntools.eq_(record.msg, "msg [2 similar messages suppressed]")
+        ntools.assert_false(inst.filter(self._record()))
+
+    @patch("lib.log.time.monotonic", autospec=True)
+    def test_continuation(self, monotonic):
+        inst = RateLimitFilter(1, 1)
+        monotonic.return_value = 10
+        ntools.ok_(inst.filter(self._record()))
+        ntools.ok_(inst.filter(self._record(continuation=True)))
+        ntools.assert_false(inst.filter(self._record()))
+        ntools.assert_false(inst.filter(self._record(continuation=True)))
+
+    @patch("lib.log.time.monotonic", autospec=True)
+    def test_errors(self, monotonic):
+        inst = RateLimitFilter(1, 1)
+        monotonic.return_value = 10
+        inst.filter(self._record())
+        ntools.assert_false(inst.filter(self._record()))
+        # Call
+        for lvl in logging.ERROR, logging.CRITICAL, logging.ERROR:
+            ntools.ok_(inst.filter(self._record(levelno=lvl)))
+            ntools.ok_(inst.filter(self._record(continuation=True)))
+        # Tests
+        ntools.assert_false(inst.filter(self._record()))
+
+    @patch("lib.log.time.monotonic", autospec=True)
+    def test_site(self, monotonic):
+        inst = RateLimitFilter(1, 1)
+        monotonic.return_value = 10
+        ntools.ok_(inst.filter(self._record(lineno=1, site=("caller", 5))))
+        # Call
+        ntools.assert_false(
+            inst.filter(self._record(lineno=2, site=("caller", 5))))
+        # Tests
+        ntools.ok_(inst.filter(self._record(lineno=1)))
+
+
+class TestLazyStr(object):
+    """
+    Unit tests for lib.log.Lazy.__str__
+    """
+    def test(self):
+        func = create_mock()
+        func.return_value = 42
+        inst = Lazy(func, "a", b="b")
+        ntools.assert_false(func.called)
+        # Call
+        ntools.eq_(str(inst), "42")
+        # Tests
+        func.assert_called_once_with("a", b="b")
+
 
 class TestLogException(object):
     """
@@ -126,19 +284,29 @@ class TestLogException(object):
     def test(self, log, format_exc):
         format_exc.return_value = MagicMock(spec_set=['split'])
         format_exc.return_value.split.return_value = ['line0', 'line1']
-        log_exception('msg', 'arg0', level=123, arg1='arg1')
-        log.assert_has_calls([call(123, 'msg', 'arg0', arg1='arg1'),
-                              call(123, 'line0'), call(123, 'line1')])
+        lineno = sys._getframe().f_lineno + 1
+        log_exception('msg', 'arg0', level=123, arg1='arg1', extra={"a": 1})
+        site = (__file__, lineno)
+        cont = {"site": site, "continuation": True}
+        log.assert_has_calls([
+            call(123, 'msg', 'arg0', extra={"a": 1, "site": site},
+                 arg1='arg1'),
+            call(123, 'line0', extra=cont),
+            call(123, 'line1', extra=cont)])
 
     @patch("lib.log.traceback.format_exc", autospec=True)
     @patch("lib.log.logging.log", autospec=True)
     def test_less_arg(self, log, format_exc):
         format_exc.return_value = MagicMock(spec_set=['split'])
         format_exc.return_value.split.return_value = ['line0', 'line1']
+        lineno = sys._getframe().f_lineno + 1
         log_exception('msg', 'arg0', arg1='arg1')
-        calls = [call(logging.CRITICAL, 'msg', 'arg0', arg1='arg1'),
-                 call(logging.CRITICAL, 'line0'),
-                 call(logging.CRITICAL, 'line1')]
+        site = (__file__, lineno)
+        cont = {"site": site, "continuation": True}
+        calls = [call(logging.CRITICAL, 'msg', 'arg0', extra={"site": site},
+                      arg1='arg1'),
+                 call(logging.CRITICAL, 'line0', extra=cont),
+                 call(logging.CRITICAL, 'line1', extra=cont)]
         log.assert_has_calls(calls)
 
 
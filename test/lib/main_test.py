@@ -23,7 +23,8 @@ import nose
 import nose.tools as ntools
 
 # SCION
-from lib.main import main_default, main_wrapper
+from lib.log import LOG_RATE_LIMIT
+from lib.main import default_arg_parser, main_default, main_wrapper
 from test.testcommon import create_mock
 
 
@@ -56,22 +57,49 @@ class TestMainWrapper(object):
         ntools.ok_(exit.called)
 
 
+class TestDefaultArgParser(object):
+    """
+    Unit tests for lib.main.default_arg_parser
+    """
+    def test_log_defaults(self):
+        args = default_arg_parser().parse_args(["srvid", "confdir", "logdir"])
+        ntools.assert_false(args.log_async)
+        ntools.eq_(args.log_rate_limit, None)
+
+    def _check_log_rate_limit(self, argv, expected):
+        args = default_arg_parser().parse_args(
+            ["srvid", "confdir", "logdir", "--log-async"] + argv)
+        ntools.ok_(args.log_async)
+        ntools.eq_(args.log_rate_limit, expected)
+
+    def test_log_rate_limit(self):
+        yield self._check_log_rate_limit, ["--log-rate-limit"], LOG_RATE_LIMIT
+        yield self._check_log_rate_limit, ["--log-rate-limit", "3"], 3
+
+
 class TestMainDefault(object):
     """
     Unit tests for lib.main.main_default
     """
+    @patch("lib.main.os.makedirs", autospec=True)
     @patch("lib.main.trace", autospec=True)
     @patch("lib.main.init_logging", autospec=True)
     @patch("lib.main.argparse.ArgumentParser", autospec=True)
     @patch("lib.main.handle_signals", autospec=True)
-    def test_trace(self, signals, argparse, init_log, trace):
+    def test_trace(self, signals, argparse, init_log, trace, makedirs):
         type_ = create_mock()
-        inst = type_.return_value = create_mock(["id", "run"])
+        inst = type_.return_value = create_mock(
+            ["id", "persist_state", "run", "stats"])
+        inst.stats = create_mock(["serve"])
         parser = argparse.return_value
         args = parser.parse_args.return_value
         args.log_dir = "logging"
         args.server_id = "srvid"
         args.conf_dir = "confdir"
+        args.stats = "stats_sock"
+        args.state_dir = "state"
+        args.log_async = True
+        args.log_rate_limit = 5
         # Call
         main_default(type_, trace_=True, kwarg1="kwarg1")
         # Tests
@@ -79,9 +107,13 @@ class TestMainDefault(object):
         argparse.assert_called_once_with()
         ntools.ok_(parser.add_argument.called)
         parser.parse_args.assert_called_once_with()
-        init_log.assert_called_once_with("logging/srvid")
+        init_log.assert_called_once_with(
+            "logging/srvid", async_=True, rate_limit=5)
         type_.assert_called_once_with("srvid", "confdir", kwarg1="kwarg1")
         trace.assert_called_once_with(inst.id)
+        inst.stats.serve.assert_called_once_with("stats_sock")
+        makedirs.assert_called_once_with("state", exist_ok=True)
+        inst.persist_state.assert_called_once_with("state")
         inst.run.assert_called_once_with()
 
     @patch("lib.main.Topology.from_file", new_callable=create_mock)
@@ -94,6 +126,7 @@ class TestMainDefault(object):
         local_type = create_mock()
         topo.return_value = create_mock(["is_core_as"])
         topo.return_value.is_core_as = is_core
+        argparse.return_value.parse_args.return_value.state_dir = None
         # Call
         main_default(core_type, local_type)
         # Tests
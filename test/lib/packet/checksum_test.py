@@ -0,0 +1,119 @@
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`lib_packet_checksum_test` --- lib.packet.checksum unit tests
+==================================================================
+"""
+# Stdlib
+import random
+import struct
+
+# External packages
+import nose
+import nose.tools as ntools
+import scapy.utils
+
+# SCION
+from lib.packet.checksum import (
+    checksum,
+    ones_add,
+    ones_sum,
+    update_checksum,
+)
+
+
+def _reference(data):
+    return struct.pack("H", scapy.utils.checksum(data))
+
+
+class TestOnesSum(object):
+    """
+    Unit tests for lib.packet.checksum.ones_sum
+    """
+    def test_zero(self):
+        ntools.eq_(ones_sum(bytes(10)), 0)
+
+    def test_carry(self):
+        ntools.eq_(ones_sum(bytes.fromhex("ffff0001")), 0x0001)
+        ntools.eq_(ones_sum(bytes.fromhex("fffe0001")), 0xffff)
+
+    def test_odd(self):
+        ntools.eq_(ones_sum(b"\x01"), 0x0100)
+        ntools.eq_(ones_sum(b"\x01", offset=1), 0x0001)
+
+    def _check_chunks(self, data, cuts):
+        chunks = []
+        prev = 0
+        for cut in cuts + [len(data)]:
+            chunks.append(memoryview(data)[prev:cut])
+            prev = cut
+        ntools.eq_(ones_sum(*chunks), ones_sum(data))
+
+    def test_chunks(self):
+        rand = random.Random(1)
+        data = bytes(rand.getrandbits(8) for _ in range(101))
+        for cuts in ([], [1], [1, 2], [3, 50, 51], [100]):
+            yield self._check_chunks, data, cuts
+
+
+class TestOnesAdd(object):
+    """
+    Unit tests for lib.packet.checksum.ones_add
+    """
+    def test(self):
+        ntools.eq_(ones_add(0xffff, 0x0002), 0x0002)
+        ntools.eq_(ones_add(0xffff, 0), 0xffff)
+        ntools.eq_(ones_add(0, 0), 0)
+
+
+class TestChecksum(object):
+    """
+    Unit tests for lib.packet.checksum.checksum
+    """
+    def _check(self, data):
+        ntools.eq_(checksum(data), _reference(data))
+
+    def test(self):
+        rand = random.Random(2)
+        for len_ in (0, 1, 2, 3, 20, 1001):
+            yield self._check, bytes(rand.getrandbits(8) for _ in
+                                     range(len_))
+        yield self._check, bytes(8)
+        yield self._check, bytes.fromhex("ffff")
+
+
+class TestUpdateChecksum(object):
+    """
+    Unit tests for lib.packet.checksum.update_checksum
+    """
+    def _check(self, old_hdr, new_hdr, payload):
+        old_chk = checksum(old_hdr, payload)
+        # Call
+        new_chk = update_checksum(old_chk, ones_sum(old_hdr),
+                                  ones_sum(new_hdr))
+        # Tests
+        ntools.eq_(new_chk, _reference(new_hdr + payload))
+
+    def test(self):
+        rand = random.Random(3)
+        payload = bytes(rand.getrandbits(8) for _ in range(301))
+        for _ in range(20):
+            old = bytes(rand.getrandbits(8) for _ in range(9))
+            new = bytes(rand.getrandbits(8) for _ in range(9))
+            yield self._check, old, new, payload
+        yield self._check, bytes(9), bytes.fromhex("ffff") + bytes(7), payload
+
+
+if __name__ == "__main__":
+    nose.run(defaultTest=__name__)
@@ -16,6 +16,8 @@
 ==================================================================
 """
 # Stdlib
+import copy
+import pickle
 from unittest.mock import call, patch
 
 # External packages
@@ -23,10 +25,13 @@ import nose
 import nose.tools as ntools
 
 # SCION
-from lib.packet.ext_hdr import ExtensionHeader
+from lib.packet.ext_hdr import EXT_SUBHDR, ExtensionHeader
 from lib.packet.ext_util import (
+    ExtensionList,
+    RawExtension,
     parse_extensions,
 )
+from lib.types import ExtensionClass
 from test.testcommon import assert_these_calls, create_mock
 
 
@@ -37,12 +42,11 @@ class TestParseExtensions(object):
     @patch("lib.packet.ext_util.EXTENSION_MAP", new_callable=dict)
     @patch("lib.packet.ext_util.L4Proto.L4", new_callable=list)
     def test(self, l4_protos, ext_map):
-        data = create_mock(["pop"])
-        data.pop.side_effect = (
-            bytes.fromhex("881003"), "ext0 data",
-            bytes.fromhex("011599"), "ext1 data",
-            bytes.fromhex("FF0706"), "ext1 data",
+        data = create_mock(["pop", "pop_struct"])
+        data.pop_struct.side_effect = (
+            (0x88, 0x10, 0x03), (0x01, 0x15, 0x99), (0xFF, 0x07, 0x06),
         )
+        data.pop.side_effect = "ext0 data", "ext1 data", "ext1 data"
         l4_protos.append(0xFF)
         ext0 = create_mock()
         ext1 = create_mock()
@@ -51,17 +55,96 @@ class TestParseExtensions(object):
         # Call
         ext_hdrs, hdr_type, unknown = parse_extensions(data, 7)
         # Tests
+        assert_these_calls(data.pop_struct, [call(EXT_SUBHDR)] * 3)
         assert_these_calls(data.pop, (
-            call(ExtensionHeader.SUBHDR_LEN),
             call(0x11 * ExtensionHeader.LINE_LEN - ExtensionHeader.SUBHDR_LEN),
-            call(ExtensionHeader.SUBHDR_LEN),
             call(0x16 * ExtensionHeader.LINE_LEN - ExtensionHeader.SUBHDR_LEN),
-            call(ExtensionHeader.SUBHDR_LEN),
             call(0x08 * ExtensionHeader.LINE_LEN - ExtensionHeader.SUBHDR_LEN),
         ))
+        ntools.assert_is_instance(ext_hdrs, ExtensionList)
+        ntools.eq_([(e.EXT_CLASS, e.EXT_TYPE) for e in ext_hdrs.entries],
+                   [(7, 3), (1, 6)])
+        ntools.assert_false(ext0.called)
+        ntools.assert_false(ext1.called)
         ntools.eq_(ext_hdrs, [ext0.return_value, ext1.return_value])
+        ext0.assert_called_once_with("ext0 data")
         ntools.eq_(hdr_type, 0xFF)
         ntools.eq_(unknown, {0x88: [1]})
 
+
+def _raw_ext(class_, type_, raw=b"raw data"):
+    return RawExtension(class_, type_, create_mock(), raw)
+
+
+class TestRawExtensionReduce(object):
+    """
+    Unit tests for lib.packet.ext_util.RawExtension.__reduce__
+    """
+    def test(self):
+        inst = RawExtension(1, 2, ExtensionHeader, memoryview(b"abcde"))
+        for new in copy.deepcopy(inst), pickle.loads(pickle.dumps(inst)):
+            ntools.eq_((new.EXT_CLASS, new.EXT_TYPE), (1, 2))
+            ntools.eq_(new.pack(), b"abcde")
+
+
+class TestExtensionListGetItem(object):
+    """
+    Unit tests for lib.packet.ext_util.ExtensionList.__getitem__
+    """
+    def test_parse(self):
+        raw = _raw_ext(1, 2)
+        inst = ExtensionList(["parsed", raw])
+        # Call
+        ntools.eq_(inst[1], raw._parser.return_value)
+        ntools.eq_(inst[1], raw._parser.return_value)
+        # Tests
+        raw._parser.assert_called_once_with(b"raw data")
+        ntools.eq_(inst.entries, ["parsed", raw._parser.return_value])
+
+    def test_slice(self):
+        raw = _raw_ext(1, 2)
+        inst = ExtensionList([raw, "parsed"])
+        # Call
+        ret = inst[:1]
+        # Tests
+        ntools.assert_is_instance(ret, ExtensionList)
+        ntools.eq_(ret.entries, [raw])
+        ntools.assert_false(raw._parser.called)
+
+
+class TestExtensionListHopByHop(object):
+    """
+    Unit tests for lib.packet.ext_util.ExtensionList.hop_by_hop
+    """
+    def test(self):
+        hbh = _raw_ext(ExtensionClass.HOP_BY_HOP, 1)
+        e2e = _raw_ext(ExtensionClass.END_TO_END, 1)
+        inst = ExtensionList([hbh, e2e])
+        # Call
+        ntools.eq_(list(inst.hop_by_hop()), [hbh._parser.return_value])
+        # Tests
+        ntools.assert_false(e2e._parser.called)
+        ntools.eq_(inst.entries[1], e2e)
+
+
+class TestExtensionListFind(object):
+    """
+    Unit tests for lib.packet.ext_util.ExtensionList.find
+    """
+    def test(self):
+        exts = [_raw_ext(1, 2), _raw_ext(1, 3), _raw_ext(1, 3)]
+        inst = ExtensionList(exts)
+        # Call
+        ntools.eq_(inst.find(1, 3), exts[1]._parser.return_value)
+        # Tests
+        ntools.assert_false(exts[0]._parser.called)
+        ntools.assert_false(exts[2]._parser.called)
+
+    def test_not_found(self):
+        inst = ExtensionList([_raw_ext(1, 2)])
+        # Call
+        ntools.assert_is_none(inst.find(2, 2))
+
+
 if __name__ == "__main__":
     nose.run(defaultTest=__name__)
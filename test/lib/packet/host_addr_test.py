@@ -104,12 +104,13 @@ class TestHostAddrSVCParse(object):
            return_value=None)
     def test(self, init, raw):
         inst = HostAddrSVC("")
-        pop = raw.return_value.pop
-        pop.return_value = bytes.fromhex("01 0f")
+        pop_struct = raw.return_value.pop_struct
+        pop_struct.return_value = (0x010f,)
         # Call
         inst._parse("raw")
         # Tests
         raw.assert_called_once_with("raw", "HostAddrSVC", inst.LEN)
+        ntools.eq_(pop_struct.call_args[0][0].format, "!H")
         ntools.eq_(inst.addr, 0x010f)
 
 
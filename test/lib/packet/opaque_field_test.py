@@ -32,19 +32,21 @@ class TestHopOpaqueFieldParse(object):
     """
     Unit tests for lib.packet.opaque_field.HopOpaqueField._parse
     """
+    @patch("lib.packet.opaque_field.HopOpaqueField._parse_flags",
+           autospec=True)
     @patch("lib.packet.opaque_field.Raw", autospec=True)
-    def test(self, raw):
+    def test(self, raw, parse_flags):
         inst = HopOpaqueField()
-        inst._parse_flags = create_mock()
-        data = create_mock(["pop"])
-        data.pop.side_effect = map(bytes.fromhex, ('0e 2a', '0a0b0c', '012345'))
+        data = create_mock(["pop_struct"])
+        data.pop_struct.return_value = (
+            0x0e, 0x2a, 0x0a0b, 0x0c, bytes.fromhex('012345'))
         raw.return_value = data
         # Call
         inst._parse("data")
         # Tests
         raw.assert_called_once_with("data", inst.NAME, inst.LEN)
         ntools.eq_(inst.exp_time, 0x2a)
-        inst._parse_flags.assert_called_once_with(0x0e)
+        parse_flags.assert_called_once_with(inst, 0x0e)
         ntools.eq_(inst.ingress_if, 0x0a0)
         ntools.eq_(inst.egress_if, 0xb0c)
         ntools.eq_(inst.mac, bytes.fromhex('012345'))
@@ -54,10 +56,11 @@ class TestHopOpaqueFieldPack(object):
     """
     Unit tests for lib.packet.opaque_field.HopOpaqueField.pack
     """
-    def test_basic(self):
+    @patch("lib.packet.opaque_field.HopOpaqueField._pack_flags",
+           autospec=True)
+    def test_basic(self, pack_flags):
         inst = HopOpaqueField()
-        inst._pack_flags = create_mock()
-        inst._pack_flags.return_value = 0x0e
+        pack_flags.return_value = 0x0e
         inst.exp_time = 0x2a
         inst.ingress_if = 0x0a0
         inst.egress_if = 0xb0c
@@ -66,10 +69,11 @@ class TestHopOpaqueFieldPack(object):
         # Call
         ntools.eq_(inst.pack(), expected)
 
-    def test_mac(self):
+    @patch("lib.packet.opaque_field.HopOpaqueField._pack_flags",
+           autospec=True)
+    def test_mac(self, pack_flags):
         inst = HopOpaqueField()
-        inst._pack_flags = create_mock()
-        inst._pack_flags.return_value = 0x0e
+        pack_flags.return_value = 0x0e
         inst.exp_time = 0x2a
         inst.ingress_if = 0x0a0
         inst.egress_if = 0xb0c
@@ -79,16 +83,36 @@ class TestHopOpaqueFieldPack(object):
         ntools.eq_(inst.pack(mac=True), expected)
 
 
+class TestHopOpaqueFieldPackInto(object):
+    """
+    Unit tests for lib.packet.opaque_field.HopOpaqueField.pack_into
+    """
+    @patch("lib.packet.opaque_field.HopOpaqueField._pack_flags",
+           autospec=True)
+    def test(self, pack_flags):
+        inst = HopOpaqueField()
+        pack_flags.return_value = 0x0e
+        inst.exp_time = 0x2a
+        inst.ingress_if = 0x0a0
+        inst.egress_if = 0xb0c
+        inst.mac = bytes.fromhex('012345')
+        buf = bytearray(b"\xff" * 10)
+        # Call
+        ntools.eq_(inst.pack_into(buf, 1), 9)
+        # Tests
+        ntools.eq_(buf, bytes.fromhex('ff 0e 2a 0a0b0c 012345 ff'))
+
+
 class TestHopOpaqueFieldCalcMac(object):
     """
     Unit tests for lib.packet.opaque_field.HopOpaqueField.calc_mac
     """
+    @patch("lib.packet.opaque_field.HopOpaqueField.pack", autospec=True)
     @patch("lib.packet.opaque_field.cbcmac", autospec=True)
-    def test_no_prev(self, cbcmac):
+    def test_no_prev(self, cbcmac, pack):
         inst = HopOpaqueField()
-        inst.pack = create_mock()
         pack_mac = bytes.fromhex('02 2a0a 0b0c')
-        inst.pack.return_value = pack_mac
+        pack.return_value = pack_mac
         ts = 0x01020304
         expected = b"".join([
             ts.to_bytes(4, "big"), pack_mac, bytes(7),
@@ -97,15 +121,15 @@ class TestHopOpaqueFieldCalcMac(object):
         # Call
         ntools.eq_(inst.calc_mac("key", ts), "mac")
         # Tests
-        inst.pack.assert_called_once_with(mac=True)
+        pack.assert_called_once_with(inst, mac=True)
         cbcmac.assert_called_once_with("key", expected)
 
+    @patch("lib.packet.opaque_field.HopOpaqueField.pack", autospec=True)
     @patch("lib.packet.opaque_field.cbcmac", autospec=True)
-    def test_prev(self, cbcmac):
+    def test_prev(self, cbcmac, pack):
         inst = HopOpaqueField()
-        inst.pack = create_mock()
         pack_mac = bytes.fromhex('02 2a0a 0b0c')
-        inst.pack.return_value = pack_mac
+        pack.return_value = pack_mac
         prev_pack_mac = bytes.fromhex('10 1112 1314')
         prev = create_mock_full({"pack()": prev_pack_mac})
         ts = 0x01020304
@@ -119,14 +143,26 @@ class TestHopOpaqueFieldCalcMac(object):
         cbcmac.assert_called_once_with("key", expected)
 
 
+class TestOpaqueFieldCopy(object):
+    """
+    Unit tests for lib.packet.opaque_field.OpaqueField.copy
+    """
+    def test(self):
+        inst = HopOpaqueField.from_values(63, 1, 2, b"mac", xover=True)
+        # Call
+        new = inst.copy()
+        # Tests
+        ntools.assert_is_not(new, inst)
+        ntools.eq_(new.pack(), inst.pack())
+        new.xover = False
+        ntools.ok_(inst.xover)
+
+
 def _of_list_setup():
     order = ["up", "down", "core"]
     inst = OpaqueFieldList(order)
-    inst._labels = {
-        "up": ["up0", "up1", "up2"],
-        "down": [],
-        "core": ["core0"],
-    }
+    inst.set("up", ["up0", "up1", "up2"])
+    inst.set("core", ["core0"])
     return inst
 
 
@@ -140,6 +176,10 @@ class TestOpaqueFieldListSet(object):
         inst.set("down", ["there"])
         # Tests
         ntools.eq_(inst._labels["down"], ["there"])
+        ntools.eq_(inst.get_by_idx(3), "there")
+        ntools.eq_(inst.get_label_by_idx(3), "down")
+        ntools.eq_(inst.get_idx_by_label("core"), 4)
+        ntools.eq_(len(inst), 5)
 
     def test_failure(self):
         inst = _of_list_setup()
@@ -266,6 +306,9 @@ class TestOpaqueFieldListSwap(object):
             "down": [],
             "core": ["up0", "up1", "up2"],
         })
+        ntools.eq_(inst._ofs, ["core0", "up0", "up1", "up2"])
+        ntools.eq_(inst._idx_labels, ["up", "core", "core", "core"])
+        ntools.eq_(inst.get_idx_by_label("core"), 1)
 
     def test_one_empty(self):
         inst = _of_list_setup()
@@ -290,10 +333,13 @@ class TestOpaqueFieldListReverseLabel(object):
     """
     def test_basic(self):
         inst = _of_list_setup()
+        group = inst._labels["up"]
         # Call
         inst.reverse_label("up")
         # Tests
         ntools.eq_(inst._labels["up"], ["up2", "up1", "up0"])
+        ntools.eq_(inst._ofs, ["up2", "up1", "up0", "core0"])
+        ntools.eq_(group, ["up0", "up1", "up2"])
 
     def test_label_error(self):
         inst = _of_list_setup()
@@ -307,13 +353,16 @@ class TestOpaqueFieldListReverseUpFlag(object):
     """
     def test_basic(self):
         inst = _of_list_setup()
-        iof = create_mock(["up_flag"])
-        iof.up_flag = True
-        inst._labels["down"] = [iof]
+        new_iof = create_mock(["up_flag"])
+        new_iof.up_flag = True
+        iof = create_mock_full({"copy()": new_iof})
+        inst.set("down", [iof])
         # Call
         inst.reverse_up_flag("down")
         # Tests
-        ntools.assert_false(iof.up_flag)
+        ntools.assert_false(new_iof.up_flag)
+        ntools.eq_(inst._labels["down"], [new_iof])
+        ntools.eq_(inst.get_by_idx(3), new_iof)
 
     def test_empty(self):
         inst = _of_list_setup()
@@ -326,29 +375,62 @@ class TestOpaqueFieldListReverseUpFlag(object):
         ntools.assert_raises(SCIONKeyError, inst.reverse_up_flag, "nope")
 
 
+class TestOpaqueFieldListCopy(object):
+    """
+    Unit tests for lib.packet.opaque_field.OpaqueFieldList.copy
+    """
+    def test(self):
+        inst = _of_list_setup()
+        # Call
+        new = inst.copy()
+        # Tests
+        new.set("down", ["there"])
+        new.reverse_label("up")
+        ntools.eq_(new.get_by_idx(0), "up2")
+        ntools.eq_(new.get_idx_by_label("core"), 4)
+        ntools.eq_(inst._ofs, ["up0", "up1", "up2", "core0"])
+        ntools.eq_(inst._labels["down"], [])
+        ntools.eq_(inst.get_idx_by_label("core"), 3)
+
+
 class TestOpaqueFieldListPack(object):
     """
     Unit tests for lib.packet.opaque_field.OpaqueFieldList.pack
     """
+    @patch("lib.packet.opaque_field.OpaqueFieldList.pack_into", autospec=True)
+    @patch("lib.packet.opaque_field.OpaqueFieldList.__len__", autospec=True)
+    def test(self, len_, pack_into):
+        inst = OpaqueFieldList([])
+        len_.return_value = 2
+
+        def _pack_into(inst_, buf):
+            buf[:] = bytes(range(16))
+        pack_into.side_effect = _pack_into
+        # Call
+        ntools.eq_(inst.pack(), bytes(range(16)))
+
+
+class TestOpaqueFieldListPackInto(object):
+    """
+    Unit tests for lib.packet.opaque_field.OpaqueFieldList.pack_into
+    """
     def test_basic(self):
         order = ["a", "b", "c", "d"]
         inst = OpaqueFieldList(order)
         ofs = []
         for i in range(5):
-            of = create_mock(["pack"])
-            of.pack.return_value = bytes([i])
+            of = create_mock(["pack_into"])
+            of.pack_into.return_value = 10 + i
             ofs.append(of)
-        inst._labels = {
-            "a": ofs[:2],
-            "b": [],
-            "c": [ofs[2]],
-            "d": ofs[3:],
-        }
-        # Call
-        ntools.eq_(inst.pack(), bytes(range(5)))
+        inst.set("a", ofs[:2])
+        inst.set("c", [ofs[2]])
+        inst.set("d", ofs[3:])
+        # Call
+        ntools.eq_(inst.pack_into("buf", 3), 14)
         # Tests
-        for of in ofs:
-            of.pack.assert_called_once_with()
+        ofs[0].pack_into.assert_called_once_with("buf", 3)
+        for i, of in enumerate(ofs[1:]):
+            of.pack_into.assert_called_once_with("buf", 10 + i)
 
 
 class TestOpaqueFieldListCount(object):
@@ -375,5 +457,6 @@ class TestOpaqueFieldListLen(object):
         # Call
         ntools.eq_(len(inst), 4)
 
+
 if __name__ == "__main__":
     nose.run(defaultTest=__name__)
@@ -0,0 +1,167 @@
+# Copyright 2015 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`lib_packet_packet_base_test` --- lib.packet.packet_base unit tests
+========================================================================
+"""
+# Stdlib
+import copy
+import pickle
+from unittest.mock import patch
+
+# External packages
+import capnp  # noqa
+import nose
+import nose.tools as ntools
+
+# SCION
+import proto.rev_info_capnp as P
+from lib.packet.packet_base import (
+    PayloadRaw,
+    SCIONPayloadBaseProto,
+)
+
+
+class _Payload(SCIONPayloadBaseProto):
+    NAME = "Payload"
+    P_CLS = P.RevInfo
+
+    def from_values(self):  # pragma: no cover
+        raise NotImplementedError
+
+
+def _raw(if_id=1):
+    return P.RevInfo.new_message(ifID=if_id, epoch=2).to_bytes_packed()
+
+
+class TestCerealizableFromRaw(object):
+    """
+    Unit tests for lib.packet.packet_base.Cerealizable.from_raw
+    """
+    def test(self):
+        raw = _raw()
+        # Call
+        inst = _Payload.from_raw(raw)
+        # Tests
+        ntools.assert_false(inst._is_builder())
+        ntools.eq_(inst.p.ifID, 1)
+        ntools.assert_is(inst.pack(), raw)
+        ntools.assert_is(inst.pack(), raw)
+
+
+class TestCerealizableWritable(object):
+    """
+    Unit tests for lib.packet.packet_base.Cerealizable.writable
+    """
+    def test_reader(self):
+        inst = _Payload.from_raw(_raw())
+        inst._raw_full = b"full"
+        # Call
+        inst.writable().ifID = 5
+        # Tests
+        ntools.ok_(inst._is_builder())
+        ntools.assert_is_none(inst._raw_full)
+        ntools.eq_(inst.pack(), _raw(5))
+
+    def test_builder(self):
+        inst = _Payload(P.RevInfo.new_message(ifID=1, epoch=2))
+        p = inst.p
+        inst.pack()
+        # Call
+        ntools.assert_is(inst.writable(), p)
+        # Tests
+        p.ifID = 5
+        ntools.eq_(inst.pack(), _raw(5))
+
+
+class TestCerealizableDetach(object):
+    """
+    Unit tests for lib.packet.packet_base.Cerealizable.detach
+    """
+    def test_reader(self):
+        raw = P.RevInfo.new_message(nonce=bytes(1 << 20)).to_bytes_packed()
+        inst = _Payload.from_raw(raw)
+        # Call
+        inst.detach()
+        # Tests
+        ntools.ok_(inst._is_builder())
+        ntools.assert_is(inst.pack(), raw)
+        # A reader of this message can only be read 63 times.
+        for _ in range(200):
+            ntools.eq_(len(inst.p.nonce), 1 << 20)
+
+    def test_builder(self):
+        inst = _Payload(P.RevInfo.new_message(ifID=1, epoch=2))
+        p = inst.p
+        # Call
+        inst.detach()
+        # Tests
+        ntools.assert_is(inst.p, p)
+
+
+class TestCerealizableCopy(object):
+    """
+    Unit tests for lib.packet.packet_base.Cerealizable.copy
+    """
+    def test_reader(self):
+        raw = _raw()
+        inst = _Payload.from_raw(raw)
+        # Call
+        new = inst.copy()
+        # Tests
+        ntools.assert_is(new.p, inst.p)
+        ntools.assert_is(new.pack(), raw)
+        new.writable().ifID = 5
+        ntools.eq_(inst.p.ifID, 1)
+
+    def test_builder(self):
+        inst = _Payload(P.RevInfo.new_message(ifID=1, epoch=2))
+        # Call
+        new = copy.deepcopy(inst)
+        # Tests
+        new.writable().ifID = 5
+        ntools.eq_(inst.p.ifID, 1)
+        ntools.eq_(inst.pack(), _raw())
+
+
+class TestSCIONPayloadBaseProtoPackFull(object):
+    """
+    Unit tests for lib.packet.packet_base.SCIONPayloadBaseProto.pack_full
+    """
+    @patch("lib.packet.packet_base.SCIONPayloadBaseProto._pack_full",
+           autospec=True)
+    def test(self, pack_full):
+        inst = _Payload.from_raw(_raw())
+        # Call
+        ntools.eq_(inst.pack_full(), pack_full.return_value)
+        ntools.eq_(inst.pack_full(), pack_full.return_value)
+        # Tests
+        pack_full.assert_called_once_with(inst, inst.p)
+        inst.writable()
+        inst.pack_full()
+        ntools.eq_(pack_full.call_count, 2)
+
+
+class TestPayloadRawGetState(object):
+    """
+    Unit tests for lib.packet.packet_base.PayloadRaw.__getstate__
+    """
+    def test(self):
+        inst = PayloadRaw(memoryview(b"payload"))
+        for new in copy.deepcopy(inst), pickle.loads(pickle.dumps(inst)):
+            ntools.eq_(new.pack(), b"payload")
+
+
+if __name__ == "__main__":
+    nose.run(defaultTest=__name__)
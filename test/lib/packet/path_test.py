@@ -119,6 +119,26 @@ class TestSCIONPathSetOfs(object):
             yield self._check, val, exp
 
 
+class TestSCIONPathCopy(object):
+    """
+    Unit tests for lib.packet.path.SCIONPath.copy
+    """
+    def test(self):
+        inst = SCIONPath()
+        inst._ofs = create_mock(["copy"])
+        inst.set_of_idxs(1, 2)
+        inst.interfaces = ["if"]
+        inst.mtu = 1400
+        # Call
+        new = inst.copy()
+        # Tests
+        ntools.eq_(new._ofs, inst._ofs.copy.return_value)
+        ntools.eq_(new.get_of_idxs(), (1, 2))
+        ntools.eq_(new.interfaces, ["if"])
+        ntools.assert_is_not(new.interfaces, inst.interfaces)
+        ntools.eq_(new.mtu, 1400)
+
+
 class TestSCIONPathInitOfIdxs(object):
     """
     Unit tests for lib.packet.path.SCIONPath._init_of_idxs
@@ -466,14 +486,76 @@ class TestPathCombinatorBuildShortcutPaths(object):
     def test(self, build_path):
         up_segments = ['up0', 'up1']
         down_segments = ['down0', 'down1']
-        build_path.side_effect = [['path0'], ['path1'], [], ['path1']]
+        paths = []
+        for fingerprint in "path0", "path1", "path1":
+            paths.append(create_mock_full({"fingerprint()": fingerprint}))
+        build_path.side_effect = [[paths[0]], [paths[1]], [], [paths[2]]]
         ntools.eq_(
             PathCombinator.build_shortcut_paths(up_segments, down_segments),
-            ["path0", "path1"])
+            paths[:2])
         calls = [call(*x) for x in product(up_segments, down_segments)]
         assert_these_calls(build_path, calls)
 
 
+class TestPathCombinatorIterPaths(object):
+    """
+    Unit tests for lib.packet.path.PathCombinator.iter_paths
+    """
+    @patch("lib.packet.path.PathCombinator._build_full_path",
+           new_callable=create_mock)
+    @patch("lib.packet.path.PathCombinator._full_path_candidates",
+           new_callable=create_mock)
+    @patch("lib.packet.path.PathCombinator._shortcut_candidates",
+           new_callable=create_mock)
+    def _check(self, k, expected, shortcuts, full_paths, build):
+        short_path = SCIONPath()
+        shortcuts.return_value = iter([((2, 0), short_path)])
+        full_paths.return_value = iter([
+            ((3, 0), ("up0", None, "down0")),
+            ((1, 0), ("up0", "core0", "down0")),
+            ((2, 0), ("up1", None, "down1")),
+        ])
+        build.side_effect = lambda *segs: segs
+        # Call
+        paths = list(PathCombinator.iter_paths("ups", "cores", "downs", k=k))
+        # Tests
+        shortcuts.assert_called_once_with("ups", "downs")
+        full_paths.assert_called_once_with("ups", "cores", "downs")
+        ntools.eq_([None if p is short_path else p for p in paths], expected)
+        ntools.eq_(build.call_count, len(expected) - expected.count(None))
+
+    def test(self):
+        all_paths = [("up0", "core0", "down0"), None, ("up1", None, "down1"),
+                     ("up0", None, "down0")]
+        for k in None, 0, 1, 2, 3, 10:
+            yield self._check, k, all_paths[:k]
+
+
+class TestPathCombinatorFullPathCandidates(object):
+    """
+    Unit tests for lib.packet.path.PathCombinator._full_path_candidates
+    """
+    def _mk_seg(self, first_ia, last_ia=None):
+        return create_mock_full({"first_ia()": first_ia,
+                                 "last_ia()": last_ia})
+
+    @patch("lib.packet.path.PathCombinator._full_path_cost",
+           new_callable=create_mock)
+    def test(self, cost):
+        ups = [self._mk_seg(1), self._mk_seg(2)]
+        downs = [self._mk_seg(1), self._mk_seg(3)]
+        cores = [self._mk_seg(3, 1), self._mk_seg(1, 2), self._mk_seg(3, 1)]
+        cost.side_effect = lambda *segs: len(segs)
+        # Call
+        ntools.eq_(list(PathCombinator._full_path_candidates(
+            ups, cores, downs)), [
+                (2, (ups[0], None, downs[0])),
+                (3, (ups[0], cores[0], downs[1])),
+                (3, (ups[0], cores[2], downs[1])),
+                (3, (ups[1], cores[1], downs[0])),
+            ])
+
+
 class TestPathCombinatorBuildShortcuts(PathCombinatorBase):
     """
     Unit tests for lib.packet.path.PathCombinator._build_shortcuts
@@ -543,104 +625,114 @@ class TestPathCombinatorCopySegment(object):
         ntools.eq_(PathCombinator._copy_segment(None, False, False, "xovrs"),
                    (None, None, float("inf")))
 
+    @patch("lib.packet.path.PathCombinator._set_xover",
+           new_callable=create_mock)
     @patch("lib.packet.path.PathCombinator._copy_hofs",
            new_callable=create_mock)
-    @patch("lib.packet.path.copy.deepcopy", autospec=True)
-    def test_copy_up(self, deepcopy, copy_hofs):
-        seg = create_mock(["iter_asms", "info"])
+    def test_copy_up(self, copy_hofs, set_xover):
+        seg = create_mock(["info"])
+        seg.info = create_mock(["copy"])
         info = create_mock(["up_flag"])
-        deepcopy.return_value = info
-        hofs = []
-        for _ in range(3):
-            hof = create_mock(["xover"])
-            hof.xover = False
-            hofs.append(hof)
-        copy_hofs.return_value = hofs, None
+        seg.info.copy.return_value = info
+        copy_hofs.return_value = "hofs", None
         # Call
         ntools.eq_(PathCombinator._copy_segment(seg, True, True),
-                   (info, hofs, None))
+                   (info, "hofs", None))
         # Tests
-        deepcopy.assert_called_once_with(seg.info)
         ntools.eq_(info.up_flag, True)
-        copy_hofs.assert_called_once_with(seg.iter_asms.return_value,
-                                          reverse=True)
-        ntools.eq_(hofs[0].xover, True)
-        ntools.eq_(hofs[1].xover, False)
-        ntools.eq_(hofs[2].xover, True)
+        copy_hofs.assert_called_once_with(seg, reverse=True)
+        assert_these_calls(set_xover, [call("hofs", 0), call("hofs", -1)])
 
+    @patch("lib.packet.path.PathCombinator._set_xover",
+           new_callable=create_mock)
     @patch("lib.packet.path.PathCombinator._copy_hofs",
            new_callable=create_mock)
-    @patch("lib.packet.path.copy.deepcopy", autospec=True)
-    def test_copy_down(self, deepcopy, copy_hofs):
-        seg = create_mock(["iter_asms", "info"])
+    def test_copy_down(self, copy_hofs, set_xover):
+        seg = create_mock(["info"])
+        seg.info = create_mock(["copy"])
         info = create_mock(["up_flag"])
-        deepcopy.return_value = info
+        seg.info.copy.return_value = info
         copy_hofs.return_value = "hofs", None
         # Call
         ntools.eq_(PathCombinator._copy_segment(seg, False, False, up=False),
                    (info, "hofs", None))
         # Tests
-        copy_hofs.assert_called_once_with(seg.iter_asms.return_value,
-                                          reverse=False)
+        ntools.eq_(info.up_flag, False)
+        copy_hofs.assert_called_once_with(seg, reverse=False)
+        ntools.assert_false(set_xover.called)
 
 
 class TestPathCombinatorGetXovrPeer(object):
     """
     Unit tests for lib.packet.path.PathCombinator._get_xovr_peer
     """
-    def test_none(self):
-        seg = create_mock_full({"iter_asms()": [],
-                                "get_rev_map()": {}})
+    def _mk_seg(self, ias, peer_ias=None):
+        ia_idxs = {}
+        for i, isd_as in enumerate(ias):
+            ia_idxs.setdefault(isd_as, []).append(i)
+        return create_mock_full({
+            "get_ias()": ias, "get_ia_idxs()": ia_idxs,
+            "get_peer_ias()": peer_ias or [set()] * len(ias),
+        })
+
+    @patch("lib.packet.path.PathCombinator._best_peer",
+           new_callable=create_mock)
+    def test_none(self, best_peer):
+        seg = self._mk_seg([])
+        best_peer.return_value = None
         # Call
         ntools.eq_(PathCombinator._get_xovr_peer(seg, seg), (None, None))
+        # Tests
+        best_peer.assert_called_once_with(seg, seg, [])
 
-    @patch("lib.packet.path.PathCombinator._find_peer_hfs",
+    @patch("lib.packet.path.PathCombinator._best_peer",
            new_callable=create_mock)
-    def test_xovr(self, find):
-        up_asms = [
-            create_mock_full({"isd_as()": "1-1"}),
-            create_mock_full({"isd_as()": "1-2"}),
-            create_mock_full({"isd_as()": "1-3"}),
-        ]
-        up_seg = create_mock_full({"iter_asms()": up_asms,
-                                   "get_rev_map()": {}})
-        down_asms = [
-            create_mock_full({"isd_as()": "1-1"}),
-            create_mock_full({"isd_as()": "1-2"}),
-            create_mock_full({"isd_as()": "1-4"}),
-        ]
-        down_seg = create_mock_full({"iter_asms()": down_asms,
-                                     "get_rev_map()": {}})
-        find.return_value = False
+    def test_xovr(self, best_peer):
+        up_seg = self._mk_seg(["1-1", "1-2", "1-3", "1-4"])
+        down_seg = self._mk_seg(["1-1", "1-2", "1-4", "1-3"])
         # Call
         ntools.eq_(PathCombinator._get_xovr_peer(up_seg, down_seg),
-                   ((2, 2), None))
+                   ((2, 3), best_peer.return_value))
 
-    @patch("lib.packet.path.PathCombinator._find_peer_hfs",
+    @patch("lib.packet.path.PathCombinator._best_peer",
            new_callable=create_mock)
-    def test_peer(self, find):
-        up_asms = [
-            create_mock_full({"isd_as()": "1-1"}),  # peers with 1-10
-            create_mock_full({"isd_as()": "1-2"}),  # peers with 1-12
-            create_mock_full({"isd_as()": "1-3"}),
-        ]
-        up_seg = create_mock_full({"iter_asms()": up_asms,
-                                   "get_rev_map()": {}})
-        down_asms = [
-            create_mock_full({"isd_as()": "1-10"}),  # peers with 1-1
-            create_mock_full({"isd_as()": "1-11"}),
-            create_mock_full({"isd_as()": "1-12"}),  # peers with 1-2
-        ]
-        down_seg = create_mock_full({"iter_asms()": down_asms,
-                                     "get_rev_map()": {}})
-
-        def matching_peers(a, b, c, d):
-            return (a == up_asms[0] and b == down_asms[0]) or (
-                a == up_asms[1] and b == down_asms[2])
-        find.side_effect = matching_peers
+    def test_peer(self, best_peer):
+        up_seg = self._mk_seg(["1-1", "1-2", "1-3", "1-4"], [
+            {"1-13"}, {"1-12", "1-14"}, {"1-11"}, {"1-11"}])
+        down_seg = self._mk_seg(["1-11", "1-12", "1-13", "1-14"], [
+            {"1-3"}, {"1-2"}, {"1-1"}, set()])
         # Call
         ntools.eq_(PathCombinator._get_xovr_peer(up_seg, down_seg),
-                   (None, (2, 3)))
+                   (None, best_peer.return_value))
+        # Tests
+        best_peer.assert_called_once_with(up_seg, down_seg, [(1, 1)])
+
+
+class TestPathCombinatorBestPeer(object):
+    """
+    Unit tests for lib.packet.path.PathCombinator._best_peer
+    """
+    @patch("lib.packet.path.PathCombinator._find_peer_hfs",
+           new_callable=create_mock)
+    def _check(self, points, usable, expected, find):
+        up_seg = create_mock_full({"asm()...": lambda i: i,
+                                   "get_rev_map()": "up revs"})
+        down_seg = create_mock_full({"asm()...": lambda i: i,
+                                     "get_rev_map()": "down revs"})
+        find.side_effect = lambda up, down, *_: (up, down) in usable
+        # Call
+        ntools.eq_(PathCombinator._best_peer(up_seg, down_seg, points),
+                   expected)
+
+    def test(self):
+        for points, usable, expected in (
+            ([], [], None),
+            ([(1, 2)], [], None),
+            ([(1, 2), (2, 2), (3, 1)], [(1, 2), (2, 2), (3, 1)], (2, 2)),
+            ([(1, 2), (2, 2), (3, 1)], [(1, 2), (3, 1)], (3, 1)),
+            ([(1, 2), (2, 2), (3, 1)], [(1, 2)], (1, 2)),
+        ):
+            yield self._check, points, usable, expected
 
 
 class PathCombinatorJoinShortcutsBase(object):
@@ -832,74 +924,90 @@ class TestPathCombinatorCopyHofs(object):
     """
     Unit tests for lib.packet.path.PathCombinator._copy_hofs
     """
+    def _mk_seg(self):
+        hofs = [0, 1, 2, 3]
+        mtus = [((i + 1) * 2, (i + 1) * 0.5) for i in range(4)]
+        return hofs, create_mock_full({"get_hofs()": hofs, "get_mtus()": mtus})
+
     def test_full(self):
-        asms = []
-        for i in range(4):
-            pcbm = create_mock(["hof", "p"])
-            pcbm.hof.return_value = i
-            pcbm.p = create_mock(["inMTU"])
-            pcbm.p.inMTU = (i + 1) * 2
-            asm = create_mock(["pcbm", "p"])
-            asm.pcbm.return_value = pcbm
-            asm.p = create_mock(["mtu"])
-            asm.p.mtu = (i + 1) * 0.5
-            asms.append(asm)
+        hofs, seg = self._mk_seg()
+        # Call
+        ntools.eq_(PathCombinator._copy_hofs(seg), ([3, 2, 1, 0], 0.5))
+        # Tests
+        ntools.eq_(hofs, [0, 1, 2, 3])
+
+    def test_start(self):
+        _, seg = self._mk_seg()
+        # Call
+        ntools.eq_(PathCombinator._copy_hofs(seg, 2, reverse=False),
+                   ([2, 3], 1.5))
+
+
+class TestPathCombinatorSetXover(object):
+    """
+    Unit tests for lib.packet.path.PathCombinator._set_xover
+    """
+    def test(self):
+        hof = create_mock(["copy"])
+        new = create_mock(["xover"])
+        hof.copy.return_value = new
+        hofs = ["a", hof]
         # Call
-        ntools.eq_(PathCombinator._copy_hofs(asms), ([3, 2, 1, 0], 0.5))
+        PathCombinator._set_xover(hofs, -1)
+        # Tests
+        ntools.eq_(hofs, ["a", new])
+        ntools.eq_(new.xover, True)
 
 
 class TestPathCombinatorCopySegmentShortcut(object):
     """
     Unit tests for lib.packet.path.PathCombinator._copy_segment_shortcut
     """
-    def _setup(self, deepcopy, copy_hofs):
+    def _setup(self, copy_hofs):
         info = create_mock(["hops", "up_flag"])
         info.hops = 10
         upstream_hof = create_mock(["verify_only", "xover"])
-        pcbm = create_mock(["hof"])
-        pcbm.hof.return_value = upstream_hof
-        asm = create_mock(["pcbm"])
-        asm.pcbm.return_value = pcbm
-        seg = create_mock(["asm", "info", "iter_asms"])
-        seg.asm.return_value = asm
-        hofs = []
-        for _ in range(6):
-            hofs.append(create_mock(["xover"]))
-        copy_hofs.return_value = hofs, "mtu"
-        deepcopy.side_effect = info, upstream_hof
-        return seg, info, hofs, upstream_hof
-
+        seg_hofs = []
+        for i in range(10):
+            seg_hofs.append(create_mock_full({"copy()": upstream_hof}))
+        seg = create_mock(["get_hofs", "info"])
+        seg.info = create_mock_full({"copy()": info})
+        seg.get_hofs.return_value = seg_hofs
+        copy_hofs.return_value = "hofs", "mtu"
+        return seg, info, upstream_hof, seg_hofs
+
+    @patch("lib.packet.path.PathCombinator._set_xover",
+           new_callable=create_mock)
     @patch("lib.packet.path.PathCombinator._copy_hofs",
            new_callable=create_mock)
-    @patch("lib.packet.path.copy.deepcopy", new_callable=create_mock)
-    def test_up(self, deepcopy, copy_hofs):
-        seg, info, hofs, upstream_hof = self._setup(deepcopy, copy_hofs)
+    def test_up(self, copy_hofs, set_xover):
+        seg, info, upstream_hof, seg_hofs = self._setup(copy_hofs)
         # Call
         ntools.eq_(PathCombinator._copy_segment_shortcut(seg, 4),
-                   (info, hofs, upstream_hof, "mtu"))
+                   (info, "hofs", upstream_hof, "mtu"))
         # Tests
-        deepcopy.assert_called_once_with(seg.info)
         ntools.eq_(info.hops, 6)
         ntools.ok_(info.up_flag)
-        copy_hofs.assert_called_once_with(seg.iter_asms.return_value,
-                                          reverse=True)
-        ntools.eq_(hofs[-1].xover, True)
+        copy_hofs.assert_called_once_with(seg, 4, reverse=True)
+        set_xover.assert_called_once_with("hofs", -1)
+        seg_hofs[3].copy.assert_called_once_with()
         ntools.eq_(upstream_hof.xover, False)
         ntools.eq_(upstream_hof.verify_only, True)
 
+    @patch("lib.packet.path.PathCombinator._set_xover",
+           new_callable=create_mock)
     @patch("lib.packet.path.PathCombinator._copy_hofs",
            new_callable=create_mock)
-    @patch("lib.packet.path.copy.deepcopy", new_callable=create_mock)
-    def test_down(self, deepcopy, copy_hofs):
-        seg, info, hofs, upstream_hof = self._setup(deepcopy, copy_hofs)
+    def test_down(self, copy_hofs, set_xover):
+        seg, info, upstream_hof, seg_hofs = self._setup(copy_hofs)
         # Call
         ntools.eq_(PathCombinator._copy_segment_shortcut(seg, 7, up=False),
-                   (info, hofs, upstream_hof, "mtu"))
+                   (info, "hofs", upstream_hof, "mtu"))
         # Tests
         ntools.assert_false(info.up_flag)
-        copy_hofs.assert_called_once_with(seg.iter_asms.return_value,
-                                          reverse=False)
-        ntools.eq_(hofs[0].xover, True)
+        copy_hofs.assert_called_once_with(seg, 7, reverse=False)
+        set_xover.assert_called_once_with("hofs", 0)
+        seg_hofs[6].copy.assert_called_once_with()
         ntools.eq_(upstream_hof.verify_only, True)
 
 
@@ -21,6 +21,7 @@ from unittest.mock import patch
 # External packages
 import nose
 import nose.tools as ntools
+from Crypto.Hash import SHA256
 
 # SCION
 from lib.packet.pcb import ASMarking, PCBMarking, PathSegment
@@ -122,13 +123,10 @@ class TestPathSegmentGetPath(object):
     Unit test for lib.packet.pcb.PathSegment.get_path
     """
     def _setup(self):
-        asms = []
-        for i in range(3):
-            pcbm = create_mock_full({"hof()": "hof %d" % i})
-            asms.append(create_mock_full({"pcbm()": pcbm}))
         info = create_mock_full({"up_flag": True})
         inst = PathSegment(create_mock_full({"info": info}))
-        inst.iter_asms = create_mock_full(return_value=asms)
+        inst.get_hofs = create_mock_full(
+            return_value=["hof 0", "hof 1", "hof 2"])
         return inst
 
     @patch("lib.packet.pcb.SCIONPath", autospec=True)
@@ -155,6 +153,68 @@ class TestPathSegmentGetPath(object):
         scion_path.from_values.assert_called_once_with(
             inst.p.info, ["hof 2", "hof 1", "hof 0"])
         ntools.eq_(inst.p.info.up_flag, False)
+        ntools.eq_(inst.get_hofs(), ["hof 0", "hof 1", "hof 2"])
+
+
+class TestPathSegmentGetHopsHash(object):
+    """
+    Unit tests for lib.packet.pcb.PathSegment.get_hops_hash
+    """
+    def _mk_asm(self, isd_as, in_if, out_if):
+        pcbm = create_mock_full({"p": create_mock_full({
+            "inIF": in_if, "outIF": out_if})})
+        return create_mock_full({
+            "isd_as()": create_mock_full({"pack()": isd_as}),
+            "pcbm()": pcbm})
+
+    @patch("lib.packet.pcb.PathSegment._setup", autospec=True)
+    def test(self, _):
+        inst = PathSegment(create_mock_full())
+        inst.iter_asms = create_mock_full(return_value=[
+            self._mk_asm(_ISD_AS1_BYTES, 0, 1),
+            self._mk_asm(_ISD_AS2_BYTES, 2, 0)])
+        expected = SHA256.new(b"".join([
+            _ISD_AS1_BYTES, bytes.fromhex("0000000000000000 0000000000000001"),
+            _ISD_AS2_BYTES, bytes.fromhex("0000000000000002 0000000000000000"),
+        ]))
+        # Call
+        ntools.eq_(inst.get_hops_hash(), expected.digest())
+        ntools.eq_(inst.get_hops_hash(hex=True), expected.hexdigest())
+        ntools.eq_(inst.get_hops_hash(), expected.digest())
+        # Tests
+        inst.iter_asms.assert_called_once_with()
+
+
+class TestPathSegmentGetIaIdxs(object):
+    """
+    Unit tests for lib.packet.pcb.PathSegment.get_ia_idxs
+    """
+    @patch("lib.packet.pcb.PathSegment._setup", autospec=True)
+    def test(self, _):
+        inst = PathSegment(create_mock_full())
+        inst.get_ias = create_mock_full(return_value=["1-1", "1-2", "1-1"])
+        # Call
+        ntools.eq_(inst.get_ia_idxs(), {"1-1": [0, 2], "1-2": [1]})
+        ntools.eq_(inst.get_ia_idxs(), {"1-1": [0, 2], "1-2": [1]})
+        # Tests
+        inst.get_ias.assert_called_once_with()
+
+
+class TestPathSegmentWritable(object):
+    """
+    Unit tests for lib.packet.pcb.PathSegment.writable
+    """
+    @patch("lib.packet.pcb.SCIONPayloadBaseProto.writable", autospec=True)
+    @patch("lib.packet.pcb.PathSegment._setup", autospec=True)
+    def test(self, _, super_writable):
+        inst = PathSegment(create_mock_full())
+        inst._calc_hops_hash = create_mock_full(side_effect=[b"1", b"2"])
+        ntools.eq_(inst.get_hops_hash(), b"1")
+        # Call
+        ntools.eq_(inst.writable(), super_writable.return_value)
+        # Tests
+        super_writable.assert_called_once_with(inst)
+        ntools.eq_(inst.get_hops_hash(), b"2")
 
 
 if __name__ == "__main__":
@@ -16,6 +16,8 @@
 ======================================================================
 """
 # Stdlib
+import copy
+import pickle
 from unittest.mock import call, patch
 
 # External packages
@@ -24,6 +26,7 @@ import nose.tools as ntools
 
 # SCION
 from lib.errors import SCIONParseError
+from lib.packet.host_addr import HostAddrIPv4
 from lib.packet.scion_addr import SCIONAddr, ISD_AS
 from test.testcommon import assert_these_calls, create_mock
 
@@ -34,16 +37,14 @@ class TestISDASParseBytes(object):
     """
     @patch("lib.packet.scion_addr.Raw", autospec=True)
     def test(self, raw):
-        inst = ISD_AS()
-        data = create_mock(["pop"])
-        data.pop.return_value = bytes.fromhex("11122222")
+        data = create_mock(["pop_struct"])
+        data.pop_struct.side_effect = lambda st: st.unpack(
+            bytes.fromhex("11122222"))
         raw.return_value = data
         # Call
-        inst._parse_bytes("data")
+        ntools.eq_(ISD_AS._parse_bytes("data"), 0x11122222)
         # Tests
         raw.assert_called_once_with("data", ISD_AS.NAME, ISD_AS.LEN)
-        ntools.eq_(inst._isd, 0x111)
-        ntools.eq_(inst._as, 0x22222)
 
 
 class TestISDASParseStr(object):
@@ -51,46 +52,85 @@ class TestISDASParseStr(object):
     Unit tests for lib.packet.scion_addr.ISD_AS._parse_str
     """
     def test_success(self):
-        inst = ISD_AS()
         # Call
-        inst._parse_str("1-99")
-        # Tests
-        ntools.eq_(inst._isd, 1)
-        ntools.eq_(inst._as, 99)
+        ntools.eq_(ISD_AS._parse_str("1-99"), 1 << 20 | 99)
 
     def _check_excp(self, isd_as):
-        inst = ISD_AS()
         # Call
-        ntools.assert_raises(SCIONParseError, inst._parse_str, isd_as)
+        ntools.assert_raises(SCIONParseError, ISD_AS._parse_str, isd_as)
 
     def test_excp(self):
         for isd_as in ("0-nope", "argh-99"):
             yield self._check_excp, isd_as
 
 
-class TestISDASParseInt(object):
+class TestISDASPack(object):
     """
-    Unit tests for lib.packet.scion_addr.ISD_AS._parse_int
+    Unit tests for lib.packet.scion_addr.ISD_AS.pack
     """
     def test(self):
-        inst = ISD_AS()
+        inst = ISD_AS.from_values(0x111, 0x22222)
         # Call
-        inst._parse_int(0xAAAFFFFF)
+        ntools.eq_(inst.pack(), bytes.fromhex("11122222"))
+
+
+class TestISDASNew(object):
+    """
+    Unit tests for lib.packet.scion_addr.ISD_AS.__new__
+    """
+    def test_fields(self):
+        inst = ISD_AS(0xAAAFFFFF)
         # Tests
-        ntools.eq_(inst._isd, 0xAAA)
-        ntools.eq_(inst._as, 0xFFFFF)
+        ntools.eq_(inst[0], 0xAAA)
+        ntools.eq_(inst[1], 0xFFFFF)
+        ntools.eq_(int(inst), 0xAAAFFFFF)
 
+    def test_interned(self):
+        inst = ISD_AS("1-11")
+        # Tests
+        for other in (ISD_AS("1-11"), ISD_AS(bytes.fromhex("0010000b")),
+                      ISD_AS(0x0010000b), ISD_AS.from_values(1, 11),
+                      copy.deepcopy(inst), pickle.loads(pickle.dumps(inst))):
+            ntools.assert_is(other, inst)
+        ntools.assert_is_not(ISD_AS("1-12"), inst)
+
+    def test_empty(self):
+        ntools.assert_is(ISD_AS(), ISD_AS.from_values(0, 0))
+
+    def test_subclass(self):
+        class Sub(ISD_AS):
+            pass
+        inst = Sub("1-11")
+        # Tests
+        ntools.assert_is_instance(inst, Sub)
+        ntools.assert_is_instance(ISD_AS("1-11"), ISD_AS)
+        ntools.assert_not_is_instance(ISD_AS("1-11"), Sub)
+        ntools.eq_(inst, ISD_AS("1-11"))
 
-class TestISDASPack(object):
+
+class TestISDASImmutable(object):
     """
-    Unit tests for lib.packet.scion_addr.ISD_AS.pack
+    Unit tests for lib.packet.scion_addr.ISD_AS.__setattr__
     """
     def test(self):
-        inst = ISD_AS()
-        inst._isd = 0x111
-        inst._as = 0x22222
+        inst = ISD_AS("1-11")
         # Call
-        ntools.eq_(inst.pack(), bytes.fromhex("11122222"))
+        ntools.assert_raises(AttributeError, setattr, inst, "_int", 0)
+        # Tests
+        ntools.eq_(int(inst), 0x0010000b)
+
+
+class TestISDASHash(object):
+    """
+    Unit tests for lib.packet.scion_addr.ISD_AS.__hash__ and __eq__
+    """
+    def test(self):
+        d = {ISD_AS("1-11"): "a", ISD_AS("2-11"): "b"}
+        # Tests
+        ntools.eq_(d[ISD_AS.from_values(1, 11)], "a")
+        ntools.eq_(d[ISD_AS.from_values(2, 11)], "b")
+        ntools.assert_not_in(ISD_AS("1-12"), d)
+        ntools.assert_not_equal(ISD_AS("1-11"), "1-11")
 
 
 class TestSCIONAddrParse(object):
@@ -124,5 +164,26 @@ class TestSCIONAddrParse(object):
         ntools.eq_(inst.host, haddr_type.return_value)
 
 
+class TestSCIONAddrCopy(object):
+    """
+    Copying and pickling of lib.packet.scion_addr.SCIONAddr, which (like its
+    host address) has no instance __dict__.
+    """
+    def _check(self, func):
+        inst = SCIONAddr.from_values(ISD_AS("1-11"), HostAddrIPv4("10.0.0.1"))
+        # Call
+        new = func(inst)
+        # Tests
+        ntools.assert_is_not(new, inst)
+        ntools.assert_is_not(new.host, inst.host)
+        ntools.assert_is(new.isd_as, inst.isd_as)
+        ntools.eq_(new, inst)
+        ntools.eq_(new.pack(), inst.pack())
+
+    def test(self):
+        yield self._check, copy.deepcopy
+        yield self._check, lambda x: pickle.loads(pickle.dumps(x))
+
+
 if __name__ == "__main__":
     nose.run(defaultTest=__name__)
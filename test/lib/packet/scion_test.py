@@ -57,15 +57,27 @@ from lib.types import (
 from test.testcommon import assert_these_calls, create_mock, create_mock_full
 
 
+def _pack_into(raw):
+    """
+    Returns a pack_into() side effect, which packs `raw`.
+    """
+    def _f(buf, offset, *args):
+        end = offset + len(raw)
+        buf[offset:end] = raw
+        return end
+    return _f
+
+
 class TestSCIONCommonHdrParse(object):
     """
     Unit tests for lib.packet.scion.SCIONCommonHdr._parse
     """
     def _setup(self, first_b=0b00001111):
         inst = SCIONCommonHdr()
-        data = create_mock(["pop"])
-        data.pop.return_value = bytes([first_b, 0b00111111]) + \
-            bytes.fromhex('0304 38 40 07 20')
+        data = create_mock(["pop_struct"])
+        data.pop_struct.side_effect = lambda st: st.unpack(
+            bytes([first_b, 0b00111111]) +
+            bytes.fromhex('0304 38 40 07 20'))
         return inst, data
 
     @patch("lib.packet.scion.Raw", autospec=True)
@@ -218,8 +230,6 @@ class TestSCIONAddrHdrParse(object):
     """
     def _setup(self, src_type):
         inst = SCIONAddrHdr()
-        inst.calc_lens = create_mock()
-        inst.update = create_mock()
         data = create_mock(["get", "pop"])
         data.get.side_effect = "src addr", "dst addr"
         data.pop.side_effect = None, None
@@ -229,28 +239,32 @@ class TestSCIONAddrHdrParse(object):
         src.host.TYPE = src_type
         return inst, data, src, "dst"
 
+    @patch("lib.packet.scion.SCIONAddrHdr.update", autospec=True)
+    @patch("lib.packet.scion.SCIONAddrHdr.calc_lens", autospec=True)
     @patch("lib.packet.scion.SCIONAddr", autospec=True)
     @patch("lib.packet.scion.Raw", autospec=True)
-    def test_success(self, raw, saddr):
+    def test_success(self, raw, saddr, calc_lens, update):
         inst, data, src, dst = self._setup(AddrType.IPV4)
         raw.return_value = data
         saddr.side_effect = src, dst
         # Call
         inst._parse(1, 2, "data")
         # Tests
-        inst.calc_lens.assert_called_once_with(1, 2)
+        calc_lens.assert_called_once_with(1, 2)
         raw.assert_called_once_with(
-            "data", inst.NAME, inst.calc_lens.return_value[0])
+            "data", inst.NAME, calc_lens.return_value[0])
         assert_these_calls(
             saddr, [call((1, "src addr")), call((2, "dst addr"))])
         assert_these_calls(data.pop, [call(len(src)), call(len(dst))])
         ntools.eq_(inst.src, src)
         ntools.eq_(inst.dst, dst)
-        inst.update.assert_called_once_with()
+        update.assert_called_once_with(inst)
 
+    @patch("lib.packet.scion.SCIONAddrHdr.update", autospec=True)
+    @patch("lib.packet.scion.SCIONAddrHdr.calc_lens", autospec=True)
     @patch("lib.packet.scion.SCIONAddr", autospec=True)
     @patch("lib.packet.scion.Raw", autospec=True)
-    def test_fail(self, raw, saddr):
+    def test_fail(self, raw, saddr, calc_lens, update):
         inst, data, src, dst = self._setup(AddrType.SVC)
         raw.return_value = data
         saddr.side_effect = src, dst
@@ -262,13 +276,13 @@ class TestSCIONAddrHdrPack(object):
     """
     Unit tests for lib.packet.scion.SCIONAddrHdr.pack
     """
-    def test(self):
+    @patch("lib.packet.scion.SCIONAddrHdr.update", autospec=True)
+    def test(self, update):
         inst = SCIONAddrHdr()
-        inst.update = create_mock()
-        inst.src = create_mock(["pack"])
-        inst.src.pack.return_value = b"src saddr"
-        inst.dst = create_mock(["pack"])
-        inst.dst.pack.return_value = b"dst saddr"
+        inst.src = create_mock(["pack_into"])
+        inst.src.pack_into.side_effect = _pack_into(b"src saddr")
+        inst.dst = create_mock(["pack_into"])
+        inst.dst.pack_into.side_effect = _pack_into(b"dst saddr")
         inst._total_len = 24
         inst._pad_len = 6
         expected = b"src saddr" b"dst saddr"
@@ -276,17 +290,38 @@ class TestSCIONAddrHdrPack(object):
         # Call
         ntools.eq_(inst.pack(), expected)
         # Tests
-        inst.update.assert_called_once_with()
+        update.assert_called_once_with(inst)
+
+
+class TestSCIONAddrHdrPackInto(object):
+    """
+    Unit tests for lib.packet.scion.SCIONAddrHdr.pack_into
+    """
+    @patch("lib.packet.scion.SCIONAddrHdr.update", autospec=True)
+    def test(self, update):
+        inst = SCIONAddrHdr()
+        inst.src = create_mock(["pack_into"])
+        inst.src.pack_into.side_effect = _pack_into(b"src")
+        inst.dst = create_mock(["pack_into"])
+        inst.dst.pack_into.side_effect = _pack_into(b"dst")
+        inst._total_len = 8
+        inst._pad_len = 2
+        buf = bytearray(b"\xff" * 12)
+        # Call
+        ntools.eq_(inst.pack_into(buf, 3), 11)
+        # Tests
+        update.assert_called_once_with(inst)
+        ntools.eq_(buf, b"\xff" * 3 + b"srcdst" + bytes(2) + b"\xff")
 
 
 class TestSCIONAddrHdrUpdate(object):
     """
     Unit tests for lib.packet.scion.SCIONAddrHdr.update
     """
-    def test(self):
+    @patch("lib.packet.scion.SCIONAddrHdr.calc_lens", autospec=True)
+    def test(self, calc_lens):
         inst = SCIONAddrHdr()
-        inst.calc_lens = create_mock()
-        inst.calc_lens.return_value = 1, 3
+        calc_lens.return_value = 1, 3
         inst.src = create_mock(["host"])
         inst.src.host = create_mock(["TYPE"])
         inst.dst = create_mock(["host"])
@@ -294,7 +329,7 @@ class TestSCIONAddrHdrUpdate(object):
         # Call
         inst.update()
         # Tests
-        inst.calc_lens.assert_called_once_with(
+        calc_lens.assert_called_once_with(
             inst.src.host.TYPE, inst.dst.host.TYPE)
         ntools.eq_(inst._total_len, 1)
         ntools.eq_(inst._pad_len, 3)
@@ -341,9 +376,9 @@ class TestSCIONAddrHdrReverse(object):
     """
     Unit tests for lib.packet.scion.SCIONAddrHdr.reverse
     """
-    def test(self):
+    @patch("lib.packet.scion.SCIONAddrHdr.update", autospec=True)
+    def test(self, update):
         inst = SCIONAddrHdr()
-        inst.update = create_mock()
         inst.src = "src"
         inst.dst = "dst"
         # Call
@@ -351,7 +386,7 @@ class TestSCIONAddrHdrReverse(object):
         # Tests
         ntools.eq_(inst.src, "dst")
         ntools.eq_(inst.dst, "src")
-        inst.update.assert_called_once_with()
+        update.assert_called_once_with(inst)
 
 
 class TestSCIONAddrHdrLen(object):
@@ -483,26 +518,90 @@ class TestSCIONBasePacketPack(object):
     """
     Unit tests for lib.packet.scion.SCIONBasePacket.pack
     """
+    @patch("lib.packet.scion.SCIONBasePacket._pack_into", autospec=True)
+    @patch("lib.packet.scion.SCIONBasePacket._prepare_pack", autospec=True)
+    def test(self, prepare, pack_into):
+        inst = SCIONBasePacket()
+        inst.cmn_hdr = create_mock(["total_len"])
+        inst.cmn_hdr.total_len = 6
+        prepare.return_value = "pld"
+        pack_into.side_effect = lambda _, buf, offset, pld: _pack_into(
+            b"packet")(buf, offset)
+        # Call
+        ntools.eq_(inst.pack(), b"packet")
+        # Tests
+        prepare.assert_called_once_with(inst)
+        ntools.eq_(pack_into.call_args[0][2:], (0, "pld"))
+
+
+class TestSCIONBasePacketPackInto(object):
+    """
+    Unit tests for lib.packet.scion.SCIONBasePacket.pack_into
+    """
+    @patch("lib.packet.scion.SCIONBasePacket._pack_into", autospec=True)
+    @patch("lib.packet.scion.SCIONBasePacket._prepare_pack", autospec=True)
+    def test(self, prepare, pack_into):
+        inst = SCIONBasePacket()
+        inst.cmn_hdr = create_mock(["total_len"])
+        inst.cmn_hdr.total_len = 6
+        prepare.return_value = "pld"
+        buf = bytearray(10)
+        # Call
+        ntools.eq_(inst.pack_into(buf, 4), pack_into.return_value)
+        # Tests
+        pack_into.assert_called_once_with(inst, buf, 4, "pld")
+
+    @patch("lib.packet.scion.SCIONBasePacket._prepare_pack", autospec=True)
+    def test_too_small(self, prepare):
+        inst = SCIONBasePacket()
+        inst.cmn_hdr = create_mock(["total_len"])
+        inst.cmn_hdr.total_len = 7
+        # Call
+        ntools.assert_raises(AssertionError, inst.pack_into, bytearray(10), 4)
+
+
+class TestSCIONBasePacketPreparePack(object):
+    """
+    Unit tests for lib.packet.scion.SCIONBasePacket._prepare_pack
+    """
+    @patch("lib.packet.scion.SCIONBasePacket._inner_len", autospec=True)
+    @patch("lib.packet.scion.SCIONBasePacket._pack_payload", autospec=True)
     @patch("lib.packet.scion.SCIONBasePacket.update", autospec=True)
-    def test(self, update):
-        hdr_exp = b"cmn hdr" b"addrs" b"path"
-        total_exp = hdr_exp + b"inner pack"
+    def test(self, update, pack_pld, inner_len):
         inst = SCIONBasePacket()
-        inst.update = create_mock()
-        inst.cmn_hdr = create_mock(["hdr_len", "pack", "total_len"])
-        inst.cmn_hdr.hdr_len = len(hdr_exp)
-        inst.cmn_hdr.total_len = len(total_exp)
-        inst.cmn_hdr.pack.return_value = b"cmn hdr"
-        inst.addrs = create_mock(["pack"])
-        inst.addrs.pack.return_value = b"addrs"
-        inst.path = create_mock(["pack"])
-        inst.path.pack.return_value = b"path"
-        inst._inner_pack = create_mock()
-        inst._inner_pack.return_value = b"inner pack"
+        inst.cmn_hdr = create_mock(["hdr_len", "total_len"])
+        inst.cmn_hdr.hdr_len = 40
+        inner_len.return_value = 12
         # Call
-        ntools.eq_(inst.pack(), total_exp)
+        ntools.eq_(inst._prepare_pack(), pack_pld.return_value)
         # Tests
-        inst.update.assert_called_once_with()
+        update.assert_called_once_with(inst)
+        inner_len.assert_called_once_with(inst, pack_pld.return_value)
+        ntools.eq_(inst.cmn_hdr.total_len, 52)
+
+
+class TestSCIONBasePacketPackIntoInner(object):
+    """
+    Unit tests for lib.packet.scion.SCIONBasePacket._pack_into
+    """
+    def test(self):
+        inst = SCIONBasePacket()
+        inst.cmn_hdr = create_mock(["pack_into", "total_len"])
+        inst.cmn_hdr.pack_into.side_effect = _pack_into(b"cmn hdr")
+        inst.addrs = create_mock(["pack_into"])
+        inst.addrs.pack_into.side_effect = _pack_into(b"addrs")
+        inst.path = create_mock(["pack_into"])
+        inst.path.pack_into.side_effect = _pack_into(b"path")
+        inst._inner_pack_into = create_mock()
+        inst._inner_pack_into.side_effect = _pack_into(b"inner")
+        expected = b"cmn hdr" b"addrs" b"path" b"inner"
+        inst.cmn_hdr.total_len = len(expected)
+        buf = bytearray(len(expected) + 2)
+        # Call
+        ntools.eq_(inst._pack_into(buf, 2, "pld"), len(buf))
+        # Tests
+        ntools.eq_(buf[2:], expected)
+        inst._inner_pack_into.assert_called_once_with(buf, 18, "pld")
 
 
 class TestSCIONBasePacketValidate(object):
@@ -678,25 +777,27 @@ class TestSCIONExtPacketInnerFromValues(object):
         ntools.eq_(inst.ext_hdrs, ext_hdrs)
 
 
-class TestSCIONExtPacketInnerPack(object):
+class TestSCIONExtPacketInnerPackInto(object):
     """
-    Unit tests for lib.packet.scion.SCIONExtPacket._inner_pack
+    Unit tests for lib.packet.scion.SCIONExtPacket._inner_pack_into
     """
-    @patch("lib.packet.scion.SCIONBasePacket._inner_pack", autospec=True)
+    @patch("lib.packet.scion.SCIONBasePacket._inner_pack_into", autospec=True)
     def test(self, super_pack):
         inst = SCIONExtPacket()
         inst._l4_proto = 0x42
-        super_pack.return_value = b"super"
+        super_pack.side_effect = lambda _, buf, offset, pld: _pack_into(
+            b"super")(buf, offset)
         inst.ext_hdrs = []
         for idx, class_, len_, type_ in (
             (0, 0x1, 0x0, 0x0), (1, 0x2, 0x1, 0x11), (2, 0x3, 0x2, 0x1)
         ):
-            hdr = create_mock(["hdr_len", "EXT_CLASS", "EXT_TYPE", "pack"])
+            hdr = create_mock(["hdr_len", "EXT_CLASS", "EXT_TYPE",
+                               "pack_into"])
             hdr.EXT_CLASS = class_
             hdr.hdr_len.return_value = len_
             hdr.EXT_TYPE = type_
-            hdr.pack.return_value = bytes(
-                range(5+len_*ExtensionHeader.LINE_LEN))
+            hdr.pack_into.side_effect = _pack_into(
+                bytes(range(5+len_*ExtensionHeader.LINE_LEN)))
             inst.ext_hdrs.append(hdr)
         expected = b"".join([
             b"super",
@@ -704,8 +805,12 @@ class TestSCIONExtPacketInnerPack(object):
             bytes([0x3, 0x1, 0x11]), bytes(range(13)),
             bytes([0x42, 0x2, 0x1]), bytes(range(21)),
         ])
+        buf = bytearray(len(expected))
         # Call
-        ntools.eq_(inst._inner_pack(), expected)
+        ntools.eq_(inst._inner_pack_into(buf, 0, "pld"), len(expected))
+        # Tests
+        ntools.eq_(buf, expected)
+        super_pack.assert_called_once_with(inst, buf, 0, "pld")
 
 
 class TestSCIONExtPacketGetOffsetLen(object):
@@ -826,24 +931,40 @@ class TestSCIONL4PacketInnerFromValues(object):
         ntools.eq_(inst._l4_proto, 22)
 
 
-class TestSCIONL4PacketInnerPack(object):
+class TestSCIONL4PacketInnerLen(object):
+    """
+    Unit tests for lib.packet.scion.SCIONL4Packet._inner_len
+    """
+    @patch("lib.packet.scion.SCIONExtPacket._inner_len", autospec=True)
+    def test(self, super_len):
+        inst = SCIONL4Packet()
+        super_len.return_value = 16
+        inst.l4_hdr = create_mock(["LEN"])
+        inst.l4_hdr.LEN = 8
+        # Call
+        ntools.eq_(inst._inner_len(b"pld"), 27)
+        # Tests
+        super_len.assert_called_once_with(inst, b"pld")
+
+
+class TestSCIONL4PacketInnerPackInto(object):
     """
-    Unit tests for lib.packet.scion.SCIONL4Packet._inner_pack
+    Unit tests for lib.packet.scion.SCIONL4Packet._inner_pack_into
     """
-    @patch("lib.packet.scion.SCIONExtPacket._pack_payload", autospec=True)
-    @patch("lib.packet.scion.SCIONExtPacket._inner_pack", autospec=True)
-    def test(self, super_pack, super_pld):
+    @patch("lib.packet.scion.SCIONExtPacket._inner_pack_into", autospec=True)
+    def test(self, super_pack):
         inst = SCIONL4Packet()
-        inst.update = create_mock()
-        super_pack.return_value = b"super"
-        super_pld.return_value = b"pld"
-        inst.l4_hdr = create_mock(["pack"])
-        inst.l4_hdr.pack.return_value = b"l4 hdr"
+        super_pack.side_effect = lambda _, buf, offset, pld: _pack_into(
+            b"super")(buf, offset)
+        inst.l4_hdr = create_mock(["pack_into"])
+        inst.l4_hdr.pack_into.side_effect = _pack_into(b"l4 hdr")
+        expected = b"super" b"l4 hdr" b"pld"
+        buf = bytearray(len(expected) + 1)
         # Call
-        ntools.eq_(inst._inner_pack(), b"super" b"l4 hdr" b"pld")
+        ntools.eq_(inst._inner_pack_into(buf, 1, b"pld"), len(buf))
         # Tests
-        inst.update.assert_called_once_with()
-        inst.l4_hdr.pack.assert_called_once_with(b"pld")
+        ntools.eq_(buf[1:], expected)
+        inst.l4_hdr.pack_into.assert_called_once_with(buf, 6, b"pld")
 
 
 class TestSCIONL4PacketUpdate(object):
@@ -928,7 +1049,7 @@ class TestSCIONL4PacketParsePldCtrl(object):
     """
     def _mk_data(self, len_=4):
         return create_mock_full({
-            "pop()...": [bytes((0, 0, 0, 4)), "outer"], "__len__()": len_
+            "pop()...": [bytes((0, 0, 0, 4)), b"outer"], "__len__()": len_
         })
 
     def test_bad_len(self):
@@ -949,8 +1070,7 @@ class TestSCIONL4PacketParsePldCtrl(object):
         ntools.assert_raises(SCIONParseError, inst._parse_pld_ctrl, data)
 
     def _mk_proto_obj(self, class_):
-        builder = create_mock_full({"which()": class_, class_: "inner"})
-        return create_mock_full({"as_builder()": builder})
+        return create_mock_full({"which()": class_, class_: "inner"})
 
     @patch("lib.packet.scion.parse_sibra_payload", autospec=True)
     @patch("lib.packet.scion.parse_pathmgmt_payload", autospec=True)
@@ -973,6 +1093,7 @@ class TestSCIONL4PacketParsePldCtrl(object):
         ntools.eq_(inst._parse_pld_ctrl(data), handler.return_value)
         # Tests
         handler.assert_called_once_with("inner")
+        ntools.eq_(handler.return_value._raw_full, b"\x00\x00\x00\x05outer")
 
     def test_known(self):
         for class_ in (
@@ -16,14 +16,17 @@
 ====================================================================
 """
 # Stdlib
+import struct
 from unittest.mock import patch
 
 # External packages
 import nose
 import nose.tools as ntools
+import scapy.utils
 
 # SCION
 from lib.errors import SCIONChecksumFailed
+from lib.packet.checksum import ones_sum
 from lib.packet.scion_addr import SCIONAddr
 from lib.packet.scion_udp import (
     SCIONUDPHeader,
@@ -40,8 +43,9 @@ class TestSCIONUDPHeaderParse(object):
     @patch("lib.packet.scion_udp.Raw", autospec=True)
     def test(self, raw):
         inst = SCIONUDPHeader()
-        data = create_mock(["pop"])
-        data.pop.return_value = bytes.fromhex("11112222000f9999")
+        data = create_mock(["pop_struct"])
+        data.pop_struct.side_effect = lambda st: st.unpack(
+            bytes.fromhex("11112222000f9999"))
         raw.return_value = data
         # Call
         inst._parse("src", "dst", "raw")
@@ -66,12 +70,12 @@ class TestSCIONUDPHeaderValidate(object):
         # Call
         ntools.assert_raises(SCMPBadPktLen, inst.validate, range(9))
 
+    @patch("lib.packet.scion_udp.SCIONUDPHeader._calc_checksum", autospec=True)
     @patch("lib.packet.scion_udp.Raw", autospec=True)
-    def test_bad_checksum(self, raw):
+    def test_bad_checksum(self, raw, calc_checksum):
         inst = SCIONUDPHeader()
         inst.total_len = 10 + inst.LEN
-        inst._calc_checksum = create_mock()
-        inst._calc_checksum.return_value = bytes.fromhex("8888")
+        calc_checksum.return_value = bytes.fromhex("8888")
         inst._checksum = bytes.fromhex("9999")
         # Call
         ntools.assert_raises(SCIONChecksumFailed, inst.validate, range(10))
@@ -81,25 +85,63 @@ class TestSCIONUDPHeaderCalcChecksum(object):
     """
     Unit tests for lib.packet.scion_udp.SCIONUDPHeader._calc_checksum
     """
-    @patch("lib.packet.scion_udp.scapy.utils.checksum", autospec=True)
-    def test(self, scapy_checksum):
+    def _setup(self, pack):
         inst = SCIONUDPHeader()
         inst._src = create_mock(["pack"], class_=SCIONAddr)
         inst._src.pack.return_value = b"source address"
         inst._dst = create_mock(["pack"], class_=SCIONAddr)
         inst._dst.pack.return_value = b"destination address"
-        inst.pack = create_mock()
-        inst.pack.return_value = b"packed with null checksum"
-        payload = b"payload"
-        expected_call = b"".join([
+        pack.return_value = b"packed with null checksum"
+        return inst
+
+    def _expected(self, hdr, payload):
+        return struct.pack("H", scapy.utils.checksum(b"".join([
             b"source address", b"destination address", bytes([L4Proto.UDP]),
-            b"packed with null checksum", payload,
-        ])
-        scapy_checksum.return_value = 0x3412
+            hdr, payload,
+        ])))
+
+    @patch("lib.packet.scion_udp.SCIONUDPHeader.pack", autospec=True)
+    def test(self, pack):
+        inst = self._setup(pack)
+        payload = b"payload"
+        # Call
+        ntools.eq_(inst._calc_checksum(payload),
+                   self._expected(b"packed with null checksum", payload))
+
+    @patch("lib.packet.scion_udp.SCIONUDPHeader.pack", autospec=True)
+    @patch("lib.packet.scion_udp.ones_sum", autospec=True, side_effect=ones_sum)
+    def test_same_payload(self, ones_sum_, pack):
+        inst = self._setup(pack)
+        payload = b"payload" * 100
+        inst._calc_checksum(payload)
+        pack.return_value = b"changed header with len25"
+        ones_sum_.reset_mock()
         # Call
-        ntools.eq_(inst._calc_checksum(payload), bytes.fromhex("1234"))
+        ntools.eq_(inst._calc_checksum(payload),
+                   self._expected(b"changed header with len25", payload))
         # Tests
-        scapy_checksum.assert_called_once_with(expected_call)
+        for args, _ in ones_sum_.call_args_list:
+            ntools.assert_not_in(payload, args)
+
+    @patch("lib.packet.scion_udp.SCIONUDPHeader.pack", autospec=True)
+    def test_moved_payload(self, pack):
+        inst = self._setup(pack)
+        payload = b"payload!" * 100
+        inst._calc_checksum(payload)
+        pack.return_value = b"changed header"
+        # Call
+        ntools.eq_(inst._calc_checksum(payload),
+                   self._expected(b"changed header", payload))
+
+    @patch("lib.packet.scion_udp.SCIONUDPHeader.pack", autospec=True)
+    def test_mutated_payload(self, pack):
+        inst = self._setup(pack)
+        payload = bytearray(b"payload" * 100)
+        inst._calc_checksum(payload)
+        payload[:7] = b"changed"
+        # Call
+        ntools.eq_(inst._calc_checksum(payload),
+                   self._expected(b"packed with null checksum", payload))
 
 
 class TestSCIONUDPHeaderReverse(object):
@@ -0,0 +1,199 @@
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`lib_packet_scion_view_test` --- lib.packet.scion_view unit tests
+======================================================================
+"""
+# External packages
+import capnp  # noqa
+import nose
+import nose.tools as ntools
+
+# SCION
+from lib.errors import SCIONIndexError, SCIONParseError
+from lib.packet.scion_view import SCIONPacketView
+from lib.types import AddrType
+
+_ADDRS = bytes.fromhex("00100001 0a000001 00200002 0a000002")
+_IOF = bytes.fromhex("01 00000064 0001 02")  # Up, 2 hops.
+_HOF1 = bytes.fromhex("00 3f 001002 aabbcc")
+_HOF2 = bytes.fromhex("00 3f 003004 ddeeff")
+_L4 = bytes(12)
+
+
+def _pkt(types=0x0041, total_len=60, iof_p=24, hof_p=40, hdr_len=48,
+         path=_IOF + _HOF1 + _HOF2):
+    cmn_hdr = types.to_bytes(2, "big") + total_len.to_bytes(2, "big")
+    cmn_hdr += bytes([iof_p, hof_p, 17, hdr_len])
+    return cmn_hdr + _ADDRS + path + _L4
+
+
+class TestSCIONPacketViewInit(object):
+    """
+    Unit tests for lib.packet.scion_view.SCIONPacketView.__init__
+    """
+    def test_basic(self):
+        # Call
+        inst = SCIONPacketView(bytearray(_pkt()))
+        # Tests
+        ntools.eq_(inst.src_addr_type, AddrType.IPV4)
+        ntools.eq_(inst.dst_addr_type, AddrType.IPV4)
+        ntools.eq_(inst.total_len, 60)
+        ntools.eq_(inst.next_hdr, 17)
+        ntools.eq_(inst.hdr_len, 48)
+        ntools.eq_(inst.get_of_idxs(), (0, 2))
+
+    def test_short(self):
+        ntools.assert_raises(SCIONParseError, SCIONPacketView, bytes(7))
+
+
+class TestSCIONPacketViewValidate(object):
+    """
+    Unit tests for lib.packet.scion_view.SCIONPacketView.validate
+    """
+    def test_basic(self):
+        SCIONPacketView(_pkt()).validate()
+
+    def _check_error(self, kwargs):
+        inst = SCIONPacketView(_pkt(**kwargs))
+        # Call
+        ntools.assert_raises(SCIONParseError, inst.validate)
+
+    def test_error(self):
+        for kwargs in (
+            {"total_len": 59},
+            {"types": 0x00c1},  # SVC src.
+            {"hdr_len": 24},  # Empty path.
+            {"hof_p": 41},
+            {"iof_p": 32},  # Points at a HOF.
+            {"hof_p": 24},  # HOF index outside segment.
+            {"hdr_len": 56, "total_len": 68,
+             "path": _IOF + _HOF1 + _HOF2 + _HOF1},  # Truncated segment.
+        ):
+            yield self._check_error, kwargs
+
+
+class TestSCIONPacketViewGetOFs(object):
+    """
+    Unit tests for lib.packet.scion_view.SCIONPacketView.get_iof/get_hof
+    """
+    def test(self):
+        inst = SCIONPacketView(_pkt())
+        # Call
+        iof = inst.get_iof()
+        hof = inst.get_hof()
+        # Tests
+        ntools.ok_(iof.up_flag)
+        ntools.eq_(iof.timestamp, 100)
+        ntools.eq_(iof.hops, 2)
+        ntools.eq_((hof.ingress_if, hof.egress_if), (3, 4))
+        ntools.eq_(hof.mac, bytes.fromhex("ddeeff"))
+        ntools.assert_is(inst.get_hof(), hof)
+        ntools.eq_(inst.get_fwd_if(), 3)
+        ntools.eq_(inst.get_curr_if(ingress=True), 4)
+
+
+class TestSCIONPacketViewSetOFIdxs(object):
+    """
+    Unit tests for lib.packet.scion_view.SCIONPacketView.set_of_idxs
+    """
+    def test_in_place(self):
+        raw = bytearray(_pkt(hof_p=32))
+        inst = SCIONPacketView(raw)
+        # Call
+        inst.set_of_idxs(0, 2)
+        # Tests
+        ntools.eq_(inst.get_of_idxs(), (0, 2))
+        ntools.eq_(raw, bytearray(_pkt()))
+        ntools.eq_(inst.get_raw().obj, raw)
+
+    def test_copy(self):
+        raw = _pkt(hof_p=32)
+        inst = SCIONPacketView(raw)
+        # Call
+        inst.set_of_idxs(0, 2)
+        # Tests
+        ntools.eq_(raw, _pkt(hof_p=32))
+        ntools.eq_(inst.get_raw().tobytes(), _pkt())
+
+
+class TestSCIONPacketViewNextOFIdxs(object):
+    """
+    Unit tests for lib.packet.scion_view.SCIONPacketView.next_of_idxs
+    """
+    def test_same_segment(self):
+        inst = SCIONPacketView(_pkt(hof_p=32))
+        # Call
+        ntools.eq_(inst.next_of_idxs(), (0, 2, False))
+        # Tests
+        ntools.eq_(inst.get_of_idxs(), (0, 1))
+
+    def test_switch_segment(self):
+        hof_vo = bytes([0x02]) + _HOF1[1:]  # Verify only.
+        path = _IOF + _HOF1 + _HOF2 + _IOF + hof_vo + _HOF2
+        inst = SCIONPacketView(_pkt(hdr_len=72, total_len=84, path=path))
+        # Call
+        ntools.eq_(inst.next_of_idxs(), (3, 5, True))
+
+    def test_end_of_path(self):
+        inst = SCIONPacketView(_pkt())
+        # Call
+        ntools.assert_raises(SCIONIndexError, inst.next_of_idxs)
+
+
+class TestSCIONPacketViewGetHofVer(object):
+    """
+    Unit tests for lib.packet.scion_view.SCIONPacketView.get_hof_ver
+    """
+    def test_last_up_hop(self):
+        inst = SCIONPacketView(_pkt())
+        # Call
+        ntools.assert_is_none(inst.get_hof_ver())
+
+    def test_normal(self):
+        inst = SCIONPacketView(_pkt(hof_p=32))
+        # Call
+        hof = inst.get_hof_ver()
+        # Tests
+        ntools.eq_(hof.mac, bytes.fromhex("ddeeff"))
+
+
+class TestSCIONPacketViewIsOnLastSegment(object):
+    """
+    Unit tests for lib.packet.scion_view.SCIONPacketView.is_on_last_segment
+    """
+    def test_single(self):
+        ntools.ok_(SCIONPacketView(_pkt()).is_on_last_segment())
+
+    def test_first_of_two(self):
+        path = _IOF + _HOF1 + _HOF2 + _IOF + _HOF1 + _HOF2
+        inst = SCIONPacketView(_pkt(hdr_len=72, total_len=84, path=path))
+        # Call
+        ntools.assert_false(inst.is_on_last_segment())
+
+
+class TestSCIONPacketViewGetDst(object):
+    """
+    Unit tests for lib.packet.scion_view.SCIONPacketView.get_dst/get_dst_ia
+    """
+    def test(self):
+        inst = SCIONPacketView(_pkt())
+        # Call
+        ntools.eq_(inst.get_dst(),
+                   (AddrType.IPV4, bytes.fromhex("00200002 0a000002")))
+        ntools.eq_(str(inst.get_dst_ia()), "2-2")
+
+
+if __name__ == "__main__":
+    nose.run(defaultTest=__name__)
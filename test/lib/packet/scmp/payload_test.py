@@ -38,10 +38,10 @@ class TestSCMPPayloadParse(object):
     @patch("lib.packet.scmp.payload.Raw", autospec=True)
     def test(self, raw, scmp_info):
         inst = SCMPPayload()
-        data = create_mock(["pop"])
+        data = create_mock(["pop", "pop_struct"])
+        data.pop_struct.return_value = (1, 2, 3, 4, 5, 6, 7)
         data.pop.side_effect = (
-            bytes.fromhex("0102030405060700"),
-            "info", "cmn hdr", "addrs", "path", "exts", "l4 hdr",
+            "info", b"cmn hdr", b"addrs", b"path", b"exts", b"l4 hdr",
         )
         raw.return_value = data
         # Call
@@ -49,16 +49,15 @@ class TestSCMPPayloadParse(object):
         # Tests
         raw.assert_called_once_with("data", inst.NAME)
         ntools.eq_(inst.l4_proto, 0x07)
-        pop_calls = [call(inst.META_LEN)] + [
-            call(x * LINE_LEN) for x in range(1, 7)]
-        assert_these_calls(data.pop, pop_calls)
+        data.pop_struct.assert_called_once_with(inst.STRUCT_FMT)
+        assert_these_calls(data.pop, [call(x * LINE_LEN) for x in range(1, 7)])
         scmp_info.assert_called_once_with("class", "type", "info")
         ntools.eq_(inst.info, scmp_info.return_value)
-        ntools.eq_(inst._cmn_hdr, "cmn hdr")
-        ntools.eq_(inst._addrs, "addrs")
-        ntools.eq_(inst._path, "path")
-        ntools.eq_(inst._exts, "exts")
-        ntools.eq_(inst._l4_hdr, "l4 hdr")
+        ntools.eq_(inst._cmn_hdr, b"cmn hdr")
+        ntools.eq_(inst._addrs, b"addrs")
+        ntools.eq_(inst._path, b"path")
+        ntools.eq_(inst._exts, b"exts")
+        ntools.eq_(inst._l4_hdr, b"l4 hdr")
 
 
 class TestSCMPPayloadFromPkt(object):
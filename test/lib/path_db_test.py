@@ -16,6 +16,8 @@
 =====================================================
 """
 # Stdlib
+import sqlite3
+import time
 from unittest.mock import patch, call
 
 # External packages
@@ -23,11 +25,14 @@ import nose
 import nose.tools as ntools
 
 # SCION
+from lib.packet.opaque_field import HopOpaqueField, InfoOpaqueField
 from lib.packet.pcb import PathSegment
+from lib.packet.scion_addr import ISD_AS
 from lib.path_db import (
     DBResult,
     PathSegmentDB,
-    PathSegmentDBRecord
+    PathSegmentDBRecord,
+    PathSegmentDBSnapshot,
 )
 from test.testcommon import assert_these_calls, create_mock, create_mock_full
 
@@ -39,16 +44,117 @@ class TestPathSegmentDBRecordInit(object):
     def test(self):
         pcb = create_mock_full({
             'get_hops_hash()': "hash", "get_n_hops()": 42,
-            "get_expiration_time()": 71}, class_=PathSegment)
+            "get_expiration_time()": 71, "detach()": None},
+            class_=PathSegment)
         # Call
         inst = PathSegmentDBRecord(pcb)
         # Tests
         ntools.eq_(inst.pcb, pcb)
+        pcb.detach.assert_called_once_with()
         ntools.eq_(inst.id, "hash")
         ntools.eq_(inst.fidelity, 42)
         ntools.eq_(inst.exp_time, 71)
 
 
+def _fields(first_ia, last_ia, sibra=False):
+    return {"first_ia": first_ia, "last_ia": last_ia,
+            "first_isd": first_ia[0], "last_isd": last_ia[0], "sibra": sibra}
+
+
+class TestPathSegmentDBRecordFromSnapshot(object):
+    """
+    Unit tests for lib.path_db.PathSegmentDBRecord.from_snapshot
+    """
+    @patch("lib.path_db.PathSegment.from_raw", new_callable=create_mock)
+    def test(self, from_raw):
+        # Call
+        inst = PathSegmentDBRecord.from_snapshot("id", 3, 71, b"raw")
+        # Tests
+        ntools.eq_((inst.id, inst.fidelity, inst.exp_time), ("id", 3, 71))
+        ntools.assert_false(from_raw.called)
+        ntools.eq_(inst.pcb, from_raw.return_value)
+        ntools.eq_(inst.pcb, from_raw.return_value)
+        from_raw.assert_called_once_with(b"raw")
+        from_raw.return_value.detach.assert_called_once_with()
+
+
+class TestPathSegmentDBSnapshot(object):
+    """
+    Unit tests for lib.path_db.PathSegmentDBSnapshot
+    """
+    def _mk_rec(self, id_, exp_time):
+        return create_mock_full({
+            "id": id_, "fidelity": 2, "exp_time": exp_time,
+            "pcb": create_mock_full({"pack()": b"pcb " + id_})})
+
+    @patch("lib.path_db.PathSegment.from_raw", new_callable=create_mock)
+    def test(self, from_raw):
+        inst = PathSegmentDBSnapshot(":memory:")
+        ia1, ia2 = ISD_AS.from_values(1, 2), ISD_AS.from_values(3, 4)
+        from_raw.side_effect = lambda raw: create_mock_full(
+            {"raw": raw, "detach()": None})
+        # Call
+        inst.put(self._mk_rec(b"1", 10), _fields(ia1, ia2))
+        inst.put(self._mk_rec(b"2", 10), _fields(ia2, ia1, True))
+        inst.put(self._mk_rec(b"3", 10), _fields(ia2, ia2))
+        inst.put(self._mk_rec(b"3", 30), _fields(ia2, ia2))
+        inst.put(self._mk_rec(b"4", 20), _fields(ia1, ia1))
+        inst.delete(b"2")
+        inst.expire(15)
+        loaded = inst.load(25)
+        # Tests
+        ntools.eq_([(rec.id, rec.fidelity, rec.exp_time, rec.pcb.raw, fields)
+                    for rec, fields in loaded],
+                   [(b"3", 2, 30, b"pcb 3", _fields(ia2, ia2))])
+        ntools.eq_(inst._conn.execute(
+            "SELECT COUNT(*) FROM segments").fetchone(), (1,))
+
+    def test_write_error(self):
+        inst = PathSegmentDBSnapshot(":memory:")
+        inst._conn = create_mock(["execute"])
+        inst._conn.execute.side_effect = sqlite3.OperationalError
+        # Call
+        inst.delete(b"id")
+
+
+class TestPathSegmentDBPersist(object):
+    """
+    Unit tests for lib.path_db.PathSegmentDB.persist
+    """
+    def _mk_rec(self, id_):
+        return create_mock_full({"id": id_, "exp_time": 1})
+
+    @patch("lib.path_db.PathSegmentDBSnapshot", autospec=True)
+    def test(self, snapshot):
+        inst = PathSegmentDB()
+        cur = self._mk_rec("id1")
+        ia = ISD_AS.from_values(1, 2)
+        inst._add(("id1", False), cur, _fields(ia, ia))
+        loaded = [(self._mk_rec("id1"), {"sibra": False}),
+                  (self._mk_rec("id1"), {"sibra": True}),
+                  (self._mk_rec("id2"), {"sibra": False})]
+        snapshot.return_value.load.return_value = loaded
+        inst._add = create_mock()
+        # Call
+        inst.persist("path")
+        # Tests
+        snapshot.assert_called_once_with("path")
+        snapshot.return_value.put.assert_called_once_with(
+            cur, _fields(ia, ia))
+        assert_these_calls(inst._add, [
+            call(("id1", True), *loaded[1]), call(("id2", False), *loaded[2])])
+        ntools.eq_(inst._snapshot, snapshot.return_value)
+
+    @patch("lib.path_db.PathSegmentDBSnapshot", autospec=True)
+    def test_error(self, snapshot):
+        inst = PathSegmentDB()
+        snapshot.side_effect = sqlite3.OperationalError
+        # Call
+        inst.persist("path")
+        # Tests
+        ntools.assert_is_none(inst._snapshot)
+
+
 class TestPathSegmentDBUpdate(object):
     """
     Unit tests for lib.path_db.PathSegmentDB.update
@@ -56,51 +162,75 @@ class TestPathSegmentDBUpdate(object):
     def _mk_pcb(self, exp=0):
         return create_mock_full({
             'get_hops_hash()': "hash", "get_n_hops()": 42,
-            "get_expiration_time()": exp, "first_ia()": (1, 2),
-            "last_ia()": (3, 4), "is_sibra()": True, "short_desc()": "short",
+            "get_expiration_time()": exp,
+            "first_ia()": ISD_AS.from_values(1, 2),
+            "last_ia()": ISD_AS.from_values(3, 4), "is_sibra()": True,
+            "short_desc()": "short",
         })
 
     @patch("lib.path_db.PathSegmentDBRecord", autospec=True)
     def test_add(self, db_rec):
         inst = PathSegmentDB()
-        inst._db = create_mock_full({'insert()': None}, return_value=[])
+        inst._add = create_mock()
         pcb = self._mk_pcb()
         record = create_mock_full({'id': "id str"})
         db_rec.return_value = record
+        inst._snapshot = create_mock(["put"])
         # Call
         ntools.eq_(inst.update(pcb), DBResult.ENTRY_ADDED)
         # Tests
         db_rec.assert_called_once_with(pcb)
-        inst._db.assert_called_once_with(id="id str", sibra=True)
-        inst._db.insert.assert_called_once_with(record, "id str", 1, 2, 3, 4,
-                                                True)
+        fields = _fields(
+            ISD_AS.from_values(1, 2), ISD_AS.from_values(3, 4), True)
+        inst._add.assert_called_once_with(("id str", True), record, fields)
+        inst._snapshot.put.assert_called_once_with(record, fields)
 
     @patch("lib.path_db.PathSegmentDBRecord", autospec=True)
-    def test_outdated(self, db_rec):
+    def test_add_reverse(self, db_rec):
+        inst = PathSegmentDB()
+        inst._add = create_mock()
+        record = create_mock_full({'id': "id str"})
+        db_rec.return_value = record
+        # Call
+        inst.update(self._mk_pcb(), reverse=True)
+        # Tests
+        inst._add.assert_called_once_with(
+            ("id str", True), record, _fields(
+                ISD_AS.from_values(3, 4), ISD_AS.from_values(1, 2), True))
+
+    @patch("lib.path_db.SCIONTime.get_time", new_callable=create_mock)
+    @patch("lib.path_db.PathSegmentDBRecord", autospec=True)
+    def test_outdated(self, db_rec, time):
         inst = PathSegmentDB()
         pcb = self._mk_pcb(-1)
-        cur_rec = create_mock_full({"pcb": self._mk_pcb(0)})
-        inst._db = create_mock_full(return_value={0: {'record': cur_rec}})
+        cur_rec = create_mock_full({"pcb": self._mk_pcb(0), "exp_time": 0})
+        inst._entries[("idstr", True)] = cur_rec, {}
         record = create_mock_full({'id': "idstr"})
         db_rec.return_value = record
+        time.return_value = 0
         # Call
         ntools.eq_(inst.update(pcb), DBResult.NONE)
         # Tests
         pcb.get_expiration_time.assert_called_once_with()
         cur_rec.pcb.get_expiration_time.assert_called_once_with()
 
+    @patch("lib.path_db.SCIONTime.get_time", new_callable=create_mock)
     @patch("lib.path_db.PathSegmentDBRecord", autospec=True)
-    def test_update(self, db_rec):
+    def test_update(self, db_rec, time):
         inst = PathSegmentDB()
         pcb = self._mk_pcb(1)
         cur_rec = create_mock_full({"pcb": self._mk_pcb(0), "id": "cur rec",
                                     "exp_time": 44})
-        inst._db = create_mock_full(return_value={0: {'record': cur_rec}})
+        inst._entries[("record", True)] = cur_rec, {}
         db_rec.return_value = create_mock_full({'id': "record", 'exp_time': 32})
+        inst._push_exp = create_mock()
+        time.return_value = 44
         # Call
         ntools.eq_(inst.update(pcb), DBResult.ENTRY_UPDATED)
         # Tests
         ntools.eq_(cur_rec.pcb, pcb)
+        ntools.eq_(cur_rec.exp_time, 1)
+        inst._push_exp.assert_called_once_with(("record", True), 1)
 
     @patch("lib.path_store.SCIONTime.get_time", new_callable=create_mock)
     @patch("lib.path_db.PathSegmentDBRecord", autospec=True)
@@ -110,9 +240,9 @@ class TestPathSegmentDBUpdate(object):
         cur_rec = create_mock(['pcb', 'id', 'exp_time'])
         cur_rec.pcb = self._mk_pcb(0)
         cur_rec.exp_time = 10
-        inst._db = create_mock_full(return_value={0: {'record': cur_rec}})
+        inst._entries[("id", True)] = cur_rec, {}
         pcb = self._mk_pcb(1)
-        db_rec.return_value = create_mock(['id'])
+        db_rec.return_value = create_mock_full({'id': "id"})
         time.return_value = 1
         # Call
         inst.update(pcb)
@@ -120,6 +250,52 @@ class TestPathSegmentDBUpdate(object):
         db_rec.assert_called_once_with(pcb, segment_ttl + time.return_value)
         ntools.eq_(cur_rec.exp_time, 301)
 
+    @patch("lib.path_db.SCIONTime.get_time", new_callable=create_mock)
+    @patch("lib.path_db.PathSegmentDBRecord", autospec=True)
+    def test_expired(self, db_rec, time):
+        inst = PathSegmentDB()
+        ia1, ia2 = ISD_AS.from_values(1, 2), ISD_AS.from_values(3, 4)
+        inst._add(("id", True), create_mock_full({"exp_time": 9}),
+                  _fields(ia1, ia2, True))
+        record = create_mock_full({'id': "id", "exp_time": 20})
+        db_rec.return_value = record
+        time.return_value = 10
+        # Call
+        ntools.eq_(inst.update(self._mk_pcb(-1)), DBResult.ENTRY_ADDED)
+        # Tests
+        ntools.eq_(inst._entries[("id", True)],
+                   (record, _fields(ia1, ia2, True)))
+
+
+class TestPathSegmentDBAddRemove(object):
+    """
+    Unit tests for lib.path_db.PathSegmentDB._add and
+    lib.path_db.PathSegmentDB._remove
+    """
+    def test(self):
+        inst = PathSegmentDB()
+        ia1, ia2 = ISD_AS.from_values(1, 2), ISD_AS.from_values(3, 4)
+        rec1 = create_mock_full({"exp_time": 1})
+        # Call
+        inst._add(("id1", False), rec1, _fields(ia1, ia2))
+        inst._add(("id2", False), create_mock_full({"exp_time": 2}),
+                  _fields(ia1, ia1))
+        # Tests
+        ntools.eq_(inst._entries[("id1", False)], (rec1, _fields(ia1, ia2)))
+        ntools.eq_(inst._indexes["first_ia", "sibra"],
+                   {(ia1, False): {("id1", False): None,
+                                   ("id2", False): None}})
+        ntools.eq_(inst._indexes["last_isd", "sibra"],
+                   {(3, False): {("id1", False): None},
+                    (1, False): {("id2", False): None}})
+        # Call
+        inst._remove(("id1", False))
+        inst._remove(("id2", False))
+        # Tests
+        ntools.eq_(inst._entries, {})
+        for index in inst._indexes.values():
+            ntools.eq_(index, {})
+
 
 class TestPathSegmentDBDelete(object):
     """
@@ -127,17 +303,18 @@ class TestPathSegmentDBDelete(object):
     """
     def test_basic(self):
         pth_seg_db = PathSegmentDB()
-        pth_seg_db._db = create_mock(['delete'])
-        pth_seg_db._db.return_value = "data1"
+        pth_seg_db._entries = {("data1", False): None, ("data2", True): None}
+        pth_seg_db._remove = create_mock()
+        pth_seg_db._snapshot = create_mock(["delete"])
         ntools.eq_(pth_seg_db.delete("data2"), DBResult.ENTRY_DELETED)
-        pth_seg_db._db.assert_called_once_with(id="data2")
-        pth_seg_db._db.delete.assert_called_once_with("data1")
+        pth_seg_db._remove.assert_called_once_with(("data2", True))
+        pth_seg_db._snapshot.delete.assert_called_once_with("data2")
 
     def test_not_present(self):
         pth_seg_db = PathSegmentDB()
-        pth_seg_db._db = create_mock()
-        pth_seg_db._db.return_value = False
+        pth_seg_db._remove = create_mock()
         ntools.eq_(pth_seg_db.delete("data"), DBResult.NONE)
+        ntools.assert_false(pth_seg_db._remove.called)
 
 
 class TestPathSegmentDBDeleteAll(object):
@@ -160,42 +337,171 @@ class TestPathSegmentDBCall(object):
     """
     Unit tests for lib.path_db.PathSegmentDB.__call__
     """
-    def test(self):
+    @patch("lib.path_db.SCIONTime.get_time", new_callable=create_mock)
+    def test(self, time):
         inst = PathSegmentDB()
         inst._parse_call_kwargs = create_mock()
         inst._parse_call_kwargs.return_value = {"arg1": "val1"}
-        inst._exp_call_records = create_mock()
+        inst._select = create_mock()
+        inst._select.return_value = ["key2", "key1", "key0"]
+        recs = [create_mock_full({"exp_time": t}) for t in (3, 2, 4)]
+        inst._entries = {"key%d" % i: (rec, {}) for i, rec in enumerate(recs)}
         inst._sort_call_pcbs = create_mock()
-        inst._db = create_mock()
+        time.return_value = 3.5
         # Call
-        ntools.eq_(inst("data", a="b"), inst._sort_call_pcbs.return_value)
+        ntools.eq_(inst(a="b"), inst._sort_call_pcbs.return_value)
         # Tests
         inst._parse_call_kwargs.assert_called_once_with({"a": "b"})
-        inst._db.assert_called_once_with("data", arg1="val1")
-        inst._exp_call_records.assert_called_once_with(inst._db.return_value)
+        inst._select.assert_called_once_with({"arg1": "val1"})
         inst._sort_call_pcbs.assert_called_once_with(
-            False, inst._exp_call_records.return_value)
+            False, [recs[2], recs[0]])
 
 
-class TestPathSegmentDBExpCallRecords(object):
+class TestPathSegmentDBParseCallKwargs(object):
     """
-    Unit tests for lib.path_db.PathSegmentDB._exp_call_records
+    Unit tests for lib.path_db.PathSegmentDB._parse_call_kwargs
     """
-    @patch("lib.path_store.SCIONTime.get_time", new_callable=create_mock)
-    def test(self, time):
+    def _check(self, kwargs, expected):
+        inst = PathSegmentDB()
+        # Call
+        ntools.eq_(inst._parse_call_kwargs(kwargs), expected)
+
+    def test(self):
+        for kwargs, expected in (
+            ({}, {"sibra": False}),
+            ({"first_ia": None, "last_ia": None}, {"sibra": False}),
+            ({"first_ia": "ia", "last_ia": None, "sibra": True},
+             {"first_ia": "ia", "sibra": True}),
+            ({"sibra": None}, {"sibra": False}),
+        ):
+            yield self._check, kwargs, expected
+
+    @patch("lib.path_db.SCIONTime.get_time", new_callable=create_mock)
+    def test_call_none(self, time):
+        inst = PathSegmentDB()
+        ia = ISD_AS.from_values(1, 1)
+        inst._add((0, False), create_mock_full({"exp_time": 10}),
+                  _fields(ia, ia))
+        inst._sort_call_pcbs = create_mock()
+        time.return_value = 0
+        # Call
+        inst(first_ia=None, last_ia=None)
+        # Tests
+        inst._sort_call_pcbs.assert_called_once_with(
+            False, [inst._entries[(0, False)][0]])
+
+
+class TestPathSegmentDBStoredReads(object):
+    """
+    Stored segments can be read any number of times.
+    """
+    def test(self):
+        info = InfoOpaqueField.from_values(int(time.time()), 1, hops=1)
+        p = PathSegment.P_CLS.new_message(info=info.pack())
+        asm = p.init("asms", 1)[0]
+        asm.isdas = int(ISD_AS.from_values(1, 1))
+        asm.chain = bytes(1 << 20)
+        asm.init("pcbms", 1)[0].hof = HopOpaqueField.from_values(63).pack()
+        raw = p.to_bytes_packed()
+        inst = PathSegmentDB()
+        inst.update(PathSegment.from_raw(raw))
+        # Call
+        for _ in range(200):
+            pcb = inst(full=True)[0]
+            # Tests
+            ntools.eq_(len(pcb.asm(0).p.chain), 1 << 20)
+        ntools.assert_is(pcb.pack(), raw)
+
+
+class TestPathSegmentDBSelect(object):
+    """
+    Unit tests for lib.path_db.PathSegmentDB._select
+    """
+    def _setup(self):
+        inst = PathSegmentDB()
+        ias = [ISD_AS.from_values(isd, 1) for isd in (1, 1, 2)]
+        ias[1] = ISD_AS.from_values(1, 2)
+        for i, (first, last, sibra) in enumerate((
+                (0, 1, False), (0, 2, False), (1, 2, False), (0, 1, True),
+                (2, 0, False))):
+            inst._add((i, sibra), create_mock_full({"exp_time": 0}),
+                      _fields(ias[first], ias[last], sibra))
+        return inst, ias
+
+    def _check(self, kwargs, expected):
+        inst, ias = self._setup()
+        kwargs = {k: ias[v] if k.endswith("_ia") else v
+                  for k, v in kwargs.items()}
+        # Call
+        ntools.eq_([k for k, _ in inst._select(kwargs)], expected)
+
+    def test(self):
+        for kwargs, expected in (
+            ({"sibra": False}, [0, 1, 2, 4]),
+            ({"sibra": True}, [3]),
+            ({"first_ia": 0, "sibra": False}, [0, 1]),
+            ({"first_ia": 0, "last_ia": 1, "sibra": True}, [3]),
+            ({"last_ia": 2, "sibra": False}, [1, 2]),
+            ({"first_isd": 1, "sibra": False}, [0, 1, 2]),
+            ({"last_isd": 1, "first_isd": 2, "sibra": False}, [4]),
+            ({"first_ia": 0, "last_isd": 2, "sibra": False}, [1]),
+            ({"first_ia": 2}, [4]),
+            ({}, [0, 1, 2, 3, 4]),
+        ):
+            yield self._check, kwargs, expected
+
+    def test_unknown(self):
+        inst = PathSegmentDB()
+        # Call
+        ntools.assert_raises(KeyError, inst._select, {"last_as": 1})
+
+
+class TestPathSegmentDBExpire(object):
+    """
+    Unit tests for lib.path_db.PathSegmentDB._expire
+    """
+    def _mk_rec(self, exp_time):
+        return create_mock_full({"exp_time": exp_time,
+                                 "pcb": create_mock(["short_desc"])})
+
+    def test(self):
+        inst = PathSegmentDB()
+        ia = ISD_AS.from_values(1, 2)
+        recs = [self._mk_rec(exp_time) for exp_time in (3, 1, 2, 5)]
+        for i, rec in enumerate(recs):
+            inst._add(i, rec, _fields(ia, ia))
+        # Record 2 gets refreshed, record 1 deleted.
+        recs[2].exp_time = 4
+        inst._push_exp(2, 4)
+        inst._remove(1)
+        # Call
+        ntools.eq_(inst._expire(4), 1)
+        # Tests
+        ntools.eq_(list(inst._entries), [2, 3])
+        ntools.eq_(sorted(inst._exp_heap)[0][::2], (4, 2))
+        inst._snapshot = create_mock(["expire"])
+        # Call
+        ntools.eq_(inst._expire(6), 2)
+        # Tests
+        ntools.eq_(inst._entries, {})
+        ntools.eq_(inst._exp_heap, [])
+        inst._snapshot.expire.assert_called_once_with(6)
+
+
+class TestPathSegmentDBPushExp(object):
+    """
+    Unit tests for lib.path_db.PathSegmentDB._push_exp
+    """
+    def test_rebuild(self):
         inst = PathSegmentDB()
-        inst._db = create_mock(['delete'])
-        recs = []
-        for i in range(5):
-            rec = create_mock(['exp_time', 'pcb'])
-            rec.exp_time = i
-            rec.pcb = create_mock(["short_desc"])
-            recs.append({'record': rec})
-        time.return_value = 2
+        inst.HEAP_SLACK = 2
+        inst._entries = {"key": (create_mock_full({"exp_time": 9}), {})}
+        for exp_time in range(4):
+            inst._push_exp("key", exp_time)
         # Call
-        ntools.eq_(inst._exp_call_records(recs), recs[2:])
+        inst._push_exp("key", 9)
         # Tests
-        inst._db.delete.assert_called_once_with(recs[:2])
+        ntools.eq_([(t, k) for t, _, k in inst._exp_heap], [(9, "key")])
 
 
 if __name__ == "__main__":
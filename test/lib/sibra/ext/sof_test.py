@@ -35,7 +35,7 @@ class TestSibraOpaqueFieldParse(object):
     def test(self, raw):
         inst = SibraOpaqueField()
         data = create_mock(["pop"])
-        data.pop.side_effect = bytes(range(4)), "mac"
+        data.pop.side_effect = bytes(range(4)), b"mac"
         raw.return_value = data
         # Call
         inst._parse("data")
@@ -43,7 +43,7 @@ class TestSibraOpaqueFieldParse(object):
         raw.assert_called_once_with("data", inst.NAME, inst.LEN)
         ntools.eq_(inst.ingress, 0x0001)
         ntools.eq_(inst.egress, 0x0203)
-        ntools.eq_(inst.mac, "mac")
+        ntools.eq_(inst.mac, b"mac")
 
 
 class TestSibraOpaqueFieldPack(object):
@@ -18,7 +18,7 @@
 # Stdlib
 import socket
 from errno import EACCES, EHOSTUNREACH, ENETUNREACH
-from unittest.mock import patch
+from unittest.mock import call, patch
 
 # External
 import nose
@@ -118,9 +118,11 @@ class TestUDPSocketSend(object):
     @patch("lib.socket.UDPSocket.__init__", autospec=True, return_value=None)
     def test_basic(self, init):
         inst = UDPSocket()
+        inst._batch = None
         inst.sock = create_mock(["sendto"])
+        inst.sock.sendto.return_value = 4
         # Call
-        inst.send("data", "dst")
+        ntools.ok_(inst.send("data", "dst"))
         # Tests
         inst.sock.sendto.assert_called_once_with("data", "dst")
 
@@ -128,16 +130,29 @@ class TestUDPSocketSend(object):
     @patch("lib.socket.UDPSocket.__init__", autospec=True, return_value=None)
     def _check_error(self, errno, excp, init, logging):
         inst = UDPSocket()
+        inst._batch = None
         inst.sock = create_mock(["sendto"])
         inst.sock.sendto.side_effect = OSError(errno)
         # Call
         if excp:
             ntools.assert_raises(excp, inst.send, "data", "dst")
         else:
-            inst.send("data", "dst")
+            ntools.assert_false(inst.send("data", "dst"))
         # Tests
         ntools.ok_(logging.called)
 
+    @patch("lib.socket.UDPSocket.__init__", autospec=True, return_value=None)
+    def test_batch(self, init):
+        inst = UDPSocket()
+        inst._batch = None
+        inst.sock = create_mock(["sendto"])
+        inst.start_batch()
+        # Call
+        ntools.ok_(inst.send("data", "dst"))
+        # Tests
+        ntools.eq_(inst._batch, [("data", "dst")])
+        ntools.assert_false(inst.sock.sendto.called)
+
     def test_error(self):
         for errno, excp in (
             (EACCES, None), (ENETUNREACH, SCMPUnreachNet),
@@ -150,35 +165,116 @@ class TestUDPSocketRecv(object):
     """
     Unit tests for lib.socket.UDPSocket.recv
     """
+    def _setup(self):
+        inst = UDPSocket()
+        inst._recv_buf = bytearray(b"datagram")
+        inst.sock = create_mock(["recvfrom_into"])
+        inst.sock.recvfrom_into.return_value = 4, "addr"
+        return inst
+
     @patch("lib.socket.UDPSocket.__init__", autospec=True, return_value=None)
     def test_block(self, init):
-        inst = UDPSocket()
-        inst.sock = create_mock(["recvfrom"])
+        inst = self._setup()
         # Call
-        ntools.eq_(inst.recv(), inst.sock.recvfrom.return_value)
+        data, addr = inst.recv()
         # Tests
-        inst.sock.recvfrom.assert_called_once_with(SCION_BUFLEN, 0)
+        ntools.eq_(data, bytearray(b"data"))
+        ntools.assert_is_instance(data, bytearray)
+        ntools.eq_(addr, "addr")
+        inst.sock.recvfrom_into.assert_called_once_with(
+            inst._recv_buf, SCION_BUFLEN, 0)
 
     @patch("lib.socket.UDPSocket.__init__", autospec=True, return_value=None)
     def test_nonblock(self, init):
-        inst = UDPSocket()
-        inst.sock = create_mock(["recvfrom"])
+        inst = self._setup()
         # Call
         inst.recv(block=False)
         # Tests
-        inst.sock.recvfrom.assert_called_once_with(SCION_BUFLEN,
-                                                   socket.MSG_DONTWAIT)
+        inst.sock.recvfrom_into.assert_called_once_with(
+            inst._recv_buf, SCION_BUFLEN, socket.MSG_DONTWAIT)
 
     @patch("lib.socket.UDPSocket.__init__", autospec=True, return_value=None)
     def test_intr(self, init):
+        inst = self._setup()
+        inst.sock.recvfrom_into.side_effect = (
+            InterruptedError, InterruptedError, (2, "addr"))
+        # Call
+        ntools.eq_(inst.recv(), (bytearray(b"da"), "addr"))
+        # Tests
+        ntools.eq_(inst.sock.recvfrom_into.call_count, 3)
+
+    @patch("lib.socket.UDPSocket.__init__", autospec=True, return_value=None)
+    def test_copy(self, init):
+        inst = self._setup()
+        data, _ = inst.recv()
+        # Call
+        inst._recv_buf[0:4] = b"next"
+        # Tests
+        ntools.eq_(data, bytearray(b"data"))
+
+
+class TestUDPSocketRecvBatch(object):
+    """
+    Unit tests for lib.socket.UDPSocket.recv_batch
+    """
+    def _setup(self, *side_effect):
+        inst = UDPSocket()
+        inst._recv_buf = bytearray(b"data0data1data2")
+        inst.sock = create_mock(["recvfrom_into"])
+        inst.sock.recvfrom_into.side_effect = side_effect
+        return inst
+
+    @patch("lib.socket.UDPSocket.__init__", autospec=True, return_value=None)
+    def test_full(self, init):
+        inst = self._setup((5, "addr0"), (5, "addr1"), (5, "addr2"))
+        # Call
+        ntools.eq_(inst.recv_batch(2), [(bytearray(b"data0"), "addr0"),
+                                        (bytearray(b"data0"), "addr1")])
+        # Tests
+        inst.sock.recvfrom_into.assert_has_calls([
+            call(inst._recv_buf, SCION_BUFLEN, 0),
+            call(inst._recv_buf, SCION_BUFLEN, socket.MSG_DONTWAIT)])
+
+    @patch("lib.socket.UDPSocket.__init__", autospec=True, return_value=None)
+    def test_drained(self, init):
+        inst = self._setup((5, "addr0"), InterruptedError, (5, "addr1"),
+                           BlockingIOError)
+        # Call
+        ntools.eq_(len(inst.recv_batch(10)), 2)
+        # Tests
+        ntools.eq_(inst.sock.recvfrom_into.call_count, 4)
+
+
+class TestUDPSocketFlushBatch(object):
+    """
+    Unit tests for lib.socket.UDPSocket.flush_batch
+    """
+    @patch("lib.socket.UDPSocket.__init__", autospec=True, return_value=None)
+    def test_basic(self, init):
+        inst = UDPSocket()
+        inst._batch = None
+        inst._send = create_mock()
+        unreach = SCMPUnreachNet("dst1")
+        inst._send.side_effect = (True, unreach, False, True)
+        inst.start_batch()
+        for i in range(4):
+            inst.send("data%d" % i, "dst%d" % i)
+        # Call
+        ntools.eq_(inst.flush_batch(), [("data1", "dst1", unreach)])
+        # Tests
+        inst._send.assert_has_calls(
+            [call("data%d" % i, "dst%d" % i) for i in range(4)])
+        ntools.assert_is_none(inst._batch)
+
+    @patch("lib.socket.UDPSocket.__init__", autospec=True, return_value=None)
+    def test_not_started(self, init):
         inst = UDPSocket()
-        inst.sock = create_mock(["recvfrom"])
-        inst.sock.recvfrom.side_effect = (
-            InterruptedError, InterruptedError, "data")
+        inst._batch = None
+        inst._send = create_mock()
         # Call
-        ntools.eq_(inst.recv(), "data")
+        ntools.eq_(inst.flush_batch(), [])
         # Tests
-        ntools.eq_(inst.sock.recvfrom.call_count, 3)
+        ntools.assert_false(inst._send.called)
 
 
 class TestSocketMgrSelect(object):
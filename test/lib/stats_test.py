@@ -0,0 +1,133 @@
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`lib_stats_test` --- lib.stats unit tests
+==============================================
+"""
+# Stdlib
+import json
+
+# External packages
+import nose
+import nose.tools as ntools
+
+# SCION
+from lib.errors import SCIONParseError
+from lib.stats import ElementStats, Histogram
+
+
+class TestHistogramRecord(object):
+    """
+    Unit tests for lib.stats.Histogram.record
+    """
+    def _check(self, value):
+        inst = Histogram()
+        # Call
+        inst.record(value)
+        # Tests
+        low = inst._bucket_low(inst._bucket(value))
+        ntools.assert_less_equal(low, value)
+        ntools.assert_less(value - low, max(value / 16, 1))
+
+    def test(self):
+        for value in 0, 1, 15, 16, 31, 32, 33, 1000, 123456789:
+            yield self._check, value
+
+
+class TestHistogramPercentile(object):
+    """
+    Unit tests for lib.stats.Histogram.percentile
+    """
+    def test(self):
+        inst = Histogram()
+        for i in range(1, 101):
+            inst.record(i)
+        # Tests
+        ntools.eq_(inst.percentile(50), 50)
+        ntools.eq_(inst.percentile(0), 1)
+        ntools.assert_almost_equal(inst.percentile(99), 99, delta=99 / 16)
+        ntools.eq_((inst.min, inst.max, inst.count), (1, 100, 100))
+
+    def test_empty(self):
+        ntools.assert_is_none(Histogram().percentile(50))
+
+
+class Owner(object):
+    def stage(self, x):
+        return x + 1
+
+
+class TestElementStatsEnable(object):
+    """
+    Unit tests for lib.stats.ElementStats.enable/disable
+    """
+    def test(self):
+        owner = Owner()
+        inst = ElementStats(owner, {"stage_a": "stage"})
+        # Call
+        inst.enable()
+        # Tests
+        ntools.eq_(owner.stage(1), 2)
+        ntools.eq_(inst.histograms["stage_a"].count, 1)
+        # Call
+        inst.disable()
+        # Tests
+        ntools.eq_(owner.stage.__func__, Owner.stage)
+        owner.stage(1)
+        ntools.eq_(inst.histograms["stage_a"].count, 1)
+
+
+class TestElementStatsDrop(object):
+    """
+    Unit tests for lib.stats.ElementStats.drop
+    """
+    def test_enabled(self):
+        inst = ElementStats(Owner(), {})
+        inst.enable()
+        # Call
+        inst.drop(SCIONParseError("bad"))
+        inst.drop("parse_error")
+        inst.drop("parse_error")
+        # Tests
+        ntools.eq_(inst.drops, {"SCIONParseError": 1, "parse_error": 2})
+
+    def test_disabled(self):
+        inst = ElementStats(Owner(), {})
+        # Call
+        inst.drop("parse_error")
+        # Tests
+        ntools.eq_(inst.drops, {"parse_error": 1})
+
+
+class TestElementStatsHandleCmd(object):
+    """
+    Unit tests for lib.stats.ElementStats.handle_cmd
+    """
+    def test_enable(self):
+        inst = ElementStats(Owner(), {"stage_a": "stage"})
+        # Call
+        d = json.loads(inst.handle_cmd("enable"))
+        # Tests
+        ntools.ok_(d["enabled"])
+        ntools.ok_(inst.enabled)
+        ntools.ok_("stage_a" in d["stages_usec"])
+
+    def test_unknown(self):
+        inst = ElementStats(Owner(), {})
+        # Call
+        ntools.ok_("error" in json.loads(inst.handle_cmd("bogus")))
+
+
+if __name__ == "__main__":
+    nose.run(defaultTest=__name__)
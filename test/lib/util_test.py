@@ -17,6 +17,7 @@
 """
 # Stdlib
 import builtins
+import struct
 from signal import SIGQUIT, SIGTERM
 from unittest.mock import patch, call, mock_open, MagicMock
 
@@ -187,7 +188,7 @@ class TestLoadYAMLFile(Loader):
     """
     Unit tests for lib.util.load_yaml_file
     """
-    @patch("lib.util.yaml.load", autospec=True)
+    @patch("lib.util.yaml.safe_load", autospec=True)
     def test_basic(self, loader):
         self._basic(load_yaml_file, loader)
 
@@ -197,8 +198,8 @@ class TestLoadYAMLFile(Loader):
     def test_json_error(self):
         for excp in (yaml.scanner.ScannerError, ):
             yield (
-                self._check_loader_error, load_yaml_file, "lib.util.yaml.load",
-                excp, SCIONYAMLError,
+                self._check_loader_error, load_yaml_file,
+                "lib.util.yaml.safe_load", excp, SCIONYAMLError,
             )
 
 
@@ -344,11 +345,15 @@ class TestRawCheckType(object):
     """
     Unit tests for lib.util.Raw.check_type
     """
-    def test_bytes(self):
+    def _check_ok(self, data):
         inst = MagicMock(spec_set=["_data"])
-        inst._data = b"asdf"
+        inst._data = data
         Raw.check_type(inst)
 
+    def test_ok(self):
+        for data in (b"asdf", bytearray(b"asdf"), memoryview(b"asdf")):
+            yield self._check_ok, data
+
     def test_error(self):
         inst = MagicMock(spec_set=["_data", "_desc"])
         inst._data = "asdf"
@@ -427,6 +432,66 @@ class TestRawGet(object):
         # Call
         r.get(100, bounds=False)
 
+    def test_no_copy(self):
+        # Setup
+        data = bytearray(b"data")
+        r = Raw(data)
+        # Call
+        view = r.get(2)
+        # Tests
+        ntools.assert_is_instance(view, memoryview)
+        data[0] = ord("b")
+        ntools.eq_(view, b"ba")
+
+
+class TestRawGetStruct(object):
+    """
+    Unit tests for lib.util.Raw.get_struct
+    """
+    def _check(self, fmt):
+        # Setup
+        r = Raw(memoryview(b"\x00data"))
+        r._offset = 1
+        # Call
+        ntools.eq_(r.get_struct(fmt), (0x6461, b"ta"))
+        # Tests
+        ntools.eq_(r._offset, 1)
+
+    def test(self):
+        for fmt in "!H2s", struct.Struct("!H2s"):
+            yield self._check, fmt
+
+    def _check_bounds(self, fmt):
+        # Setup
+        r = Raw(b"data")
+        r._offset = 1
+        # Call
+        ntools.assert_raises(SCIONIndexError, r.get_struct, fmt)
+
+    def test_bounds(self):
+        for fmt in "!I", struct.Struct("!I"):
+            yield self._check_bounds, fmt
+
+
+class TestRawPopStruct(object):
+    """
+    Unit tests for lib.util.Raw.pop_struct
+    """
+    @patch("lib.util.Raw.get_struct", autospec=True)
+    def _check(self, fmt, get_struct):
+        # Setup
+        r = Raw(b"data")
+        r._offset = 1
+        # Call
+        ntools.eq_(r.pop_struct(fmt), get_struct.return_value)
+        # Tests
+        get_struct.assert_called_once_with(r, fmt)
+        ntools.eq_(r._offset, 4)
+
+    def test(self):
+        for fmt in "!BH", struct.Struct("!BH"):
+            yield self._check, fmt
+
 
 class TestRawPop(object):
     """
@@ -0,0 +1,106 @@
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`router_bench_test` --- tools/router_bench.py tests
+========================================================
+"""
+# Stdlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# External packages
+import nose
+import nose.tools as ntools
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+BENCH = os.path.join(ROOT, "tools", "router_bench.py")
+
+
+def _br(idx, ia, link_type):
+    return {
+        "Addr": "127.0.11.%d" % idx, "Port": 31041 + idx,
+        "Interface": {
+            "Addr": "127.0.11.%d" % idx, "Bandwidth": 1000, "IFID": idx,
+            "ISD_AS": ia, "LinkType": link_type, "MTU": 1472,
+            "ToAddr": "127.0.%d.1" % (10 + idx), "ToUdpPort": 50001 + idx,
+            "UdpPort": 50000 + idx,
+        },
+    }
+
+
+TOPOLOGY = {
+    "BeaconServers": {"bs1-11-1": {"Addr": "127.0.11.10", "Port": 31041}},
+    "BorderRouters": {
+        "br1-11-1": _br(1, "1-10", "PARENT"),
+        "br1-11-2": _br(2, "1-12", "CHILD"),
+        "br1-11-3": _br(3, "1-13", "PEER"),
+    },
+    "CertificateServers": {}, "Core": False, "ISD_AS": "1-11", "MTU": 1472,
+    "PathServers": {}, "SibraServers": {}, "Zookeepers": {},
+}
+AS_CONF = {
+    "CertChainVersion": 0, "MasterASKey": "8bTPRmFKMd6Ur4Ne8VD0jw==",
+    "PropagateTime": 5, "RegisterPath": True, "RegisterTime": 5,
+}
+
+
+class TestRouterBench(object):
+    """
+    Runs tools/router_bench.py against a three-interface AS.
+    """
+    def _run(self, *args):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            conf_dir = os.path.join(tmp_dir, "br1-11-1")
+            os.mkdir(conf_dir)
+            for name, conf in (("topology.yml", TOPOLOGY),
+                               ("as.yml", AS_CONF)):
+                with open(os.path.join(conf_dir, name), "w") as f:
+                    yaml.safe_dump(conf, f)
+            out = subprocess.check_output(
+                [sys.executable, BENCH, conf_dir, "-n", "2", "--warmup", "1"] +
+                list(args), cwd=ROOT, env=dict(os.environ, PYTHONPATH=ROOT))
+        return json.loads(out.decode())
+
+    def test_single(self):
+        # Call
+        results = self._run()
+        # Tests
+        kinds = results["kinds"]
+        ntools.eq_(set(kinds), {"up2", "up4", "up8", "down2", "down4",
+                                "down8", "bad_mac", "xover", "peer_up",
+                                "peer_down"})
+        for kind, res in kinds.items():
+            ntools.eq_(res["errors"], 0, kind)
+            ntools.eq_(res["forwarded"], 0 if kind == "bad_mac" else 2, kind)
+        ntools.eq_(results["packets"], 20)
+
+    def test_batch(self):
+        # Call
+        results = self._run("--batch")
+        # Tests
+        ntools.eq_(results["errors"], 0)
+        ntools.eq_(results["packets"], 20)
+        # Everything but the packet with the bad MAC is forwarded exactly
+        # once, also after the bad MAC in the same batch.
+        ntools.eq_(results["forwarded"], 18)
+        ntools.ok_(results["meta"]["batch"])
+
+
+if __name__ == "__main__":
+    nose.run(defaultTest=__name__)
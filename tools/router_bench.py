@@ -0,0 +1,591 @@
+#!/usr/bin/python3
+# Copyright 2016 ETH Zurich
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+:mod:`router_bench` --- Router forwarding benchmark
+===================================================
+
+Measures the packet rate, per-packet latency and per-packet allocations of
+:meth:`infrastructure.router.main.Router.handle_request` (or, with
+``--batch``, of :meth:`~infrastructure.router.main.Router.handle_batch`),
+without a dispatcher or a running topology. The router is built from its
+directory in gen/, with its sockets replaced by stubs that only count the
+packets sent, and is fed either a pcap trace or a synthetic corpus of packets
+traversing it:
+
+- single up- and down-segments of various lengths,
+- up- to down-segment switches,
+- peering shortcuts, towards and from the peering link,
+- packets with invalid MACs.
+
+Results are written as JSON, and can be compared against an earlier run. Run
+from the repository root::
+
+    PYTHONPATH=. tools/router_bench.py gen/ISD1/AS11/br1-11-1 -o out.json
+    PYTHONPATH=. tools/router_bench.py gen/ISD1/AS11/br1-11-1 --batch
+    PYTHONPATH=. tools/router_bench.py gen/ISD1/AS11/br1-11-1 \\
+        --pcap trace.pcap --baseline out.json --max-regression 5
+"""
+# Stdlib
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+from unittest.mock import patch
+
+# External packages
+from nagini_contracts.io_builtins import Place
+
+# SCION
+from lib import contract_erasure
+
+# The router's contracts can't be evaluated at runtime, see bin/router.
+contract_erasure.install()
+
+from infrastructure.router.main import Router  # noqa: E402
+from lib.log import init_logging  # noqa: E402
+from lib.packet.host_addr import HostAddrIPv4  # noqa: E402
+from lib.packet.opaque_field import (  # noqa: E402
+    HopOpaqueField,
+    InfoOpaqueField,
+)
+from lib.packet.packet_base import PayloadRaw  # noqa: E402
+from lib.packet.path import SCIONPath  # noqa: E402
+from lib.packet.scion import SCIONL4Packet, build_base_hdrs  # noqa: E402
+from lib.packet.scion_addr import ISD_AS, SCIONAddr  # noqa: E402
+from lib.packet.scion_udp import SCIONUDPHeader  # noqa: E402
+from lib.stats import Histogram  # noqa: E402
+from lib.types import LinkType  # noqa: E402
+
+#: Version of the result format.
+BENCH_FORMAT_VERSION = 1
+#: Expiration time of the generated HOFs.
+BENCH_HOF_EXP_TIME = 63
+#: Segment lengths used for the synthetic up- and down-segments.
+BENCH_SEG_LENS = (2, 4, 8)
+#: Source and destination hosts of the synthetic packets.
+BENCH_SRC_HOST = HostAddrIPv4("10.0.1.1")
+BENCH_DST_HOST = HostAddrIPv4("10.0.2.1")
+#: AS number offset of the (fictional) remote ASes.
+BENCH_REMOTE_AS_OFFSET = 1000
+
+
+class NullSocket(object):
+    """
+    Stand-in for :class:`lib.socket.UDPSocket`, that drops everything sent
+    on it, and receives the packets queued on it.
+
+    :ivar int sent: number of packets sent.
+    :ivar list queued: (packet, addr) tuples to be received.
+    """
+    def __init__(self, *args, **kwargs):
+        self.sent = 0
+        self.port = 0
+        self.queued = []
+
+    def send(self, data, dst=None):
+        self.sent += 1
+        return True
+
+    def recv_batch(self, count, block=True):
+        batch = self.queued[:count]
+        del self.queued[:count]
+        return batch
+
+    def start_batch(self):
+        pass
+
+    def flush_batch(self):
+        return []
+
+    def close(self):  # pragma: no cover
+        pass
+
+
+def load_router(conf_dir, server_id):
+    """
+    Build a router from its configuration directory, with stubbed sockets.
+    """
+    with patch("infrastructure.router.main.UDPSocket", NullSocket):
+        return Router(server_id, conf_dir)
+
+
+class SyntheticCorpus(object):
+    """
+    Builds packets that enter the local AS through the router's interface,
+    with valid MACs (unless stated otherwise) for the current hop.
+    """
+    def __init__(self, isd_as, if_id, link_types, key, payload_len=64,
+                 seed=0):
+        """
+        :param ISD_AS isd_as: the local AS.
+        :param int if_id: the router's interface.
+        :param dict link_types:
+            map of interface ID to link type, for all interfaces of the AS.
+        :param bytes key: the key HOF MACs are computed with.
+        :param int payload_len: length of the UDP payloads.
+        :param int seed: seed for the filler interface IDs.
+        """
+        self.isd_as = isd_as
+        self.if_id = if_id
+        self.link_types = link_types
+        self.key = key
+        self.payload = bytes(payload_len)
+        self.ts = int(time.time())
+        self._rand = random.Random(seed)
+
+    @classmethod
+    def from_router(cls, router, **kwargs):
+        link_types = {if_id: entry.link_type for if_id, entry in
+                      router.fwd_table.items()}
+        return cls(router.addr.isd_as, router.interface.if_id, link_types,
+                   router.of_gen_key, **kwargs)
+
+    def build(self):
+        """
+        :returns:
+            List of (kind, packed packet, from local socket) tuples, one per
+            kind of packet this AS' topology allows for.
+        """
+        corpus = []
+        for kind, path in self._paths():
+            corpus.append((kind, self._packet(path), False))
+        return corpus
+
+    def _paths(self):
+        fwd_if = self._pick_if()
+        if fwd_if is None:
+            logging.warning("No other interface to forward to, the corpus "
+                            "only contains packets for the local AS")
+            fwd_if = 0
+        for hops in BENCH_SEG_LENS:
+            yield "down%d" % hops, self._single_seg(False, hops, fwd_if)
+            yield "up%d" % hops, self._single_seg(True, hops, fwd_if)
+        yield "bad_mac", self._single_seg(False, BENCH_SEG_LENS[0], fwd_if,
+                                          bad_mac=True)
+        xover_if = self._pick_if(self._xover_allowed)
+        if xover_if is not None:
+            yield "xover", self._xover(xover_if)
+        peer_if = self._pick_if(lambda lt: lt == LinkType.PEER) or fwd_if
+        yield "peer_up", self._peer_up(peer_if)
+        yield "peer_down", self._peer_down(fwd_if)
+
+    def _pick_if(self, allowed=lambda _: True):
+        for if_id, link_type in sorted(self.link_types.items()):
+            if if_id != self.if_id and allowed(link_type):
+                return if_id
+        return None
+
+    def _xover_allowed(self, fwd_link_type):
+        """
+        Whether an up- to down-segment switch towards `fwd_link_type` passes
+        the router's segment switch checks.
+        """
+        rcvd_link_type = self.link_types.get(self.if_id)
+        if LinkType.PEER in (rcvd_link_type, fwd_link_type):
+            return False
+        return not (rcvd_link_type == fwd_link_type == LinkType.ROUTING)
+
+    def _filler_hofs(self, count):
+        hofs = []
+        for _ in range(count):
+            hof = HopOpaqueField.from_values(
+                BENCH_HOF_EXP_TIME, self._rand.randint(1, 4095),
+                self._rand.randint(1, 4095))
+            hof.mac = bytes(self._rand.getrandbits(8)
+                            for _ in range(HopOpaqueField.MAC_LEN))
+            hofs.append(hof)
+        return hofs
+
+    def _iof(self, up, hops, peer=False):
+        return InfoOpaqueField.from_values(
+            self.ts, self.isd_as[0], up_flag=up, shortcut=peer, peer=peer,
+            hops=hops)
+
+    def _sign(self, path, iof_idx, hof_idx, bad_mac=False):
+        """
+        Make the HOF at `hof_idx` the current one, and set its MAC the way
+        the router is going to verify it.
+        """
+        path.set_of_idxs(iof_idx, hof_idx)
+        hof = path.get_hof()
+        hof.mac = hof.calc_mac(self.key, self.ts, path.get_hof_ver())
+        if bad_mac:
+            hof.mac = bytes(b ^ 0xff for b in hof.mac)
+        return path
+
+    def _single_seg(self, up, hops, fwd_if, bad_mac=False):
+        pos = hops // 2 if up else (hops - 1) // 2
+        if up:
+            hof = HopOpaqueField.from_values(BENCH_HOF_EXP_TIME, fwd_if,
+                                             self.if_id)
+        else:
+            hof = HopOpaqueField.from_values(BENCH_HOF_EXP_TIME, self.if_id,
+                                             fwd_if)
+        hofs = self._filler_hofs(hops)
+        hofs[pos] = hof
+        path = SCIONPath.from_values(self._iof(up, hops), hofs)
+        return self._sign(path, 0, 1 + pos, bad_mac)
+
+    def _xover(self, fwd_if):
+        """
+        Up-segment ending at the local AS, followed by a down-segment
+        starting there.
+        """
+        up_hofs = self._filler_hofs(2) + [HopOpaqueField.from_values(
+            BENCH_HOF_EXP_TIME, 0, self.if_id, xover=True)]
+        down_hofs = [HopOpaqueField.from_values(
+            BENCH_HOF_EXP_TIME, 0, fwd_if, xover=True)] + \
+            self._filler_hofs(2)
+        path = SCIONPath.from_values(
+            self._iof(True, len(up_hofs)), up_hofs,
+            self._iof(False, len(down_hofs)), down_hofs)
+        return self._sign(path, 0, len(up_hofs))
+
+    def _peer_up(self, peer_if):
+        """
+        Peering shortcut, arriving on the up-segment, and leaving the local AS
+        over the peering link.
+        """
+        up_hofs = self._filler_hofs(2) + [
+            HopOpaqueField.from_values(BENCH_HOF_EXP_TIME, 0, self.if_id,
+                                       xover=True),
+            HopOpaqueField.from_values(BENCH_HOF_EXP_TIME, peer_if,
+                                       self.if_id, xover=True),
+            self._verify_only_hof(),
+        ]
+        down_hofs = [self._verify_only_hof()] + self._filler_hofs(3)
+        path = SCIONPath.from_values(
+            self._iof(True, len(up_hofs), peer=True), up_hofs,
+            self._iof(False, len(down_hofs), peer=True), down_hofs)
+        return self._sign(path, 0, 3)
+
+    def _peer_down(self, fwd_if):
+        """
+        Peering shortcut, arriving over the peering link, and continuing on
+        the down-segment.
+        """
+        up_hofs = self._filler_hofs(4) + [self._verify_only_hof()]
+        down_hofs = [
+            self._verify_only_hof(),
+            HopOpaqueField.from_values(BENCH_HOF_EXP_TIME, self.if_id, fwd_if,
+                                       xover=True),
+            HopOpaqueField.from_values(BENCH_HOF_EXP_TIME, 0, fwd_if,
+                                       xover=True),
+        ] + self._filler_hofs(2)
+        path = SCIONPath.from_values(
+            self._iof(True, len(up_hofs), peer=True), up_hofs,
+            self._iof(False, len(down_hofs), peer=True), down_hofs)
+        iof_idx = 1 + len(up_hofs)
+        return self._sign(path, iof_idx, iof_idx + 2)
+
+    def _verify_only_hof(self):
+        hof = self._filler_hofs(1)[0]
+        hof.verify_only = True
+        return hof
+
+    def _packet(self, path):
+        remote_ia = ISD_AS.from_values(
+            self.isd_as[0], self.isd_as[1] + BENCH_REMOTE_AS_OFFSET)
+        src = SCIONAddr.from_values(remote_ia, BENCH_SRC_HOST)
+        dst = SCIONAddr.from_values(remote_ia, BENCH_DST_HOST)
+        cmn_hdr, addr_hdr = build_base_hdrs(src, dst)
+        l4_hdr = SCIONUDPHeader.from_values(src, 40000, dst, 40001)
+        spkt = SCIONL4Packet.from_values(cmn_hdr, addr_hdr, path, [], l4_hdr)
+        spkt.set_payload(PayloadRaw(self.payload))
+        spkt.update()
+        return spkt.pack()
+
+
+def load_pcap(path, router):
+    """
+    Extract the SCION packets (UDP payloads) from a pcap file. Packets sent
+    to the router's inter-AS port are treated as coming from the neighboring
+    AS, all others as coming from the local AS.
+    """
+    from scapy.all import UDP, rdpcap
+    corpus = []
+    for pkt in rdpcap(path):
+        if UDP not in pkt:
+            continue
+        udp = pkt[UDP]
+        from_local = udp.dport != router.interface.udp_port
+        corpus.append(("pcap", bytes(udp.payload), from_local))
+    return corpus
+
+
+def _sent(router):
+    return router._udp_sock.sent + router._remote_sock.sent
+
+
+def _clock_ns():
+    """
+    Monotonic clock in integer nanoseconds. time.perf_counter_ns() needs Python
+    3.7.
+    """
+    return int(time.perf_counter() * 1e9)
+
+
+def run_bench(router, corpus, iterations):
+    """
+    Feed `corpus` to the router `iterations` times, timing each packet.
+
+    :returns: `dict` of results, in total and per kind of packet.
+    """
+    total = Histogram()
+    kinds = OrderedDict()
+    for kind, _, _ in corpus:
+        kinds[kind] = {"packets": 0, "forwarded": 0, "errors": 0,
+                       "hist": Histogram()}
+    clock = _clock_ns
+    start = clock()
+    for _ in range(iterations):
+        for kind, raw, from_local in corpus:
+            res = kinds[kind]
+            sent = _sent(router)
+            pkt_start = clock()
+            try:
+                router.handle_request(Place(), raw, None, from_local)
+            except Exception as e:
+                res["errors"] += 1
+                res.setdefault("first_error", repr(e))
+            elapsed = clock() - pkt_start
+            total.record(elapsed)
+            res["hist"].record(elapsed)
+            res["packets"] += 1
+            res["forwarded"] += _sent(router) - sent
+    wall = (clock() - start) / 1e9
+    for res in kinds.values():
+        res["latency_ns"] = res.pop("hist").to_dict()
+    return {
+        "packets": total.count,
+        "seconds": wall,
+        "pps": total.count / wall if wall else None,
+        "latency_ns": total.to_dict(),
+        "kinds": kinds,
+    }
+
+
+def _batches(corpus, size):
+    """
+    Split `corpus` into batches of up to `size` packets received on the same
+    socket, keeping the order of the packets within each socket.
+    """
+    batches = []
+    for from_local in (False, True):
+        pkts = [raw for _, raw, local in corpus if local == from_local]
+        for i in range(0, len(pkts), size):
+            batches.append((from_local, pkts[i:i + size]))
+    return batches
+
+
+def run_batch_bench(router, corpus, iterations):
+    """
+    Feed `corpus` to the router `iterations` times, in batches of up to
+    :attr:`Router.RECV_BATCH_SIZE` packets received through
+    :meth:`Router.handle_batch`, timing each batch.
+
+    :returns:
+        `dict` of results. The latencies are per packet, averaged over each
+        batch.
+    """
+    total = Histogram()
+    batches = _batches(corpus, router.RECV_BATCH_SIZE)
+    packets = forwarded = errors = 0
+    first_error = None
+    clock = _clock_ns
+    start = clock()
+    for _ in range(iterations):
+        for from_local, pkts in batches:
+            sock = router._udp_sock if from_local else router._remote_sock
+            sock.queued = [(raw, None) for raw in pkts]
+            sent = _sent(router)
+            batch_start = clock()
+            try:
+                router.handle_batch(Place(), sock, from_local)
+            except Exception as e:
+                errors += 1
+                first_error = first_error or repr(e)
+            elapsed = clock() - batch_start
+            for _ in pkts:
+                total.record(elapsed // len(pkts))
+            packets += len(pkts)
+            forwarded += _sent(router) - sent
+    wall = (clock() - start) / 1e9
+    results = {
+        "packets": packets,
+        "forwarded": forwarded,
+        "errors": errors,
+        "batches": len(batches) * iterations,
+        "seconds": wall,
+        "pps": packets / wall if wall else None,
+        "latency_ns": total.to_dict(),
+    }
+    if first_error:
+        results["first_error"] = first_error
+    return results
+
+
+def measure_allocs(router, corpus):
+    """
+    Run each packet of `corpus` through the router once, with tracemalloc
+    enabled.
+
+    :returns:
+        `dict` with the mean peak of memory allocated while handling a packet,
+        and the mean number of memory blocks still allocated afterwards.
+    """
+    tracemalloc.start()
+    peak_total = 0
+    blocks = sys.getallocatedblocks()
+    try:
+        for _, raw, from_local in corpus:
+            # Also resets the peak; reset_peak() needs Python 3.9.
+            tracemalloc.clear_traces()
+            try:
+                router.handle_request(Place(), raw, None, from_local)
+            except Exception:
+                pass
+            peak_total += tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    count = len(corpus) or 1
+    return {
+        "peak_bytes_per_packet": peak_total / count,
+        "retained_blocks_per_packet":
+            (sys.getallocatedblocks() - blocks) / count,
+    }
+
+
+def compare(results, baseline, max_regression=None):
+    """
+    Print the changes relative to an earlier run.
+
+    :returns:
+        ``False`` if the packet rate dropped by more than `max_regression`
+        percent.
+    """
+    ok = True
+    rows = [("pps", results["pps"], baseline["pps"])]
+    for pct in ("p50", "p99"):
+        rows.append(("latency %s (ns)" % pct,
+                     results["latency_ns"].get(pct),
+                     baseline["latency_ns"].get(pct)))
+    for name, new, old in rows:
+        if not new or not old:
+            continue
+        change = (new - old) * 100 / old
+        print("%-20s %14.1f -> %14.1f (%+.1f%%)" % (name, old, new, change),
+              file=sys.stderr)
+    if max_regression is not None and results["pps"] and baseline["pps"]:
+        drop = (baseline["pps"] - results["pps"]) * 100 / baseline["pps"]
+        if drop > max_regression:
+            print("Packet rate regressed by %.1f%% (max: %s%%)" %
+                  (drop, max_regression), file=sys.stderr)
+            ok = False
+    return ok
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument('conf_dir', help='Router configuration directory')
+    parser.add_argument('--id', help='Router ID (Default: name of conf_dir)')
+    parser.add_argument('--pcap', help='Replay this pcap file, instead of '
+                        'the synthetic corpus')
+    parser.add_argument('-n', '--iterations', type=int, default=1000,
+                        help='Number of times the corpus is replayed '
+                        '(Default: 1000)')
+    parser.add_argument('--warmup', type=int, default=10,
+                        help='Untimed replays before measuring (Default: 10)')
+    parser.add_argument('--batch', action='store_true',
+                        help='Feed the corpus through Router.handle_batch, '
+                        'instead of one packet at a time')
+    parser.add_argument('--payload', type=int, default=64,
+                        help='Synthetic payload length (Default: 64)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Synthetic corpus seed (Default: 0)')
+    parser.add_argument('-o', '--output', help='Write the results to this '
+                        'file, instead of stdout')
+    parser.add_argument('--baseline', help='Compare with the results of an '
+                        'earlier run')
+    parser.add_argument('--max-regression', type=float,
+                        help='Exit with an error if the packet rate is this '
+                        'many percent below the baseline')
+    parser.add_argument('--log-level', default="CRITICAL",
+                        help='Console log level (Default: CRITICAL)')
+    args = parser.parse_args()
+    init_logging(console_level=getattr(logging, args.log_level))
+    # Keep records below the console level from being created at all.
+    logging.disable(getattr(logging, args.log_level) - 1)
+    conf_dir = os.path.normpath(args.conf_dir)
+    server_id = args.id or os.path.basename(conf_dir)
+    router = load_router(conf_dir, server_id)
+    if args.pcap:
+        corpus = load_pcap(args.pcap, router)
+        corpus_desc = {"pcap": os.path.abspath(args.pcap)}
+    else:
+        corpus = SyntheticCorpus.from_router(
+            router, payload_len=args.payload, seed=args.seed).build()
+        corpus_desc = {"synthetic": [kind for kind, _, _ in corpus],
+                       "payload": args.payload, "seed": args.seed}
+    if not corpus:
+        sys.exit("Empty corpus")
+    bench = run_batch_bench if args.batch else run_bench
+    for _ in range(args.warmup):
+        bench(router, corpus, 1)
+    results = bench(router, corpus, args.iterations)
+    results["allocs"] = measure_allocs(router, corpus)
+    results["meta"] = {
+        "format": BENCH_FORMAT_VERSION,
+        "time": time.time(),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "router": server_id,
+        "corpus": corpus_desc,
+        "corpus_len": len(corpus),
+        "iterations": args.iterations,
+        "batch": args.batch,
+    }
+    out = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(out + "\n")
+    else:
+        print(out)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()